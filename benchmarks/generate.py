@@ -0,0 +1,233 @@
+"""
+Synthetic dataset generator for scale testing.
+Writes a complete data directory (humanitarian plans, camps, users, refugees, volunteering sessions and resource
+requests) in the same formats as data/, at any size. The tables are consistent with each other: every refugee and
+volunteer belongs to an existing camp, and the refugees and volunteers counts and the capacity of each camp agree
+with refugees.csv and users.csv, as they would after using the application.
+A worldcities.csv listing the plan locations is also written, so the application can be run on the dataset:
+
+    python -m benchmarks.generate OUT_DIR [--scale 10k|100k|1m] [--refugees N] [--plans N] [--camps-per-plan N]
+                                  [--volunteers N] [--seed N]
+    HMS_DATA_DIR=OUT_DIR python main.py
+
+The same seed always gives the same dataset, apart from the volunteering sessions, which are in the week after today.
+"""
+import argparse, datetime, os, sys, time
+import pandas as pd, numpy as np
+
+# number of refugee families, plans, camps per plan and volunteers at each preset scale
+SCALES = {
+    '10k': {'refugees': 10_000, 'plans': 20, 'camps_per_plan': 10, 'volunteers': 500},
+    '100k': {'refugees': 100_000, 'plans': 200, 'camps_per_plan': 10, 'volunteers': 5_000},
+    '1m': {'refugees': 1_000_000, 'plans': 1_000, 'camps_per_plan': 20, 'volunteers': 20_000},
+}
+CITIES = ['London', 'Paris', 'Berlin', 'Madrid', 'Rome', 'Lisbon', 'Athens', 'Warsaw', 'Kyiv', 'Istanbul', 'Cairo',
+          'Nairobi', 'Lagos', 'Khartoum', 'Addis Ababa', 'Kabul', 'Karachi', 'Dhaka', 'Manila', 'Jakarta', 'Tokyo',
+          'Beijing', 'Sydney', 'Lima', 'Bogota', 'Santiago', 'Mexico City', 'Chicago', 'Toronto', 'Barcelona']
+EVENTS = ['Storm caused flooding', 'War', 'Earthquake', 'Wildfires', 'Drought', 'Tsunami', 'Hurricane', 'Landslide']
+FIRST_NAMES = ['Amelia', 'Bob', 'Brian', 'Charlie', 'Charlotte', 'Daniel', 'Diana', 'Edward', 'Ellen', 'Fiona',
+               'George', 'Hannah', 'Ian', 'Judy', 'Laura', 'Michael', 'Nora', 'Oscar', 'Paula', 'Quentin', 'Rachel',
+               'Steve', 'Tina', 'Umar', 'Victor', 'Wendy']
+LAST_NAMES = ['Allen', 'Anderson', 'Brown', 'Clark', 'Davis', 'Garcia', 'Hall', 'Harris', 'Hernandez', 'Jackson',
+              'Johnson', 'Jones', 'King', 'Lee', 'Lewis', 'Martin', 'Martinez', 'Miller', 'Robinson', 'Smith',
+              'Taylor', 'Thomas', 'Walker', 'White', 'Wilson', 'Young']
+REMARKS = ['No remarks', 'Needs job assistance', 'Requires language support', 'Missing a pet',
+           'Looking for family members', 'Awaiting relocation']
+# probabilities of each remark, medical condition (1-7) and family size (1-7), similar to data/refugees.csv
+REMARK_WEIGHTS = [0.84, 0.04, 0.035, 0.03, 0.03, 0.025]
+MEDICAL_WEIGHTS = [0.2, 0.15, 0.14, 0.14, 0.11, 0.14, 0.12]
+FAMILY_WEIGHTS = [0.2, 0.15, 0.14, 0.14, 0.11, 0.14, 0.12]
+# share of plans that have ended; ended plans keep their camps and refugees but no volunteers (see admin.end_event)
+ENDED_SHARE = 0.1
+PASSWORD = '111'
+
+
+def _dates(rng, size, first, last, fmt="%d-%m-%Y"):
+    """Returns size random dates from first to last (datetime.date) as strings in the given format."""
+    days = rng.integers(0, (last - first).days + 1, size)
+    return (pd.Timestamp(first) + pd.to_timedelta(days, unit='D')).strftime(fmt)
+
+
+def _names(rng, size):
+    """Returns size random first names and last names."""
+    return np.array(FIRST_NAMES)[rng.integers(0, len(FIRST_NAMES), size)], \
+        np.array(LAST_NAMES)[rng.integers(0, len(LAST_NAMES), size)]
+
+
+def make_plans(rng, plans, camps_per_plan):
+    """Returns humanitarian_plan.csv. Plan IDs are unique combinations of location and start year."""
+    years = np.arange(plans) // len(CITIES) % 10 + 2014
+    locations = [CITIES[i % len(CITIES)] + (f" {i // (len(CITIES) * 10) + 1}" if i >= len(CITIES) * 10 else "")
+                 for i in range(plans)]
+    start = pd.to_datetime(years.astype(str)) + pd.to_timedelta(rng.integers(0, 365, plans), unit='D')
+    ended = rng.random(plans) < ENDED_SHARE
+    ended[0] = False  # volunteers need at least one ongoing plan
+    end = start + pd.to_timedelta(rng.integers(30, 700, plans), unit='D')
+    end = end.where(end.date < datetime.date.today(), pd.Timestamp(datetime.date.today()))
+    return pd.DataFrame({
+        'plan_id': [f"{location}_{year}" for location, year in zip(locations, years)],
+        'description': np.array(EVENTS)[rng.integers(0, len(EVENTS), plans)],
+        'location': locations,
+        'start_date': start.strftime("%d-%m-%Y"),
+        'number_of_camps': camps_per_plan,
+        'end_date': pd.Series(end.strftime("%d-%m-%Y")).where(ended),
+        'food_storage': rng.integers(1, 101, plans) * 1000,
+        'water_storage': rng.integers(1, 101, plans) * 1000,
+        'firstaid_kits_storage': rng.integers(1, 51, plans) * 100,
+    })
+
+
+def make_refugees(rng, refugees, camps):
+    """Returns refugees.csv, with each family in a random camp of the camps DataFrame (plan_id and camp_name)."""
+    camp = rng.integers(0, len(camps.index), refugees)
+    first, last = _names(rng, refugees)
+    return pd.DataFrame({
+        'refugee_id': np.arange(1, refugees + 1),
+        'refugee_name': pd.Series(first) + ' ' + last,
+        'gender': rng.integers(1, 4, refugees),
+        'date_of_birth': _dates(rng, refugees, datetime.date(1930, 1, 1), datetime.date(2013, 12, 31)),
+        'plan_id': camps['plan_id'].to_numpy()[camp],
+        'camp_name': camps['camp_name'].to_numpy()[camp],
+        'medical_condition': rng.choice(np.arange(1, 8), refugees, p=MEDICAL_WEIGHTS),
+        'family_members': rng.choice(np.arange(1, 8), refugees, p=FAMILY_WEIGHTS),
+        'remarks': rng.choice(REMARKS, refugees, p=REMARK_WEIGHTS),
+    })
+
+
+def make_users(rng, volunteers, camps):
+    """Returns users.csv: the admin account and volunteers, each in a random camp of the camps DataFrame."""
+    camp = rng.integers(0, len(camps.index), volunteers)
+    first, last = _names(rng, volunteers + 1)
+    usernames = ['admin'] + [f"volunteer{i}" for i in range(1, volunteers + 1)]
+    active = (rng.random(volunteers + 1) > 0.05).astype(int)
+    requested = ((rng.random(volunteers + 1) < 0.02) & (active == 1)).astype(int)
+    active[0], requested[0] = 1, 0
+    phones = rng.integers(10 ** 9, 10 ** 10, volunteers + 1).astype(str)
+    return pd.DataFrame({
+        'username': usernames,
+        'password': PASSWORD,
+        'account_type': ['admin'] + ['volunteer'] * volunteers,
+        'active': active,
+        'deactivation_requested': requested,
+        'first_name': first,
+        'last_name': last,
+        'email': [f"{username}@example.com" for username in usernames],
+        'phone_number': np.char.add('+44 ', phones),
+        'gender': rng.integers(1, 4, volunteers + 1),
+        'date_of_birth': _dates(rng, volunteers + 1, datetime.date(1950, 1, 1), datetime.date(2005, 12, 31)),
+        'plan_id': np.concatenate([[None], camps['plan_id'].to_numpy()[camp]]),
+        'camp_name': np.concatenate([[None], camps['camp_name'].to_numpy()[camp]]),
+    })
+
+
+def make_camps(rng, camps, refugees, users):
+    """Fills in the volunteers, refugees, capacity and resources of each camp from refugees.csv and users.csv."""
+    keys = ['plan_id', 'camp_name']
+    people = refugees.groupby(keys)['family_members'].sum()
+    staff = users.dropna(subset=keys).groupby(keys).size()
+    index = pd.MultiIndex.from_frame(camps[keys])
+    camps['volunteers'] = staff.reindex(index, fill_value=0).to_numpy()
+    camps['refugees'] = people.reindex(index, fill_value=0).to_numpy()
+    # room for 10-50% more people, in tens
+    spare = rng.uniform(1.1, 1.5, len(camps.index))
+    camps['capacity'] = np.maximum(np.ceil(camps['refugees'] * spare / 10) * 10, 50).astype(int)
+    # between 0 and 30 days of supplies, so some camps have low resources
+    days = rng.uniform(0, 30, (len(camps.index), 3))
+    demand = np.column_stack([camps['refugees'], camps['refugees'], np.ceil(camps['refugees'] / 4)])
+    camps[['food', 'water', 'firstaid_kits']] = (days * demand).astype(int)
+    return camps
+
+
+def make_sessions(rng, users, per_volunteer=3):
+    """
+    Returns volunteering_times.csv: up to per_volunteer sessions per active volunteer, on different days
+    in the week after today, starting on the half hour between 08:00 and 18:00 and lasting 30 minutes to 4 hours.
+    """
+    volunteers = users[(users['account_type'] == 'volunteer') & (users['active'] == 1)]
+    today = pd.Timestamp(datetime.date.today())
+    sessions = []
+    for k in range(per_volunteer):
+        chosen = volunteers[rng.random(len(volunteers.index)) < 0.5]
+        n = len(chosen.index)
+        day = 2 * k + 1 + rng.integers(0, 2, n)  # sessions k are on days 1-2, 3-4, 5-6 so they never overlap
+        start = today + pd.to_timedelta(day, unit='D') + pd.to_timedelta(rng.integers(16, 37, n) * 30, unit='m')
+        end = start + pd.to_timedelta(rng.integers(1, 9, n) * 30, unit='m')
+        sessions.append(pd.DataFrame({
+            'username': chosen['username'].to_numpy(), 'plan_id': chosen['plan_id'].to_numpy(),
+            'camp_name': chosen['camp_name'].to_numpy(),
+            'start_time': start.strftime('%Y-%m-%d %H:%M'), 'end_time': end.strftime('%Y-%m-%d %H:%M'),
+        }))
+    return pd.concat(sessions, ignore_index=True).sort_values(by=['username', 'start_time'], kind='stable')
+
+
+def make_requests(rng, users, share=0.3):
+    """Returns resource_requests.csv: one request from about share of the volunteers, most of them resolved."""
+    volunteers = users[users['account_type'] == 'volunteer']
+    chosen = volunteers[rng.random(len(volunteers.index)) < share]
+    n = len(chosen.index)
+    return pd.DataFrame({
+        'username': chosen['username'].to_numpy(), 'plan_id': chosen['plan_id'].to_numpy(),
+        'camp_name': chosen['camp_name'].to_numpy(),
+        'food': rng.integers(0, 51, n), 'water': rng.integers(0, 51, n), 'firstaid_kits': rng.integers(0, 11, n),
+        'resolved': np.where(rng.random(n) < 0.7, 'yes', 'no'),
+    })
+
+
+def generate(out_dir, refugees, plans, camps_per_plan, volunteers, seed=0):
+    """
+    Writes a synthetic dataset to out_dir (created if needed), replacing any tables already there.
+    Returns a dictionary of the number of rows written to each table.
+    """
+    rng = np.random.default_rng(seed)
+    plan_table = make_plans(rng, plans, camps_per_plan)
+    camps = pd.DataFrame({
+        'plan_id': np.repeat(plan_table['plan_id'].to_numpy(), camps_per_plan),
+        'camp_name': np.tile([f"Camp {i}" for i in range(1, camps_per_plan + 1)], plans),
+    })
+    ongoing = camps['plan_id'].isin(plan_table.loc[plan_table['end_date'].isna(), 'plan_id'])
+    refugee_table = make_refugees(rng, refugees, camps)
+    users = make_users(rng, volunteers, camps[ongoing].reset_index(drop=True))
+    tables = {
+        'humanitarian_plan.csv': plan_table,
+        'camps.csv': make_camps(rng, camps, refugee_table, users),
+        'users.csv': users,
+        'refugees.csv': refugee_table,
+        'volunteering_times.csv': make_sessions(rng, users),
+        'resource_requests.csv': make_requests(rng, users),
+        'worldcities.csv': pd.DataFrame({'city': plan_table['location'], 'city_ascii': plan_table['location'],
+                                         'country': 'Synthetic'}),
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    for filename, df in tables.items():
+        df.to_csv(os.path.join(out_dir, filename), index=False)
+    return {filename: len(df.index) for filename, df in tables.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic dataset in the formats of data/.")
+    parser.add_argument('out_dir', help="directory to write the tables to")
+    parser.add_argument('--scale', choices=SCALES, default='10k', help="preset sizes (default 10k)")
+    parser.add_argument('--refugees', type=int, help="number of refugee families")
+    parser.add_argument('--plans', type=int, help="number of humanitarian plans")
+    parser.add_argument('--camps-per-plan', type=int, help="number of camps in each plan")
+    parser.add_argument('--volunteers', type=int, help="number of volunteer accounts")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default 0)")
+    args = parser.parse_args()
+
+    sizes = dict(SCALES[args.scale])
+    for key in sizes:
+        if getattr(args, key) is not None:
+            sizes[key] = getattr(args, key)
+    if min(sizes.values()) < 1:
+        print("The number of refugees, plans, camps per plan and volunteers must be positive.")
+        return 1
+    start = time.perf_counter()
+    rows = generate(args.out_dir, seed=args.seed, **sizes)
+    for filename, count in rows.items():
+        print(f"{filename:<24}{count:>10} rows")
+    print(f"Written to {args.out_dir} in {time.perf_counter() - start:.1f} s.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
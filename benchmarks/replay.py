@@ -0,0 +1,215 @@
+"""
+Replays a recorded menu session and reports where the time goes.
+A script is a text file with one input per line, exactly as typed at the prompts. It is fed to the main menu,
+or straight to the admin or a volunteer menu (skipping the login), on a copy of the data directory,
+so the same script can be replayed against every version of the code.
+
+Each step is the work done after one input, until the next prompt. For every step the replay records the wall time,
+the tables parsed from disk (cache misses in data_access), the tables written, and the bytes read and written
+by the process (from /proc/self/io, where available). The slowest steps are printed, and --output saves every step
+as JSON. --transcript saves the screen output, with each prompt followed by the input given.
+
+    python -m benchmarks.replay SCRIPT [--entry main|admin|volunteer] [--username NAME] [--data-dir DIR]
+                                       [--output FILE] [--transcript FILE] [--top N]
+
+Record mode runs the session live and saves every input to SCRIPT, so an operator's complaint can be captured once
+and replayed as a benchmark:
+
+    python -m benchmarks.replay SCRIPT --record [--entry ...] [--username NAME] [--data-dir DIR]
+
+Note that dates typed in a script (e.g. of volunteering sessions) must still be valid when it is replayed.
+"""
+import argparse, contextlib, io, json, os, shutil, sys, tempfile, time
+import builtins, logging
+from unittest import mock
+from progs import data_access
+from benchmarks.suite import use_data_dir
+
+ENTRIES = ('main', 'admin', 'volunteer')
+
+
+def io_counters():
+    """Returns the bytes read and written by this process so far, or (None, None) if they are not available."""
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return int(fields['rchar']), int(fields['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def start_session(entry, username=None):
+    """Runs the main menu, or the admin or volunteer menu as the given user (the admin by default)."""
+    if entry == 'main':
+        import main
+        main.main_menu()
+        return
+    users = data_access.read_table('users.csv')
+    if entry == 'admin':
+        from progs.admin import Admin
+        user = users[users['account_type'] == 'admin'].iloc[0]
+        Admin(user['username'], user['password']).admin_menu()
+        return
+    from progs.volunteer import Volunteer
+    import numpy as np
+    user = data_access.lookup('users.csv', username=username, account_type='volunteer')
+    if len(user.index) == 0:
+        raise ValueError(f"Volunteer {username} not found.")
+    user = user.replace({np.nan: None}).iloc[0]
+    Volunteer(user['username'], user['password'], user['first_name'], user['last_name'], user['email'],
+              user['phone_number'], user['gender'], user['date_of_birth'], user['plan_id'],
+              user['camp_name']).volunteer_menu()
+
+
+class Replay:
+    """
+    Stands in for input() during a replay. Returns the inputs of the script one at a time and measures the step
+    that follows each of them. Raises EOFError when the script has no inputs left.
+    """
+
+    def __init__(self, inputs, screen):
+        self.inputs = inputs
+        self.screen = screen
+        self.steps = []
+        self.parsed = []
+        self.written = []
+        self._begin('', '')
+
+    def _begin(self, text, prompt):
+        self.current = {'step': len(self.steps), 'prompt': prompt.strip(), 'input': text}
+        self.parsed.clear()
+        self.written.clear()
+        self.io = io_counters()
+        self.start = time.perf_counter()
+
+    def end(self):
+        """Finishes measuring the current step."""
+        seconds = time.perf_counter() - self.start
+        read, written = io_counters()
+        self.current.update({
+            'seconds': round(seconds, 5),
+            'tables_parsed': list(self.parsed),
+            'tables_written': list(self.written),
+            'bytes_read': None if read is None else read - self.io[0],
+            'bytes_written': None if written is None else written - self.io[1],
+        })
+        self.steps.append(self.current)
+
+    def __call__(self, prompt=''):
+        self.end()
+        if len(self.steps) > len(self.inputs):
+            raise EOFError("The script has no inputs left.")
+        text = self.inputs[len(self.steps) - 1]
+        self.screen.write(f"{prompt}{text}\n")
+        self._begin(text, prompt)
+        return text
+
+
+def replay(inputs, entry='main', username=None):
+    """
+    Replays a list of inputs in the current data directory.
+    Returns the steps measured, the screen output, and whether the session ended before the inputs ran out.
+    """
+    screen = io.StringIO()
+    replayer = Replay(inputs, screen)
+    read_saved, table_written = data_access._read_saved, data_access._table_written
+
+    def counted_read(filename):
+        replayer.parsed.append(filename)
+        return read_saved(filename)
+
+    def counted_write(*filenames, camps=None):
+        replayer.written.extend(filenames)
+        return table_written(*filenames, camps=camps)
+
+    finished = True
+    with mock.patch.object(builtins, 'input', replayer), contextlib.redirect_stdout(screen), \
+            mock.patch.object(data_access, '_read_saved', counted_read), \
+            mock.patch.object(data_access, '_table_written', counted_write):
+        try:
+            start_session(entry, username)
+        except SystemExit:  # the main menu exits the application
+            pass
+        except EOFError:
+            finished = False
+    if finished:
+        replayer.end()
+    return replayer.steps, screen.getvalue(), finished
+
+
+def record(path, entry='main', username=None):
+    """Runs a live session, saving each input to the script file as soon as it is typed."""
+    with open(path, 'w') as script:
+        def recording_input(prompt=''):
+            text = real_input(prompt)
+            script.write(text + '\n')
+            script.flush()
+            return text
+
+        real_input = builtins.input
+        with mock.patch.object(builtins, 'input', recording_input):
+            try:
+                start_session(entry, username)
+            except (SystemExit, EOFError, KeyboardInterrupt):
+                pass
+
+
+def print_summary(steps, finished, top=10):
+    """Prints the total time and the slowest steps of a replay."""
+    total = sum(step['seconds'] for step in steps)
+    print(f"{len(steps)} steps in {total:.3f} s" + ("" if finished else " (the script ran out before the session ended)"))
+    print(f"\nSlowest {min(top, len(steps))} steps:")
+    for step in sorted(steps, key=lambda s: s['seconds'], reverse=True)[:top]:
+        after = f"after {step['input']!r} at {step['prompt']!r}" if step['step'] > 0 else "at start"
+        io_str = "" if step['bytes_read'] is None else \
+            f", {step['bytes_read'] / 1024:.0f} KB read, {step['bytes_written'] / 1024:.0f} KB written"
+        print(f"{step['seconds'] * 1000:9.1f} ms  step {step['step']:<4} {after}: "
+              f"{len(step['tables_parsed'])} tables parsed, {len(step['tables_written'])} written{io_str}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay or record a scripted menu session.")
+    parser.add_argument('script', help="script file, one input per line")
+    parser.add_argument('--record', action='store_true', help="run a live session and save its inputs to the script")
+    parser.add_argument('--entry', choices=ENTRIES, default='main', help="menu to start from (default main)")
+    parser.add_argument('--username', help="volunteer to log in as with --entry volunteer")
+    parser.add_argument('--data-dir', default=os.environ.get('HMS_DATA_DIR', 'data'),
+                        help="data directory to copy for the session (default HMS_DATA_DIR or data)")
+    parser.add_argument('--output', help="JSON file to save the steps to")
+    parser.add_argument('--transcript', help="text file to save the screen output to")
+    parser.add_argument('--top', type=int, default=10, help="number of slowest steps to print (default 10)")
+    args = parser.parse_args()
+    if args.entry == 'volunteer' and not args.username:
+        parser.error("--username is needed with --entry volunteer")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # the session runs on a copy, so the script can be recorded and replayed from the same starting data
+        work_dir = os.path.join(tmp, 'data')
+        shutil.copytree(args.data_dir, work_dir, ignore=shutil.ignore_patterns('*.tmp'))
+        use_data_dir(work_dir)
+        if args.record:
+            logging.basicConfig(level=logging.DEBUG, filename='output.log', filemode='w',
+                                format='%(module)s - %(levelname)s - %(message)s')
+            record(args.script, args.entry, args.username)
+            print(f"\nInputs saved to {args.script}.")
+            return 0
+
+        logging.disable(logging.CRITICAL)
+        with open(args.script) as f:
+            inputs = f.read().splitlines()
+        steps, screen, finished = replay(inputs, args.entry, args.username)
+
+    print_summary(steps, finished, args.top)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'script': args.script, 'entry': args.entry, 'finished': finished, 'steps': steps}, f, indent=2)
+        print(f"\nSteps saved to {args.output}.")
+    if args.transcript:
+        with open(args.transcript, 'w') as f:
+            f.write(screen)
+        print(f"Transcript saved to {args.transcript}.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Startup time benchmark.
+Measures the time taken to import main.py (using python -X importtime) and to start the application and exit
+from the main menu, and checks that pandas and numpy are not imported before they are needed.
+Exits with status 1 if either time is over its budget, so it can be run as a regression check:
+
+    python -m benchmarks.startup [--runs N] [--import-budget MS] [--startup-budget MS]
+"""
+import argparse, os, subprocess, sys, tempfile, time
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, 'main.py')
+
+# default budgets in milliseconds
+IMPORT_BUDGET_MS = 50
+STARTUP_BUDGET_MS = 250
+# modules that should only be imported once a user logs in
+HEAVY_MODULES = ('pandas', 'numpy')
+
+
+def import_time_ms():
+    """Returns the cumulative import time of main.py in milliseconds, as reported by python -X importtime."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    # lines have the format "import time: self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == 'main':
+            return int(fields[1]) / 1000
+    raise RuntimeError("main not found in -X importtime output.")
+
+
+def startup_time_ms():
+    """Returns the time in milliseconds taken to start the application, show the main menu and exit."""
+    with tempfile.TemporaryDirectory() as cwd:  # the application writes output.log to the working directory
+        start = time.perf_counter()
+        subprocess.run([sys.executable, MAIN], cwd=cwd, input="0\n", capture_output=True, text=True, check=True)
+        return (time.perf_counter() - start) * 1000
+
+
+def heavy_modules_imported():
+    """Returns the heavy modules that are imported by main.py before the main menu is shown."""
+    code = "import main, sys; print(' '.join(m for m in %r if m in sys.modules))" % (HEAVY_MODULES,)
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that application startup stays within budget.")
+    parser.add_argument('--runs', type=int, default=5, help="number of runs (the median is used)")
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET_MS, help="budget for importing main.py (ms)")
+    parser.add_argument('--startup-budget', type=float, default=STARTUP_BUDGET_MS,
+                        help="budget for starting the application and exiting from the main menu (ms)")
+    args = parser.parse_args()
+
+    import_ms = statistics.median(import_time_ms() for _ in range(args.runs))
+    startup_ms = statistics.median(startup_time_ms() for _ in range(args.runs))
+    heavy = heavy_modules_imported()
+
+    print(f"import main:  {import_ms:8.1f} ms (budget {args.import_budget:.0f} ms)")
+    print(f"startup+exit: {startup_ms:8.1f} ms (budget {args.startup_budget:.0f} ms)")
+    print(f"heavy modules imported at startup: {', '.join(heavy) if heavy else 'none'}")
+
+    failed = import_ms > args.import_budget or startup_ms > args.startup_budget or heavy
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
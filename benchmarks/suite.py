@@ -0,0 +1,289 @@
+"""
+Benchmark suite for the data paths that slow down as the data grows.
+Each case runs the application code for one user action (login, the low-resources warning, listing the refugees
+at a camp, working out available volunteering times, smart allocation, closing a camp, bulk import, ...)
+against datasets made by benchmarks/generate.py at one or more scales.
+
+Every run works on a fresh copy of the dataset. A case is timed with an empty table cache ("cold", as just after
+the application starts) and with the tables it reads already cached ("warm", as later in a session),
+and its peak memory is measured in a separate cold run with tracemalloc.
+The results are saved as JSON, and comparing them with an earlier file exits with status 1 if any case got slower:
+
+    python -m benchmarks.suite [--scales 10k 100k] [--cases NAME ...] [--repeats N] [--data-dir DIR]
+                               [--output FILE] [--compare OLD_FILE] [--threshold RATIO]
+
+Set HMS_BACKEND=sqlite to benchmark the SQLite backend instead of the csv files.
+"""
+import argparse, contextlib, datetime, io, json, os, platform, shutil, subprocess, sys, tempfile, time, tracemalloc
+import logging, statistics
+from unittest import mock
+import pandas as pd, numpy as np
+from benchmarks import generate
+from progs import (auto_resources, bulk_import, data_access, resource_ledger, selection_refugees, services,
+                   supply_status, volunteering_session_funcs)
+from progs.admin import Admin
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# a case is slower if it takes more than this many times as long as in the compared results
+THRESHOLD = 1.2
+# number of families registered by the bulk import case
+IMPORT_FAMILIES = 1000
+
+
+def pick_targets(data_dir):
+    """
+    Returns the plan, camp and volunteer the cases work on: the camp with the most refugees in the first
+    ongoing plan and the volunteer of that plan with the most volunteering sessions.
+    Also builds the intake used by the bulk import case.
+    """
+    plans = pd.read_csv(os.path.join(data_dir, 'humanitarian_plan.csv'))
+    plan_id = plans.loc[plans['end_date'].isna(), 'plan_id'].iloc[0]
+    camps = pd.read_csv(os.path.join(data_dir, 'camps.csv'))
+    camps = camps[camps['plan_id'] == plan_id]
+    camp_name = camps.loc[camps['refugees'].idxmax(), 'camp_name']
+    users = pd.read_csv(os.path.join(data_dir, 'users.csv'), dtype={'password': str})
+    sessions = pd.read_csv(os.path.join(data_dir, 'volunteering_times.csv'))
+    volunteers = users.loc[(users['plan_id'] == plan_id) & (users['active'] == 1), 'username']
+    counts = sessions['username'].value_counts().reindex(volunteers, fill_value=0)
+    username = counts.idxmax() if len(counts.index) > 0 else users['username'].iloc[-1]
+
+    rng = np.random.default_rng(0)
+    first, last = generate._names(rng, IMPORT_FAMILIES)
+    intake = pd.DataFrame({
+        'refugee_name': pd.Series(first) + ' ' + last,
+        'gender': rng.integers(1, 4, IMPORT_FAMILIES).astype(str),
+        'date_of_birth': generate._dates(rng, IMPORT_FAMILIES, datetime.date(1940, 1, 1), datetime.date(2013, 12, 31)),
+        'plan_id': plan_id,
+        'camp_name': camp_name,
+        'medical_condition': rng.integers(1, 8, IMPORT_FAMILIES).astype(str),
+        'family_members': rng.integers(1, 8, IMPORT_FAMILIES).astype(str),
+        'remarks': 'No remarks',
+    })
+    return {'plan_id': plan_id, 'camp_name': camp_name, 'camp_names': camps['camp_name'].tolist(),
+            'username': username, 'intake': intake}
+
+
+# cases: each one runs the code behind a user action, given the targets from pick_targets()
+
+def login(t):
+    """Volunteer login: looks up the user and deletes past volunteering sessions (main.volunteer_login)."""
+    data_access.lookup('users.csv', username=t['username'], account_type='volunteer')
+    volunteering_session_funcs.purge_past_sessions()
+
+
+def med_needed(t):
+    """First-aid kits needed at each camp of the plan and the top-up amounts shown by auto_resources.auto_all."""
+    demand = auto_resources.med_demand()
+    for camp_name in t['camp_names']:
+        auto_resources.med_needed(t['plan_id'], camp_name, demand)
+    services.top_up_needed(t['plan_id'])
+
+
+def low_resources(t):
+    """The low-resources warning shown when the admin logs in."""
+    Admin('admin', '111').low_resources_notification()
+
+
+def refugee_listing(t):
+    """Lists every refugee at the camp, as in selection_refugees.select_refugee with the [S] option."""
+    with mock.patch('builtins.input', side_effect=['S', 'X']):
+        selection_refugees.select_refugee(t['plan_id'], t['camp_name'])
+
+
+def session_availability(t):
+    """Works out the available start and end times on each day a volunteer can add a session."""
+    vol_times = data_access.read_table('volunteering_times.csv')
+    sessions = volunteering_session_funcs.SessionIndex(vol_times[vol_times['username'] == t['username']])
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    for day in range(14):
+        first = volunteering_session_funcs.to_slot(f"{tomorrow + datetime.timedelta(days=day)} 00:00")
+        starts = sessions.available_starts(first, first + volunteering_session_funcs.SLOTS_PER_DAY - 1)
+        for start in starts:
+            sessions.available_ends(start)
+
+
+def close_camp(t):
+    """Closes the last camp of the plan and reallocates its refugees (hum_plan_funcs.edit_no_camps)."""
+    services.close_camps(t['plan_id'], 1)
+
+
+def top_up(t):
+    """Smart allocation: tops up every camp of the plan to 7 days of supplies (auto_resources.auto_all)."""
+    services.top_up(t['plan_id'])
+
+
+def fill_storage(data_dir, t):
+    """Gives the plan enough resources in storage for top_up to go ahead."""
+    path = os.path.join(data_dir, 'humanitarian_plan.csv')
+    plans = pd.read_csv(path)
+    plans.loc[plans['plan_id'] == t['plan_id'], auto_resources.STORAGE] = 10 ** 9
+    plans.to_csv(path, index=False)
+
+
+def import_families(t):
+    """Registers IMPORT_FAMILIES refugee families at the camp with bulk_import.import_refugees."""
+    bulk_import.import_refugees(t['intake'].copy())
+
+
+def make_room(data_dir, t):
+    """Raises the capacity of the camp so the imported families fit."""
+    path = os.path.join(data_dir, 'camps.csv')
+    camps = pd.read_csv(path)
+    chosen = (camps['plan_id'] == t['plan_id']) & (camps['camp_name'] == t['camp_name'])
+    camps.loc[chosen, 'capacity'] += pd.to_numeric(t['intake']['family_members']).sum()
+    camps.to_csv(path, index=False)
+
+
+# tables read by the cases that move resources, to record the movements
+LEDGER_TABLES = [resource_ledger.LEDGER_FILE, resource_ledger.SNAPSHOT_FILE]
+
+# name -> (function, tables it reads, function preparing the dataset copy or None)
+CASES = {
+    'login': (login, ['users.csv', 'volunteering_times.csv'], None),
+    'med_needed': (med_needed, ['refugees.csv', 'camps.csv'], None),
+    'low_resources': (low_resources, ['supply_status.csv'], None),
+    'refugee_listing': (refugee_listing, ['refugees.csv'], None),
+    'session_availability': (session_availability, ['volunteering_times.csv'], None),
+    'close_camp': (close_camp, ['humanitarian_plan.csv', 'camps.csv', 'refugees.csv', 'users.csv',
+                                'volunteering_times.csv'] + LEDGER_TABLES, None),
+    'top_up': (top_up, ['humanitarian_plan.csv', 'camps.csv', 'refugees.csv'] + LEDGER_TABLES, fill_storage),
+    'bulk_import': (import_families, ['humanitarian_plan.csv', 'camps.csv', 'refugees.csv'], make_room),
+}
+
+
+def use_data_dir(data_dir):
+    """Points data_access at a data directory, closing any open database and clearing the table cache."""
+    if data_access._conn is not None:
+        data_access._conn.close()
+        data_access._conn = None
+    data_access.DATA_DIR = data_dir
+    data_access.DB_PATH = os.path.join(data_dir, 'hms.db')
+    data_access.invalidate()
+
+
+def run_once(name, dataset, work_dir, targets, warm=False, memory=False):
+    """
+    Runs a case once on a fresh copy of the dataset, with the tables it reads already cached if warm is True.
+    Returns the time taken in seconds, or the peak memory allocated in bytes if memory is True.
+    """
+    func, tables, prepare = CASES[name]
+    shutil.rmtree(work_dir, ignore_errors=True)
+    shutil.copytree(dataset, work_dir)
+    if prepare is not None:
+        prepare(work_dir, targets)
+    use_data_dir(work_dir)
+    supply_status.read_status()  # creates the database (with HMS_BACKEND=sqlite) and supply_status.csv
+    resource_ledger.start()  # done at login in a session
+    data_access.invalidate()
+    if warm:
+        for filename in tables:
+            data_access.read_table(filename)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if memory:
+            tracemalloc.start()
+            func(targets)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return peak
+        start = time.perf_counter()
+        func(targets)
+        return time.perf_counter() - start
+
+
+def dataset_dir(data_dir, scale, seed):
+    """Returns the directory of the dataset at the given scale, generating it if it does not exist yet."""
+    path = os.path.join(data_dir, f"{scale}-seed{seed}")
+    if not os.path.exists(os.path.join(path, 'refugees.csv')):
+        print(f"Generating the {scale} dataset in {path}...")
+        generate.generate(path, seed=seed, **generate.SCALES[scale])
+    return path
+
+
+def run_suite(scales, cases, repeats, data_dir, seed=0):
+    """Runs the cases at each scale and returns a list of results (one dictionary per case and scale)."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = os.path.join(tmp, 'work')
+        for scale in scales:
+            dataset = dataset_dir(data_dir, scale, seed)
+            targets = pick_targets(dataset)
+            for name in cases:
+                cold = [run_once(name, dataset, work_dir, targets) for _ in range(repeats)]
+                warm = [run_once(name, dataset, work_dir, targets, warm=True) for _ in range(repeats)]
+                peak = run_once(name, dataset, work_dir, targets, memory=True)
+                result = {'case': name, 'scale': scale, 'cold_s': round(statistics.median(cold), 5),
+                          'warm_s': round(statistics.median(warm), 5), 'peak_mb': round(peak / 2 ** 20, 2)}
+                print(f"{scale:>5} {name:<22}cold {result['cold_s'] * 1000:9.1f} ms  "
+                      f"warm {result['warm_s'] * 1000:9.1f} ms  peak {result['peak_mb']:8.1f} MB")
+                results.append(result)
+    use_data_dir(os.environ.get('HMS_DATA_DIR', 'data'))
+    return results
+
+
+def environment():
+    """Returns the version of the code and of the libraries the results were measured with."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+            'backend': data_access.BACKEND, 'machine': platform.machine()}
+
+
+def compare(old, new, threshold=THRESHOLD):
+    """
+    Prints the cold and warm times of each case in two sets of results, and returns the cases (case, scale)
+    that take more than threshold times as long in the new results.
+    """
+    before = {(r['case'], r['scale']): r for r in old['results']}
+    slower = []
+    print(f"\nCompared with {old['environment'].get('commit')} ({old['environment'].get('date')}):")
+    for r in new['results']:
+        key = (r['case'], r['scale'])
+        if key not in before:
+            continue
+        ratios = [r[col] / before[key][col] if before[key][col] else 1 for col in ('cold_s', 'warm_s')]
+        flag = max(ratios) > threshold
+        if flag:
+            slower.append(key)
+        print(f"{r['scale']:>5} {r['case']:<22}cold x{ratios[0]:5.2f}  warm x{ratios[1]:5.2f}"
+              f"{'  SLOWER' if flag else ''}")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hot data paths on generated datasets.")
+    parser.add_argument('--scales', nargs='+', choices=generate.SCALES, default=['10k', '100k'],
+                        help="dataset scales (default 10k 100k)")
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=list(CASES), help="cases to run (default all)")
+    parser.add_argument('--repeats', type=int, default=3, help="timed runs of each case (the median is used)")
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'hms-benchmark-data'),
+                        help="directory the generated datasets are kept in, so they are only generated once")
+    parser.add_argument('--seed', type=int, default=0, help="random seed of the datasets (default 0)")
+    parser.add_argument('--output', help="JSON file to save the results to (default benchmark-<commit>.json)")
+    parser.add_argument('--compare', help="JSON file of earlier results to compare with")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help=f"ratio above which a case counts as slower (default {THRESHOLD})")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)  # the application logs every step
+    results = {'environment': environment(), 'repeats': args.repeats, 'seed': args.seed,
+               'results': run_suite(args.scales, args.cases, args.repeats, args.data_dir, args.seed)}
+    output = args.output or f"benchmark-{results['environment']['commit'] or 'results'}.json"
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {output}.")
+
+    if args.compare:
+        with open(args.compare) as f:
+            slower = compare(json.load(f), results, args.threshold)
+        print("FAIL" if slower else "OK")
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
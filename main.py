@@ -1,18 +1,11 @@
 '''Run this file in the command line to open the application.'''
 # built-in modules
-import pandas as pd, numpy as np, datetime, os
 import logging
 # custom modules and functions from other files
-from progs import volunteer_funcs
-from progs.volunteer import Volunteer
-from progs.admin import Admin
+# (the modules that use pandas are imported inside the functions that need them,
+# so that the main menu is shown without waiting for pandas to load)
 from progs.coded_vars import convert_gender
 
-logging.basicConfig(level=logging.DEBUG,
-                    filename='output.log',
-                    filemode='w',
-                    format='%(module)s - %(levelname)s - %(message)s')
-
 
 def main_menu():
     """
@@ -54,6 +47,8 @@ def admin_login():
     """
     print("\n--------------------------------------------")
     print("\t\tADMIN LOGIN")
+    from progs import data_access, volunteering_session_funcs
+    from progs.admin import Admin
     while True:
         logging.debug("User has entered admin login.")
         username = input(">>Username (enter [0] to go back to main menu): ")
@@ -69,9 +64,7 @@ def admin_login():
             continue
 
         # check login details against users table
-        users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
-
-        select_user = users[(users['username'] == username) & (users['account_type'] == "admin")]
+        select_user = data_access.lookup('users.csv', username=username, account_type="admin")
         if len(select_user.index) == 0:  # username not registered
             print("\nUsername not found. Please try again.\n")
             logging.warning("Username entered by user was not found.")
@@ -84,6 +77,7 @@ def admin_login():
 
         print("\nLogin successful!")
         logging.info("User logged in as: Admin")
+        volunteering_session_funcs.purge_past_sessions()
         # create admin object
         a = Admin(username, password)
         a.admin_menu()
@@ -129,6 +123,9 @@ def volunteer_login():
     """
     print("\n--------------------------------------------")
     print("\t\tVOLUNTEER LOGIN")
+    import numpy as np
+    from progs import data_access, volunteering_session_funcs
+    from progs.volunteer import Volunteer
     while True:
         logging.debug("User has entered volunteer login.")
         username = input(">>Username (enter [0] to go back to previous menu): ")
@@ -143,9 +140,7 @@ def volunteer_login():
             continue
 
         # check login details against users table
-        users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
-
-        select_user = users[(users['username'] == username) & (users['account_type'] == "volunteer")]
+        select_user = data_access.lookup('users.csv', username=username, account_type="volunteer")
         if len(select_user.index) == 0:  # username not registered
             print("\nUsername not found. Please try again.\n")
             logging.warning("Username entered by user was not found.")
@@ -164,6 +159,7 @@ def volunteer_login():
         # Login successful, initialise volunteer object and go to volunteer menu
         print("\nLogin successful!")
         logging.info("User logged in as: Volunteer")
+        volunteering_session_funcs.purge_past_sessions()
         select_user = select_user.replace({np.nan: None})
         v = Volunteer(select_user.iloc[0]['username'], select_user.iloc[0]['password'],
                       select_user.iloc[0]['first_name'], select_user.iloc[0]['last_name'], select_user.iloc[0]['email'],
@@ -184,6 +180,7 @@ def volunteer_registration():
     print("\n--------------------------------------------")
     print("\t\tVOLUNTEER REGISTRATION")
     print("You will be prompted to enter details for registration.")
+    from progs import volunteer_funcs, services
 
     progress = 0
     # loop allowing user to go back
@@ -306,23 +303,8 @@ def volunteer_registration():
     #         f'\n{username},{password},volunteer,1,0,{first_name},{last_name},{email},{phone_number},{gender},{date_of_birth},{plan_id},')
     # users.close()
 
-    users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
-    new_row = {'username': [username], 'password': [password], 'account_type': ['volunteer'], 'active': [1],
-               'deactivation_requested': [0], 'first_name': [first_name], 'last_name': [last_name], 'email': [email],
-               'phone_number': [phone_number], 'gender': [gender], 'date_of_birth': [date_of_birth],
-               'plan_id': [plan_id], 'camp_name': [camp_name]}
-    new = pd.DataFrame(new_row)
-    users = pd.concat([users, new], ignore_index=True)
-    users = users.sort_values(by=['username'])  # sort by username before saving
-    users.to_csv(os.path.join('data', 'users.csv'), index=False)
-    logging.debug("users.csv updated")
-
-    if camp_name:
-        camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
-        chosen = (camps['camp_name'] == camp_name)
-        camps.loc[chosen, 'volunteers'] = camps.loc[chosen, 'volunteers'] + 1
-        camps.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
-        logging.debug("camps csv file updated")
+    services.create_volunteer(username, password, first_name, last_name, email, phone_number, gender, date_of_birth,
+                              plan_id, camp_name)
 
     # Print details provided in registration
     gender_str = convert_gender(gender)
@@ -339,23 +321,26 @@ def volunteer_registration():
     return
 
 
+def print_banner():
+    """Prints the banner shown when the application starts."""
+    print("---------------------------------------------------------------------")
+    print("│          ╦ ╦ ┬ ┬ ┌┬┐ ┌─┐ ┌┐┌ ┬ ┌┬┐ ┌─┐ ┬─┐ ┬ ┌─┐ ┌┐┌             │")
+    print("│          ╠═╣ │ │ │││ ├─┤ │││ │  │  ├─┤ ├┬┘ │ ├─┤ │││             │")
+    print("│          ╩ ╩ └─┘ ┴ ┴ ┴ ┴ ┘└┘ ┴  ┴  ┴ ┴ ┴└─ ┴ ┴ ┴ ┘└┘             │")
+    print("│ ╔╦╗ ┌─┐ ┌┐┌ ┌─┐ ┌─┐ ┌─┐ ┌┬┐ ┌─┐ ┌┐┌ ┌┬┐  ╔═╗ ┬ ┬ ┌─┐ ┌┬┐ ┌─┐ ┌┬┐ │")
+    print("│ ║║║ ├─┤ │││ ├─┤ │ ┬ ├┤  │││ ├┤  │││  │   ╚═╗ └┬┘ └─┐  │  ├┤  │││ │")
+    print("│ ╩ ╩ ┴ ┴ ┘└┘ ┴ ┴ └─┘ └─┘ ┴ ┴ └─┘ ┘└┘  ┴   ╚═╝  ┴  └─┘  ┴  └─┘ ┴ ┴ │")
+    print("│     Authors: Elsie BROWN, Georges LINEL, Jasmine CHAU,           │")
+    print("│              Matthew GOH, Victor CHAN, and Ying HUANG            │")
+    print("---------------------------------------------------------------------")
+    print("           WELCOME TO HUMANITARIAN MANAGEMENT SYSTEM!\n")
+
+
 # Run the program
-print("---------------------------------------------------------------------")
-print("│          ╦ ╦ ┬ ┬ ┌┬┐ ┌─┐ ┌┐┌ ┬ ┌┬┐ ┌─┐ ┬─┐ ┬ ┌─┐ ┌┐┌             │")
-print("│          ╠═╣ │ │ │││ ├─┤ │││ │  │  ├─┤ ├┬┘ │ ├─┤ │││             │")
-print("│          ╩ ╩ └─┘ ┴ ┴ ┴ ┴ ┘└┘ ┴  ┴  ┴ ┴ ┴└─ ┴ ┴ ┴ ┘└┘             │")
-print("│ ╔╦╗ ┌─┐ ┌┐┌ ┌─┐ ┌─┐ ┌─┐ ┌┬┐ ┌─┐ ┌┐┌ ┌┬┐  ╔═╗ ┬ ┬ ┌─┐ ┌┬┐ ┌─┐ ┌┬┐ │")
-print("│ ║║║ ├─┤ │││ ├─┤ │ ┬ ├┤  │││ ├┤  │││  │   ╚═╗ └┬┘ └─┐  │  ├┤  │││ │")
-print("│ ╩ ╩ ┴ ┴ ┘└┘ ┴ ┴ └─┘ └─┘ ┴ ┴ └─┘ ┘└┘  ┴   ╚═╝  ┴  └─┘  ┴  └─┘ ┴ ┴ │")
-print("│     Authors: Elsie BROWN, Georges LINEL, Jasmine CHAU,           │")
-print("│              Matthew GOH, Victor CHAN, and Ying HUANG            │")
-print("---------------------------------------------------------------------")
-print("           WELCOME TO HUMANITARIAN MANAGEMENT SYSTEM!\n")
-
-# When application starts, delete all volunteering sessions that ended in the past
-vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
-n = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
-vol_times = vol_times.drop(vol_times[vol_times['end_time'] < n].index)
-vol_times.to_csv(os.path.join('data', 'volunteering_times.csv'), index=False)
-
-main_menu()
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG,
+                        filename='output.log',
+                        filemode='w',
+                        format='%(module)s - %(levelname)s - %(message)s')
+    print_banner()
+    main_menu()
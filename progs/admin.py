@@ -1,5 +1,5 @@
 # built-in modules
-import pandas as pd, numpy as np, os
+import pandas as pd, numpy as np
 from datetime import datetime
 import logging
 # custom modules and functions from other files
@@ -8,10 +8,11 @@ from progs.coded_vars import convert_gender, convert_medical_condition
 from progs.selection import select_plan, select_camp
 from progs.selection_volunteer import select_plan_camp_vol
 from progs.selection_refugees import select_plan_camp_refugee
-from progs import auto_resources, hum_plan_funcs, volunteer_funcs, refugee_profile_funcs, volunteering_session_funcs, resource_consumption
+from progs import auto_resources, hum_plan_funcs, volunteer_funcs, refugee_profile_funcs, volunteering_session_funcs, resource_consumption, data_access, supply_status, services, bulk_import, io_stats, resource_ledger
 from progs import verify as v
 
 
+@io_stats.track_actions
 class Admin:
     """Class for the Admin user. Since there can only be 1 admin, this class can only be initialised once"""
 
@@ -19,6 +20,8 @@ class Admin:
         self.username = username  # if login credentials are correct, admin object is initialised
         self.password = password
         self.logged_in = True
+        resource_ledger.set_actor(username)  # movements of resources are recorded under the admin's username
+        resource_ledger.reconcile()  # records any change to the stock that was not made through the system
         pd.set_option('display.max_columns', None)  # all columns of DataFrames will be displayed (nothing is cut off)
 
     def create_hum_plan(self):
@@ -79,16 +82,21 @@ class Admin:
         hu_pl = HumanitarianPlan(desc, loc, start_date, nb_of_camps)
         name = f'{loc}_{start_date[6:]}'
 
-        # Opens the csv file and adds the data for this humanitarian plan
-        h = open(os.path.join('data', 'humanitarian_plan.csv'), "a")
-        h.write(f'\n{name},{desc},{loc},{start_date},{nb_of_camps},,{1000},{1000},{250}')  # default amount of resources
-        # desc is wrapped in "" because we don't want to csv file to see a "," in the description as a delimitter
-        h.close()
-
-        # sort by plan_id after a new plan is added
-        plans = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
-        plans = plans.sort_values(by=['plan_id'])
-        plans.to_csv(os.path.join('data', 'humanitarian_plan.csv'), index=False)
+        # Adds the data for this humanitarian plan, with the default amount of resources
+        # (desc is quoted if necessary so that a "," in the description is not treated as a delimiter)
+        storage = {'food_storage': 1000, 'water_storage': 1000, 'firstaid_kits_storage': 250}
+        with data_access.UnitOfWork():
+            data_access.append_row('humanitarian_plan.csv', {
+                'plan_id': name, 'description': desc, 'location': loc, 'start_date': start_date,
+                'number_of_camps': nb_of_camps, 'end_date': None, **storage})
+
+            # sort by plan_id after a new plan is added
+            plans = data_access.read_table('humanitarian_plan.csv')
+            plans = plans.sort_values(by=['plan_id'])
+            data_access.write_table(plans, 'humanitarian_plan.csv')
+            resource_ledger.record(resource_ledger.DELIVERY, [(name, resource_ledger.STORAGE, resource, storage[col])
+                                                              for resource, col in zip(auto_resources.RESOURCES,
+                                                                                       auto_resources.STORAGE)])
         logging.debug("humanitarian_plan.csv updated")
 
         # Prints out the information about the Humanitarian Plan created
@@ -105,7 +113,7 @@ class Admin:
         '''
         print("\n--------------------------------------------")
         print("\tEDIT HUMANITARIAN PLAN")
-        hum_plan_df = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
+        hum_plan_df = data_access.read_table('humanitarian_plan.csv')
         hum_plan_df = hum_plan_df[hum_plan_df['end_date'].isna()]
         hum_plan_df = hum_plan_df.reset_index(drop=True)
         if len(hum_plan_df.index) == 0:
@@ -223,7 +231,7 @@ class Admin:
 
         progress = 0
         # loop allowing user to go back
-        while progress < 10:
+        while progress < 11:
             if progress == 0:
                 plan_id = volunteer_funcs.add_plan()
                 if plan_id == "X":
@@ -331,25 +339,24 @@ class Admin:
                 else:
                     progress += 1
 
-        logging.debug("Admin has finished entering volunteer details.")
-        # update csv files
-        users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
-        new_row = {'username': [username], 'password': [password], 'account_type': ['volunteer'], 'active': [1],
-                   'deactivation_requested': [0], 'first_name': [first_name], 'last_name': [last_name],
-                   'email': [email], 'phone_number': [phone_number], 'gender': [gender],
-                   'date_of_birth': [date_of_birth], 'plan_id': [plan_id], 'camp_name': [camp_name]}
-        new = pd.DataFrame(new_row)
-        users = pd.concat([users, new], ignore_index=True)
-        users = users.sort_values(by=['username'])  # sort by username before saving
-        users.to_csv(os.path.join('data', 'users.csv'), index=False)
-        logging.debug("users.csv updated")
-
-        if camp_name:
-            camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
-            chosen = (camps['camp_name'] == camp_name)
-            camps.loc[chosen, 'volunteers'] = camps.loc[chosen, 'volunteers'] + 1
-            camps.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
-            logging.debug("camps csv file updated")
+            elif progress == 10:
+                logging.debug("Admin has finished entering volunteer details.")
+                # update csv files
+                try:
+                    services.create_volunteer(username, password, first_name, last_name, email, phone_number, gender,
+                                              date_of_birth, plan_id, camp_name)
+                except ValueError as e:  # the username was taken after it was entered
+                    print(f"\n{e}")
+                    logging.error(f"Volunteer not registered: {e}")
+                    username = volunteer_funcs.add_username()
+                    if username == "0":
+                        logging.debug("Returning to previous menu.")
+                        return
+                    elif username == "9":
+                        logging.debug("Returning to previous step.")
+                        progress -= 1
+                else:
+                    progress += 1
 
         # Print details provided in registration
         gender_str = convert_gender(gender)
@@ -381,7 +388,7 @@ class Admin:
 
         # outer loop to edit multiple attributes, exit if 0 is entered
         while True:
-            users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+            users = data_access.read_table('users.csv')
             select_user = users[users['username'] == username]
             password = select_user.iloc[0]['password']
             first_name = select_user.iloc[0]['first_name']
@@ -471,21 +478,21 @@ class Admin:
 
         logging.debug(f"Admin has deleted {username}'s account.")
         # update csv files
-        users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+        users = data_access.read_table('users.csv')
         users = users.drop(users[users['username'] == username].index)
-        users.to_csv(os.path.join('data', 'users.csv'), index=False)
+        data_access.write_table(users, 'users.csv')
         logging.debug("users.csv updated")
 
-        vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
+        vol_times = data_access.read_table('volunteering_times.csv')
         vol_times = vol_times.drop(vol_times[vol_times['username'] == username].index)
-        vol_times.to_csv(os.path.join('data', 'volunteering_times.csv'), index=False)
+        data_access.write_table(vol_times, 'volunteering_times.csv')
         logging.debug("volunteering_times.csv updated")
 
         if camp_name:
-            camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+            camps = data_access.read_camps(plan_id)
             user_camp = (camps['camp_name'] == camp_name)
             camps.loc[user_camp, 'volunteers'] = camps.loc[user_camp, 'volunteers'] - 1
-            camps.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
+            data_access.write_camps(camps, plan_id)
             logging.debug("camps csv file updated")
 
         print(username + "'s account has been deleted successfully.")
@@ -506,7 +513,7 @@ class Admin:
         else:
             plan_id, camp_name, username = selected
 
-        users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+        users = data_access.read_table('users.csv')
         select_user = users[users['username'] == username]
         active = select_user.iloc[0]['active']
 
@@ -538,75 +545,49 @@ class Admin:
 
         logging.debug(f"Admin has {change}d {username}'s account.")
         # update csv files
-        users.loc[users['username'] == username, 'deactivation_requested'] = 0
-        users.loc[users['username'] == username, 'active'] = status
-        users.to_csv(os.path.join('data', 'users.csv'), index=False)
+        data_access.update_rows('users.csv', {'deactivation_requested': 0, 'active': status}, username=username)
         logging.debug("users.csv updated")
 
         # increment or decrement number of volunteers if user has a camp
         if camp_name:
-            camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+            camps = data_access.read_camps(plan_id)
             user_camp = (camps['camp_name'] == camp_name)
             if status == 1:
                 camps.loc[user_camp, 'volunteers'] = camps.loc[user_camp, 'volunteers'] + 1
-                camps.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
+                data_access.write_camps(camps, plan_id)
                 logging.debug("camps csv file updated")
             if status == 0:
                 camps.loc[user_camp, 'volunteers'] = camps.loc[user_camp, 'volunteers'] - 1
-                camps.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
+                data_access.write_camps(camps, plan_id)
                 logging.debug("camps csv file updated")
                 # if deactivated: delete the user's volunteering sessions
-                vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
+                vol_times = data_access.read_table('volunteering_times.csv')
                 vol_times = vol_times.drop(vol_times[vol_times['username'] == username].index)
-                vol_times.to_csv(os.path.join('data', 'volunteering_times.csv'), index=False)
+                data_access.write_table(vol_times, 'volunteering_times.csv')
                 logging.debug("volunteering_times.csv updated")
 
         print(username + "'s account has been " + change + "d successfully.")
 
     def low_resources_notification(self):
-
-        # Getting the plan_id of all the plans created
-        humani_plan = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
-        humani_plan = humani_plan[humani_plan["end_date"].isna()]
-        plans = []
-        for index, row in humani_plan.iterrows():
-            plans.append(row["plan_id"])
-
-        for plan_id in plans:  # iterate through each humanitarian plan created
-            current_plan = pd.read_csv(os.path.join('data', plan_id + '.csv'))
-            nb_of_camps = 0  # number of camps with low resources
-
-            for i in current_plan.index:  # iterate through each camp of the current humanitarian plan
-                refugees = current_plan.loc[i, "refugees"]
-                camp = current_plan.loc[i, "camp_name"]
-                food_left = refugees * 2 - current_plan.loc[i, "food"]
-                water_left = refugees * 2 - current_plan.loc[i, "water"]
-                firstaid_left = auto_resources.med_needed(plan_id, camp)*2 - current_plan.loc[i, "firstaid_kits"]
-
-                # if food_left > 0:  # if there is less than two days' worth of food
-                #     print(f'* Warning: {plan_id}\'s {camp} is running low on food. Please navigate to the '
-                #           f'resource allocation menu *')
-                # if water_left > 0:
-                #     print(f'* Warning: {plan_id}\'s {camp} is running low on water. Please navigate to the '
-                #           f'resource allocation menu *')
-                # if firstaid_left > 0:
-                #     print(f'* Warning: {plan_id}\'s {camp} is running low on first-aid kits. Please navigate to the '
-                #           f'resource allocation menu *')
-
-                if food_left > 0 or water_left > 0 or firstaid_left > 0:  # if there is less than two days' worth of food
-                    nb_of_camps += 1
-
+        """
+        Prints a warning for each ongoing humanitarian plan with camps that have less than two days' worth of
+        food, water or first-aid kits. The days of supplies left at each camp are kept up to date in supply_status.csv.
+        """
+        status = supply_status.read_status()
+        low_camps = status[status['low'] == 1].groupby('plan_id', sort=False).size()
+        for plan_id, nb_of_camps in low_camps.items():
             if nb_of_camps == 1:
                 print(f'* Warning: {plan_id} has {nb_of_camps} camp with low resources. *')
-            elif nb_of_camps > 1:
-                print(f'* Warning: {plan_id} has {nb_of_camps} camps with low resources. *')
             else:
-                logging.debug("No camps with low resources.")
-            logging.debug("Finished checking for camps with low resources.")
+                print(f'* Warning: {plan_id} has {nb_of_camps} camps with low resources. *')
+        if len(low_camps) == 0:
+            logging.debug("No camps with low resources.")
+        logging.debug("Finished checking for camps with low resources.")
 
     def resource_request_notification(self):
         try:
-            requests = pd.read_csv(os.path.join('data', 'resource_requests.csv'))
+            services.merge_pending_requests()  # requests made before they were merged per camp
+            requests = data_access.read_table('resource_requests.csv', expand=['resolved'])  # set to 'yes' when resolved
         except FileNotFoundError:
             return False # returns nothing if no new requests
         else:
@@ -635,18 +616,43 @@ class Admin:
             print("Returning to previous menu\n")
             logging.debug("No resource requests. Returning to previous menu.")
         else:  # if method above didn't return false
+            logging.debug("Admin prompted to choose between reviewing requests one by one and in a batch.")
+            print("\nEnter [1] to respond to the requests one by one")
+            print("Enter [2] to review all requests at once, most urgent first")
+            print("Enter [0] to return to the previous menu\n")
+            while True:
+                option = v.integer(">>Select an option: ")
+                if option not in range(3):
+                    print("\nPlease enter a number from the options provided.")
+                    logging.error("Invalid user input.")
+                    continue
+                break
+            if option == 0:
+                logging.debug("Returning to previous menu.")
+                return
+            if option == 2:
+                self.resource_request_batch()
+                return
             new_requests = requests[requests["resolved"] == 'no']
             for index, row in new_requests.iterrows():
                 logging.debug("Processing next request.")
-                user = row["username"]
+                user = row["username"].replace(services.REQUESTER_SEPARATOR, ", ")  # the volunteers who asked
                 plan = row["plan_id"]
                 camp = row["camp_name"]
                 food_request = row["food"]
                 water_request = row["water"]
                 kit_request = row["firstaid_kits"]
 
-                resources_df = pd.read_csv(os.path.join('data', plan + '.csv'))
-                humani_plan_df = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
+                resources_df = data_access.read_camps(plan)
+                humani_plan_df = data_access.read_table('humanitarian_plan.csv')
+                camp_row = resources_df.camp_name == camp
+                if not camp_row.any():
+                    # left unresolved, as in resource_request_batch()
+                    print("\n-----------------------")
+                    print(f'The request by {user} for {camp} of {plan} cannot be approved as the camp has closed.')
+                    logging.warning(f"{camp} of {plan} no longer exists. Request left unresolved.")
+                    continue
+                camp_units = resources_df.loc[camp_row, auto_resources.RESOURCES].iloc[0].to_numpy(dtype=int)
 
 
                 print("\n-----------------------")
@@ -707,9 +713,13 @@ class Admin:
                             logging.error("Invalid user input.")
 
                 requests.loc[index, "resolved"] = 'yes'
-                humani_plan_df.to_csv(os.path.join('data', 'humanitarian_plan.csv'), index=False)
-                resources_df.to_csv(os.path.join('data', plan + '.csv'), index=False)
-                requests.to_csv(os.path.join('data', 'resource_requests.csv'), index=False)
+                with data_access.UnitOfWork():
+                    data_access.write_table(humani_plan_df, 'humanitarian_plan.csv')
+                    data_access.write_camps(resources_df, plan)
+                    data_access.write_table(requests, 'resource_requests.csv')
+                    # the amounts approved are the amounts added to the camp
+                    approved = resources_df.loc[camp_row, auto_resources.RESOURCES].iloc[0].to_numpy(dtype=int) - camp_units
+                    resource_ledger.record(resource_ledger.REQUEST, resource_ledger.transfers(plan, {camp: approved}))
                 logging.debug(f"Request from {user} marked as resolved. "
                               f"resource_requests.csv, humanitarian_plan.csv and camps csv file updated.")
                 print("-----------------------")
@@ -718,6 +728,64 @@ class Admin:
         return
 
 
+    def resource_request_batch(self):
+        """
+        Lists every unresolved resource request at once, most urgent first (fewest days of supplies left at the camp,
+        then greatest medical demand), and lets the admin approve or decline many of them at a time,
+        or approve them in order of urgency as far as storage allows.
+        The changes of each step are saved with one write of each table.
+        """
+        while True:
+            pending = services.pending_requests()
+            if len(pending.index) == 0:
+                print("\nAll resource requests have been resolved.")
+                logging.debug("No resource requests left. Returning to previous menu.")
+                return
+
+            print("\n-----------------------")
+            print(f"{len(pending.index)} unresolved requests, most urgent first:")
+            print("No. - Username - Plan ID - Camp - Food - Water - First-aid kits - Days of supplies left - Kits needed per day")
+            for num, row in enumerate(pending.itertuples(index=False), start=1):
+                days = "-" if row.days_left == np.inf else f"{row.days_left:.1f}"
+                print(num, row.username, row.plan_id, row.camp_name, row.food, row.water, row.firstaid_kits, days,
+                      row.kits_per_day, sep=" - ")
+
+            logging.debug("Admin prompted to approve, decline or auto-approve requests.")
+            print("\nEnter [1] to approve selected requests")
+            print("Enter [2] to decline selected requests")
+            print("Enter [3] to approve requests in order of urgency until storage runs out")
+            print("Enter [0] to return to the previous menu\n")
+            while True:
+                option = v.integer(">>Select an option: ")
+                if option not in range(4):
+                    print("\nPlease enter a number from the options provided.")
+                    logging.error("Invalid user input.")
+                    continue
+                break
+            if option == 0:
+                logging.debug("Returning to previous menu.")
+                return
+
+            if option == 3:
+                approved, declined, skipped = services.auto_approve()
+            else:
+                print("\nEnter [0] to go back.")
+                selected = v.numbers(">>Enter the numbers of the requests (e.g. 1,3,5-8 or all): ", len(pending.index))
+                if selected == "0":
+                    continue
+                rows = pending.index[[num - 1 for num in selected]].tolist()
+                if option == 1:
+                    approved, declined, skipped = services.resolve_requests(approve=rows)
+                else:
+                    approved, declined, skipped = services.resolve_requests(decline=rows)
+
+            print(f"\n{len(approved)} requests approved and {len(declined)} declined.")
+            if skipped:
+                print(f"{len(skipped)} requests could not be approved as their plan's storage is too low "
+                      f"or their camp has closed.")
+            logging.debug(f"Batch of resource requests processed: {len(approved)} approved, {len(declined)} declined, "
+                          f"{len(skipped)} left unresolved.")
+
     def resource_request_processing(self, requested_nb, resource, user, camp, plan, humani_plan_df, resources_df):
         """
         This method is called when a request for more resources has been made by a volunteer.
@@ -774,7 +842,7 @@ class Admin:
         The users dataframe is created from the users.csv file.
         """
 
-        users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+        users = data_access.read_table('users.csv')
         nb_of_requests = len(users[users["deactivation_requested"] == 1])
         if nb_of_requests == 0:
             return False  # returns nothing if no new requests
@@ -813,7 +881,7 @@ class Admin:
             logging.debug("Finished processing deactivation requests.")
 
             # saves changes to the users.csv file
-            users.to_csv(os.path.join('data', 'users.csv'), index=False)
+            data_access.write_table(users, 'users.csv')
             logging.debug("users.csv updated")
             print('The deactivation request has been processed!')
             return
@@ -829,7 +897,7 @@ class Admin:
             logging.debug("Finished processing deactivation requests.")
 
             # saves the changes to the list
-            users.to_csv(os.path.join('data', 'users.csv'), index=False)
+            data_access.write_table(users, 'users.csv')
             logging.debug("users.csv updated")
             print('All deactivation requests have been processed!')
             return
@@ -862,21 +930,21 @@ class Admin:
             logging.info(f'Admin has deactivated {user}.')
 
             # decrement number of volunteers in camps file if user has a camp
-            users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+            users = data_access.read_table('users.csv')
             cur_user = users[users['username'] == user]
             cur_user = cur_user.replace({np.nan: None})
             camp_name = cur_user.iloc[0]['camp_name']
             if camp_name:
                 plan_id = cur_user.iloc[0]['plan_id']
-                camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+                camps = data_access.read_camps(plan_id)
                 user_camp = (camps['camp_name'] == camp_name)
                 camps.loc[user_camp, 'volunteers'] = camps.loc[user_camp, 'volunteers'] - 1
-                camps.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
+                data_access.write_camps(camps, plan_id)
                 logging.debug("camps csv file updated")
                 # delete the user's volunteering sessions
-                vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
+                vol_times = data_access.read_table('volunteering_times.csv')
                 vol_times = vol_times.drop(vol_times[vol_times['username'] == user].index)
-                vol_times.to_csv(os.path.join('data', 'volunteering_times.csv'), index=False)
+                data_access.write_table(vol_times, 'volunteering_times.csv')
                 logging.debug("volunteering_times.csv updated")
 
         else: # admin chose to keep account active
@@ -889,7 +957,7 @@ class Admin:
         The method adds the end_date of the selected humanitarian plan.
         The selected plan is then closed and can no longer be updated.
         """
-        plans = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
+        plans = data_access.read_table('humanitarian_plan.csv')
         plans_ongoing = plans[plans['end_date'].isna()]
         plans_ongoing = plans_ongoing.replace({np.nan: None})
         plans_ongoing = plans_ongoing.reset_index(drop=True)
@@ -954,23 +1022,22 @@ class Admin:
             break
 
         # update csv files: add end date; remove volunteer accounts, volunteering sessions and resource requests for that plan
-        plans.loc[plans["plan_id"] == plan_id, "end_date"] = end_date
-        plans.to_csv(os.path.join('data', 'humanitarian_plan.csv'), index=False)
+        data_access.update_rows('humanitarian_plan.csv', {'end_date': end_date}, plan_id=plan_id)
         logging.debug("humanitarian_plan.csv updated")
 
-        users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+        users = data_access.read_table('users.csv')
         users = users.drop(users[users['plan_id'] == plan_id].index)
-        users.to_csv(os.path.join('data', 'users.csv'), index=False)
+        data_access.write_table(users, 'users.csv')
         logging.debug("users.csv updated")
 
-        vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
+        vol_times = data_access.read_table('volunteering_times.csv')
         vol_times = vol_times.drop(vol_times[vol_times['plan_id'] == plan_id].index)
-        vol_times.to_csv(os.path.join('data', 'volunteering_times.csv'), index=False)
+        data_access.write_table(vol_times, 'volunteering_times.csv')
         logging.debug("volunteering_times.csv updated")
 
-        resource_req = pd.read_csv(os.path.join('data', 'resource_requests.csv'))
+        resource_req = data_access.read_table('resource_requests.csv')
         resource_req = resource_req.drop(resource_req[resource_req['plan_id'] == plan_id].index)
-        resource_req.to_csv(os.path.join('data', 'resource_requests.csv'), index=False)
+        data_access.write_table(resource_req, 'resource_requests.csv')
         logging.debug("resource_requests.csv updated")
 
         logging.debug(f"End date added to {plan_id}. The plan has been closed.")
@@ -982,7 +1049,7 @@ class Admin:
         This method requires a HumanitarianPlan csv file as argument
         and prints out the .csv file.
         """
-        resources = pd.read_csv(os.path.join('data', hum_plan))
+        resources = data_access.read_camps(hum_plan[:-4])
         print(resources)
 
     def update_resources_in_storage(self):
@@ -998,7 +1065,7 @@ class Admin:
             return
 
         location = plan_id[:-5]
-        plans_overview = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv')) #calls the humanitarian plan csv
+        plans_overview = data_access.read_table('humanitarian_plan.csv') #calls the humanitarian plan csv
         # plan_info = plans_overview.loc[plans_overview.location == location, ['location', 'food_storage', 'water_storage', 'firstaid_kits_storage']]
 
         print(f"\nCurrently, the resources in storage are as follows:"
@@ -1082,7 +1149,10 @@ class Admin:
                         logging.debug(
                             f"Admin has requested an additional {amount} food packets, bringing the total for {plan_id} to {total_food}.")
                         plans_overview.loc[plans_overview['location'] == location, 'food_storage'] = int(total_food)
-                        plans_overview.to_csv(os.path.join('data', 'humanitarian_plan.csv'), index=False)
+                        with data_access.UnitOfWork():
+                            data_access.write_table(plans_overview, 'humanitarian_plan.csv')
+                            resource_ledger.record(resource_ledger.DELIVERY,
+                                                   [(plan_id, resource_ledger.STORAGE, 'food', amount)])
                         logging.debug("humanitarian_plan.csv updated")
                         print(f"\nProcessing your request for an additional {amount} food packets ... \n"
                               f"\n{plan_id} now has a total of {total_food} food packets.")
@@ -1139,7 +1209,10 @@ class Admin:
                         logging.debug(
                             f"Admin has requested an additional {amount} water bottles, bringing the total for {plan_id} to {total_water}.")
                         plans_overview.loc[plans_overview['location'] == location, 'water_storage'] = int(total_water)
-                        plans_overview.to_csv(os.path.join('data', 'humanitarian_plan.csv'), index=False)
+                        with data_access.UnitOfWork():
+                            data_access.write_table(plans_overview, 'humanitarian_plan.csv')
+                            resource_ledger.record(resource_ledger.DELIVERY,
+                                                   [(plan_id, resource_ledger.STORAGE, 'water', amount)])
                         logging.debug("humanitarian_plan.csv updated")
                         print(f"\nProcessing your request for an additional {amount} water portions ... \n"
                               f"\n{plan_id} now has a total of {total_water} water portions.")
@@ -1197,7 +1270,10 @@ class Admin:
                         logging.debug(
                             f"Admin has requested an additional {amount} first aid kits, bringing the total for {plan_id} to {total_aid}.")
                         plans_overview.loc[plans_overview['location'] == location, 'firstaid_kits_storage'] = int(total_aid)
-                        plans_overview.to_csv(os.path.join('data', 'humanitarian_plan.csv'), index=False)
+                        with data_access.UnitOfWork():
+                            data_access.write_table(plans_overview, 'humanitarian_plan.csv')
+                            resource_ledger.record(resource_ledger.DELIVERY,
+                                                   [(plan_id, resource_ledger.STORAGE, 'firstaid_kits', amount)])
                         logging.debug("humanitarian_plan.csv updated")
                         print(f"\nProcessing your request for an additional {amount} first aid kits ... \n"
                               f"\n{plan_id} now has a total of {total_aid} first aid kits.")
@@ -1209,8 +1285,8 @@ class Admin:
         This method requires a HumanitarianPlan .csv file as argument and allows admin to allocate resources
         (Food packs, Water or First-Aid Kits) to camps in that HumanitarianPlan from storage.
         """
-        resources = pd.read_csv(os.path.join('data', hum_plan))
-        humani_plan = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
+        resources = data_access.read_camps(hum_plan[:-4])
+        humani_plan = data_access.read_table('humanitarian_plan.csv')
         print(f"\nCurrently, the resources in storage are as follows:"
               f"\n{humani_plan.loc[humani_plan.location == location, ['location', 'start_date', 'food_storage', 'water_storage', 'firstaid_kits_storage']]}\n")
         print(f"And the resources in {hum_plan[:-4]} are as follows:"
@@ -1247,9 +1323,9 @@ class Admin:
                 logging.error("Invalid user input.")
                 continue
             if resource_choice == 0:
-                resources.to_csv(os.path.join('data', hum_plan), index=False)
-                humani_plan.to_csv(os.path.join('data', 'humanitarian_plan.csv'), index=False)
-                logging.debug("Finished allocating resources. humanitarian_plan.csv and camps csv file saved.")
+                resources = data_access.read_camps(hum_plan[:-4])
+                humani_plan = data_access.read_table('humanitarian_plan.csv')
+                logging.debug("Finished allocating resources.")
                 print(f"\nReturning to admin resources menu."
                       f"\nThe resources in {hum_plan[:-4]} are as follows:"
                       f"\n{resources}")
@@ -1273,15 +1349,12 @@ class Admin:
                         logging.error("Invalid user input.")
                         continue
                     # making sure number of {resource} entered does not exceed number in storage
-                    in_storage = humani_plan.loc[humani_plan['location'] == location, 'food_storage']
-                    if any(in_storage - amount < 0):
-                        print('\nThe amount entered exceeds the amount available in storage.'
-                              '\nPlease check the amount in storage and try again.')
+                    try:
+                        services.allocate(hum_plan[:-4], f"Camp {camp_no}", food=amount)
+                    except ValueError as e:
+                        print("\n" + str(e) + "\nPlease check the amount in storage and try again.")
                         logging.warning("Insufficient resources in storage. Unable to allocate.")
                     else:
-                        humani_plan.loc[humani_plan['location'] == location, 'food_storage'] -= int(amount)
-                        resources.loc[resources['camp_name'] == f"Camp {camp_no}", 'food'] += int(
-                            amount)  # like a = a + food
                         print("\nAllocation complete.")
                         logging.debug(f"Allocated {amount} food packets.")
                         break
@@ -1301,15 +1374,12 @@ class Admin:
                         print("\nPlease enter a positive integer.")
                         logging.error("Invalid user input.")
                         continue
-                    in_storage = humani_plan.loc[humani_plan['location'] == location, 'water_storage']
-                    if any(in_storage - amount < 0):
-                        print('\nThe amount entered exceeds the amount available in storage.'
-                              '\nPlease check the amount in storage and try again.')
+                    try:
+                        services.allocate(hum_plan[:-4], f"Camp {camp_no}", water=amount)
+                    except ValueError as e:
+                        print("\n" + str(e) + "\nPlease check the amount in storage and try again.")
                         logging.warning("Insufficient resources in storage. Unable to allocate.")
                     else:
-                        humani_plan.loc[humani_plan['location'] == location, 'water_storage'] -= int(amount)
-                        resources.loc[resources['camp_name'] == f"Camp {camp_no}", 'water'] += int(
-                            amount)  # like a = a + food
                         print("\nAllocation complete.")
                         logging.debug(f"Allocated {amount} water portions.")
                         break
@@ -1329,15 +1399,12 @@ class Admin:
                         print("\nPlease enter a positive integer.")
                         logging.error("Invalid user input.")
                         continue
-                    in_storage = humani_plan.loc[humani_plan['location'] == location, 'firstaid_kits_storage']
-                    if any(in_storage - amount < 0):
-                        print('\nThe amount entered exceeds the amount available in storage.'
-                              '\nPlease check the amount in storage and try again.')
+                    try:
+                        services.allocate(hum_plan[:-4], f"Camp {camp_no}", firstaid_kits=amount)
+                    except ValueError as e:
+                        print("\n" + str(e) + "\nPlease check the amount in storage and try again.")
                         logging.warning("Insufficient resources in storage. Unable to allocate.")
                     else:
-                        humani_plan.loc[humani_plan['location'] == location, 'firstaid_kits_storage'] -= int(amount)
-                        resources.loc[resources['camp_name'] == f"Camp {camp_no}", 'firstaid_kits'] += int(
-                            amount)  # like a = a + food
                         print("\nAllocation complete.")
                         logging.debug(f"Allocated {amount} first-aid kits.")
                         break
@@ -1653,10 +1720,11 @@ class Admin:
                 print("Enter [1] to create a new refugee profile")
                 print("Enter [2] to view a refugee profile")
                 print("Enter [3] to edit or remove a refugee profile")
+                print("Enter [4] to import refugee profiles from a file")
                 print("Enter [0] to return to the admin menu\n")
                 try:
                     option = int(input(">>Select an option: "))
-                    if option not in range(4):
+                    if option not in range(5):
                         raise ValueError
                 except ValueError:
                     print("\nPlease enter a number from the options provided.\n")
@@ -1675,6 +1743,9 @@ class Admin:
             if option == 3:
                 logging.debug(f'Admin has chosen to edit or remove a refugee profile.')
                 self.edit_refugee_profile()
+            if option == 4:
+                logging.debug(f'Admin has chosen to import refugee profiles from a file.')
+                self.import_refugee_profiles()
 
     def volunteering_session_menu(self):
         """Sub-menu enabling the admin to access functionalities relating to volunteering sessions."""
@@ -1682,7 +1753,7 @@ class Admin:
             logging.debug("Admin has entered the refugee profile menu.")
             print("\n--------------------------------------------")
             print("\tMANAGE VOLUNTEERING SESSIONS")
-            users = pd.read_csv(os.path.join('data', 'users.csv'))
+            users = data_access.read_table('users.csv')
             users = users[(users['account_type'] == "volunteer") & (users['active'] == 1)]
             if len(users.index) == 0:
                 print("There are no active volunteer accounts.")
@@ -1719,6 +1790,7 @@ class Admin:
         """Changes the user's logged_in attribute to False, causing the user to log out."""
         self.logged_in = False
         print("You are now logged out. See you again!\n")
+        io_stats.dump()
 
     def display_hum_plan(self):
         """
@@ -1728,7 +1800,7 @@ class Admin:
         """
         print("\n--------------------------------------------")
         print("\tDISPLAY HUMANITARIAN PLAN")
-        plans = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
+        plans = data_access.read_table('humanitarian_plan.csv')
         if len(plans.index) == 0:
             print("No humanitarian plans have been created.")
             logging.warning("No humanitarian plans created.")
@@ -1771,7 +1843,7 @@ class Admin:
             print("Water portions in storage:", plans.loc[plan_num - 1, 'water_storage'])
             print("First-aid kits in storage:", plans.loc[plan_num - 1, 'firstaid_kits_storage'])
 
-            camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+            camps = data_access.read_camps(plan_id)
             print("\nCamps in humanitarian plan:")
             print("Camp Name - # Volunteers - # Refugees - Refugee Capacity")
             for row in range(len(camps.index)):
@@ -1813,7 +1885,7 @@ class Admin:
                     progress += 1
 
             if progress == 2:
-                camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+                camps = data_access.read_camps(plan_id)
                 cur_camp = camps[camps['camp_name'] == camp_name]
                 print("\nCurrent capacity of " + camp_name + ": " + str(cur_camp.iloc[0]['capacity']))
                 print("The camp currently has " + str(cur_camp.iloc[0]['refugees']) + " refugees.")
@@ -1849,7 +1921,7 @@ class Admin:
                     # update csv file
                     chosen = (camps['camp_name'] == camp_name)
                     camps.loc[chosen, 'capacity'] = new_capacity
-                    camps.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
+                    data_access.write_camps(camps, plan_id)
                     logging.debug("camps csv file updated")
                     print("You have updated the capacity of", plan_id + ",", camp_name, "to", str(new_capacity) + ".")
                     print("Returning to camp selection.")
@@ -1860,7 +1932,7 @@ class Admin:
         # # update csv file
         # chosen = (camps['camp_name'] == camp_name)
         # camps.loc[chosen, 'capacity'] = new_capacity
-        # camps.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
+        # data_access.write_camps(camps, plan_id)
         # logging.debug("camps csv file updated")
         # print("Capacity updated successfully!")
         # print("You have updated the capacity of", plan_id + ",", camp_name, "to", str(new_capacity) + ".")
@@ -1877,8 +1949,7 @@ class Admin:
         else:
             username = selected[2]
 
-        users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
-        select_user = users[users['username'] == username]
+        select_user = data_access.lookup('users.csv', username=username)
         select_user = select_user.replace({np.nan: None})
         gender_str = convert_gender(select_user.iloc[0]['gender'])
 
@@ -1914,7 +1985,7 @@ class Admin:
 
         def add_camp(plan_id):
             """Prompts the admin to select a camp for the chosen volunteer if they currently do not have a camp."""
-            camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+            camps = data_access.read_camps(plan_id)
             print(username, "currently has no camp identification.")
             logging.debug(f"Admin prompted to add a camp for {username}.")
             while True:
@@ -1945,7 +2016,7 @@ class Admin:
 
         def edit_camp(plan_id, camp_name):
             """Prompts the admin to select a new camp for the chosen volunteer if they currently have a camp."""
-            camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+            camps = data_access.read_camps(plan_id)
             print(username + "'s current camp is:", camp_name)
             if len(camps.index) == 1:
                 print("There is currently only one camp. It is not possible to change camp identification.")
@@ -2030,31 +2101,32 @@ class Admin:
 
         # update csv files
         if new_camp != camp_name:
-            users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
-            cur_user = (users['username'] == username)
-            users.loc[cur_user, 'camp_name'] = new_camp
-            users.to_csv(os.path.join('data', 'users.csv'), index=False)
-            logging.debug("users.csv updated")
-
-            camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
-            if new_camp:
-                chosen = (camps['camp_name'] == new_camp)
-                camps.loc[chosen, 'volunteers'] = camps.loc[chosen, 'volunteers'] + 1
-            if camp_name:
-                old = (camps['camp_name'] == camp_name)
-                camps.loc[old, 'volunteers'] = camps.loc[old, 'volunteers'] - 1
-            camps.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
-            logging.debug("camps csv file updated")
+            with data_access.UnitOfWork():
+                users = data_access.read_table('users.csv', expand=['camp_name'])
+                cur_user = (users['username'] == username)
+                users.loc[cur_user, 'camp_name'] = new_camp
+                data_access.write_table(users, 'users.csv')
+                logging.debug("users.csv updated")
+
+                camps = data_access.read_camps(plan_id)
+                if new_camp:
+                    chosen = (camps['camp_name'] == new_camp)
+                    camps.loc[chosen, 'volunteers'] = camps.loc[chosen, 'volunteers'] + 1
+                if camp_name:
+                    old = (camps['camp_name'] == camp_name)
+                    camps.loc[old, 'volunteers'] = camps.loc[old, 'volunteers'] - 1
+                data_access.write_camps(camps, plan_id)
+                logging.debug("camps csv file updated")
 
-            if camp_name and not new_camp:  # remove volunteering sessions
-                vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
-                vol_times = vol_times.drop(vol_times[vol_times['username'] == username].index)
-                vol_times.to_csv(os.path.join('data', 'volunteering_times.csv'), index=False)
-            if camp_name and new_camp:  # change camp_name in volunteering_times.csv
-                vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
-                vol_times.loc[vol_times["username"] == username, "camp_name"] = new_camp
-                vol_times.to_csv(os.path.join('data', 'volunteering_times.csv'), index=False)
-            logging.debug("volunteering_times.csv updated")
+                if camp_name and not new_camp:  # remove volunteering sessions
+                    vol_times = data_access.read_table('volunteering_times.csv')
+                    vol_times = vol_times.drop(vol_times[vol_times['username'] == username].index)
+                    data_access.write_table(vol_times, 'volunteering_times.csv')
+                if camp_name and new_camp:  # change camp_name in volunteering_times.csv
+                    vol_times = data_access.read_table('volunteering_times.csv', expand=['camp_name'])
+                    vol_times.loc[vol_times["username"] == username, "camp_name"] = new_camp
+                    data_access.write_table(vol_times, 'volunteering_times.csv')
+                logging.debug("volunteering_times.csv updated")
 
             print("\n" + username + "'s new camp is:", new_camp)
         return
@@ -2069,7 +2141,7 @@ class Admin:
 
         progress = -2
         # loop allowing user to go back
-        while progress < 6:
+        while progress < 7:
             if progress == -2:
                 plan_id = select_plan()
                 if plan_id == 0:
@@ -2089,7 +2161,7 @@ class Admin:
                 else:
                     progress += 1
 
-                camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+                camps = data_access.read_camps(plan_id)
                 cur_camp = camps[camps['camp_name'] == camp_name]
                 remaining_cap = cur_camp.iloc[0]['capacity'] - cur_camp.iloc[0]['refugees']
 
@@ -2166,26 +2238,26 @@ class Admin:
                 else:
                     progress += 1
 
-        logging.debug("Admin has finished entering refugee details.")
-        # Update csv tables
-        refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-        if len(refugees.index) == 0:
-            refugee_id = 1
-        else:
-            refugee_id = refugees['refugee_id'].iloc[-1] + 1
-        new_row = {'refugee_id': [refugee_id], 'refugee_name': [refugee_name], 'gender': [gender],
-                   'date_of_birth': [date_of_birth], 'plan_id': [plan_id], 'camp_name': [camp_name],
-                   'medical_condition': [medical_cond], 'family_members': [family], 'remarks': [remarks]}
-        new = pd.DataFrame(new_row)
-        refugees = pd.concat([refugees, new], ignore_index=True)
-        refugees.to_csv(os.path.join('data', 'refugees.csv'), index=False)
-        logging.debug("refugees.csv updated")
-
-        camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
-        chosen = (camps['camp_name'] == camp_name)
-        camps.loc[chosen, 'refugees'] = camps.loc[chosen, 'refugees'] + family
-        camps.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
-        logging.debug("camps csv file updated")
+            elif progress == 6:
+                logging.debug("Admin has finished entering refugee details.")
+                # Update csv tables
+                try:
+                    refugee_id = services.create_refugee(plan_id, camp_name, refugee_name, gender, date_of_birth,
+                                                         medical_cond, family, remarks)
+                except ValueError as e:  # the camp has filled up since its remaining capacity was shown
+                    print(f"\n{e}")
+                    logging.error(f"Refugee profile not created: {e}")
+                    cur_camp = data_access.lookup(data_access.CAMPS_FILE, plan_id=plan_id, camp_name=camp_name)
+                    remaining_cap = cur_camp.iloc[0]['capacity'] - cur_camp.iloc[0]['refugees']
+                    family = refugee_profile_funcs.add_family(remaining_cap)
+                    if family == "X":
+                        logging.debug("Returning to previous menu.")
+                        return
+                    elif family == "B":
+                        logging.debug("Returning to previous step.")
+                        progress -= 1
+                else:
+                    progress += 1
 
         # Print details provided
         gender_str = convert_gender(gender)
@@ -2203,6 +2275,34 @@ class Admin:
         print("Additional remarks:", remarks)
         return
 
+    def import_refugee_profiles(self):
+        """
+        Enables the admin to register many refugee families at once from an intake file (.csv or .json).
+        The file needs the columns refugee_name, gender, date_of_birth, plan_id, camp_name, medical_condition
+        and family_members, and optionally remarks. Nothing is imported if any row is invalid.
+        """
+        print("\n--------------------------------------------")
+        print("\tIMPORT REFUGEE PROFILES")
+        logging.debug("Admin prompted to enter the path of the intake file.")
+        while True:
+            print("\nEnter [0] to return to the previous menu.")
+            path = input(">>Enter the path of the intake file (.csv or .json): ").strip()
+            if path == "0":
+                logging.debug("Returning to previous menu.")
+                return
+            try:
+                new_ids = bulk_import.import_refugees(path)
+            except FileNotFoundError:
+                print("\nFile not found. Please try again.")
+                logging.error("Intake file not found.")
+                continue
+            except ValueError as e:
+                print("\nNothing was imported. Please correct the following and try again:\n" + str(e))
+                logging.error("Invalid intake file.")
+                continue
+            print(f"\n{len(new_ids)} refugee families imported with IDs {new_ids[0]} to {new_ids[-1]}.")
+            return
+
     def view_refugee_profile(self):
         """Enables the admin to view the profile of a selected refugee."""
         print("\n--------------------------------------------")
@@ -2215,8 +2315,7 @@ class Admin:
         else:
             plan_id, camp_name, refugee_id = selected
 
-        refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-        selected = refugees[refugees['refugee_id'] == refugee_id]
+        selected = data_access.lookup('refugees.csv', refugee_id=refugee_id)
         selected = selected.replace({np.nan: None})
         refugee_name = selected.iloc[0]['refugee_name']
         gender = selected.iloc[0]['gender']
@@ -2258,8 +2357,7 @@ class Admin:
 
         # outer loop to edit multiple attributes, exit if 0 is entered
         while True:
-            refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-            selected = refugees[refugees['refugee_id'] == refugee_id]
+            selected = data_access.lookup('refugees.csv', refugee_id=refugee_id)
             selected = selected.replace({np.nan: None})
             refugee_name = selected.iloc[0]['refugee_name']
             gender = selected.iloc[0]['gender']
@@ -2325,10 +2423,10 @@ class Admin:
             plan_id, camp_name, username = selected
 
         print("\nAdding a volunteering session for", username + "...")
-        vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
+        vol_times = data_access.read_table('volunteering_times.csv')
         cur_user_times = vol_times[vol_times['username'] == username]
-        # sort existing times by ascending start time (need date in YYYY-MM-DD format)
-        cur_user_times = cur_user_times.sort_values(by=['start_time'])
+        # interval index of the existing sessions, sorted by start time
+        sessions = volunteering_session_funcs.SessionIndex(cur_user_times)
 
         progress = 0
         # loop allowing user to go back
@@ -2342,7 +2440,7 @@ class Admin:
                     progress += 1
 
             elif progress == 1:
-                start_time = volunteering_session_funcs.select_start_time(vol_date, cur_user_times)
+                start_time = volunteering_session_funcs.select_start_time(vol_date, sessions)
                 if start_time == "0":
                     logging.debug("Returning to previous menu.")
                     return
@@ -2353,7 +2451,7 @@ class Admin:
                     progress += 1
 
             elif progress == 2:
-                end_time = volunteering_session_funcs.select_end_time(start_time, cur_user_times)
+                end_time = volunteering_session_funcs.select_end_time(start_time, sessions)
                 if end_time == "X":
                     logging.debug("Returning to previous menu.")
                     return
@@ -2376,9 +2474,8 @@ class Admin:
 
         logging.debug(f"Admin has finished entering details of new volunteering session for {username}.")
         # update csv file
-        vol_times = open(os.path.join('data', 'volunteering_times.csv'), "a")
-        vol_times.write(f'\n{username},{plan_id},{camp_name},{start_time},{end_time}')
-        vol_times.close()
+        data_access.append_row('volunteering_times.csv', {'username': username, 'plan_id': plan_id, 'camp_name': camp_name,
+                                                          'start_time': start_time, 'end_time': end_time})
         logging.debug("volunteering_times.csv updated")
         print("\nVolunteering session added successfully!")
         return
@@ -2395,7 +2492,7 @@ class Admin:
         else:
             username = selected[2]
 
-        vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
+        vol_times = data_access.read_table('volunteering_times.csv')
         cur_user_times = vol_times[vol_times['username'] == username]
         if len(cur_user_times.index) == 0:
             print(username, "does not have any volunteering sessions.")
@@ -2426,7 +2523,7 @@ class Admin:
         else:
             username = selected[2]
 
-        vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
+        vol_times = data_access.read_table('volunteering_times.csv')
         cur_user_times = vol_times[vol_times['username'] == username]
         if len(cur_user_times.index) == 0:
             print(username, "does not have any volunteering sessions.")
@@ -2487,7 +2584,7 @@ class Admin:
             vol_times = vol_times.drop(vol_times[(vol_times['username'] == username) &
                                                  (vol_times['start_time'] == cur_user_times['start_time'].iloc[
                                                      remove - 1])].index)
-            vol_times.to_csv(os.path.join('data', 'volunteering_times.csv'), index=False)
+            data_access.write_table(vol_times, 'volunteering_times.csv')
             logging.debug("volunteering_times.csv updated")
             print("\nVolunteering session has been removed.")
             return
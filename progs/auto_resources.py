@@ -1,35 +1,48 @@
-import pandas as pd, os
+import pandas as pd, numpy as np
 import logging
-from progs import verify as v
+from progs import verify as v, data_access
+
+
+# first-aid kits needed per family member per day, indexed by medical condition code
+# medical condition: 1 is 0, 2/4/6 is 1, 3/5 is 2, 7 is 3 (index 0 is unused since codes start at 1)
+KITS_PER_CONDITION = np.array([0, 0, 1, 2, 1, 2, 1, 3])
+
+# resource columns in a plan's camps file and the matching storage columns in humanitarian_plan.csv
+RESOURCES = ['food', 'water', 'firstaid_kits']
+STORAGE = ['food_storage', 'water_storage', 'firstaid_kits_storage']
+
+
+def med_demand(plan_ids=None):
+    """
+    Reads refugees.csv once and returns the number of first-aid kits needed per day at every camp of every plan,
+    as a Series indexed by (plan_id, camp_name). Camps without any refugees are not included.
+    Each family's kits are looked up from their medical condition code and multiplied by the family size.
+    If a list of plan_ids is given, only the families of those plans are read, through the index of refugees.csv by plan.
+    """
+    # plan_id and camp_name are categorical in the compact table, so the groupby works on their integer codes
+    if plan_ids is None:
+        refugees = data_access.read_table('refugees.csv')
+    else:
+        refugees = pd.concat([data_access.lookup('refugees.csv', plan_id=plan_id) for plan_id in plan_ids])
+    kits = KITS_PER_CONDITION[refugees['medical_condition'].to_numpy(dtype=int)] * refugees['family_members'].to_numpy(dtype=int)
+    return pd.Series(kits, index=refugees.index).groupby([refugees['plan_id'], refugees['camp_name']], observed=True).sum()
 
 
 # By entering the plan_id and camp_name, we will get how many supplies we need exactly
-def med_needed(plan_id, camp_name):
+def med_needed(plan_id, camp_name, demand=None):
     """
-    It iterates through each family's medical condition and family size in order to return the sufficient supplies for the camp per day.
+    Returns the sufficient first-aid kits for the camp per day.
     :param plan_id: 'London_2023' for example
     :param camp_name: 'Camp 4' for example
+    :param demand: the result of med_demand(), to avoid reading refugees.csv again when checking several camps
     :return:
     """
-    refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-    filtered_refugees = refugees[(refugees['plan_id'] == plan_id) & (refugees['camp_name'] == camp_name)]
-    total_med_needed = 0
-
-    # Iterate each refugee
-    for index, row in filtered_refugees.iterrows():
-        fam_size = row['family_members']    #getting the no. of family memebers
-        med_con = str(row['medical_condition']) #getting their medical condition
-        # medical condition: 1 is 0, 2/4/6 is 2, 3/5 is 5, 7 is 7
-        if med_con == "1":
-            med_needed = 0
-        elif med_con == "2" or med_con == "4" or med_con == "6":
-            med_needed = 1*fam_size
-        elif med_con == "3" or med_con == "5":
-            med_needed = 2*fam_size
-        elif med_con ==  "7":
-            med_needed = 3*fam_size
-        total_med_needed += med_needed
-    return total_med_needed
+    if demand is None:
+        # only the camp's families are read, through the index of refugees.csv by plan and camp
+        refugees = data_access.lookup('refugees.csv', plan_id=plan_id, camp_name=camp_name)
+        kits = KITS_PER_CONDITION[refugees['medical_condition'].to_numpy(dtype=int)]
+        return int((kits * refugees['family_members'].to_numpy(dtype=int)).sum())
+    return int(demand.get((plan_id, camp_name), 0))
 
 def auto_all(hum_plan, location):
     """
@@ -39,46 +52,23 @@ def auto_all(hum_plan, location):
     :param location: 'London' for example
     :return:
     """
-    resources = pd.read_csv(os.path.join('data', hum_plan)) # hum_plan == London_2023.csv for example
-    humani_plan = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
+    from progs import services  # services imports this module
+    resources = data_access.read_camps(hum_plan[:-4]) # hum_plan == London_2023.csv for example
+    humani_plan = data_access.read_table('humanitarian_plan.csv')
 
     logging.debug("Calculating the amount of each resource needed to top up all camps to 7 days of supplies.")
-    # first we count how many resources we need
-    sum_needed = [0, 0, 0]  # food, water, firstaid_kits
-    for i in resources.index:
-        refugees = resources.loc[i, "refugees"]
-        food_needed = refugees * 7 - resources.loc[i, "food"]
-        if food_needed < 0:  # if we have more than 7 days, no need to top-up
-            food_needed = 0
-        sum_needed[0] += food_needed
-        water_needed = refugees * 7 - resources.loc[i, "water"]
-        if water_needed < 0:
-            water_needed = 0
-        sum_needed[1] += water_needed
-
-        # now we calculate the medical supplies needed
-        camp_name = resources.loc[i, "camp_name"]
-        firstaid_needed = med_needed(hum_plan[:-4], camp_name)*7 - resources.loc[i, "firstaid_kits"]
-        if firstaid_needed < 0:
-            firstaid_needed = 0
-        sum_needed[2] += firstaid_needed
-
-    # medical condition: 1 is 0, 2/4/6 is 2, 3/5 is 5, 7 is 7
+    # amount needed by each camp (one row per camp) to top up to 7 days; 0 if it already has more than 7 days
+    sum_needed = services.top_up_needed(hum_plan[:-4]).to_numpy().sum(axis=0)  # food, water, firstaid_kits
 
     # check if we have enough resources in store.
-    food_in_storage = int(humani_plan.loc[humani_plan.location == location, 'food_storage'].iloc[0])
-    # add .iloc[0] at the end if needed to get one single value
-    water_in_storage = int(
-        humani_plan.loc[humani_plan['location'] == location, 'water_storage'].iloc[0])
-    firstaid_in_storage = int(
-        humani_plan.loc[humani_plan['location'] == location, 'firstaid_kits_storage'].iloc[0])
+    in_storage = humani_plan.loc[humani_plan['location'] == location, STORAGE].iloc[0].to_numpy()
     # if storage resources insufficient
-    if food_in_storage < sum_needed[0] or water_in_storage < sum_needed[1] or firstaid_in_storage < sum_needed[2]:
+    if (in_storage < sum_needed).any():
         print("\nResources insufficient, please enter manually or request new resources.")
         logging.warning("Insufficient resources in storage. Unable to smart-allocate.")
         return
 
-    # now we add and write one by one, if resources sufficient
+    # now we add to all camps and write once, if resources sufficient
     logging.debug("Admin prompted to confirm smart-allocation.")
     print("The remaining resources as below:")
     print(
@@ -90,26 +80,10 @@ def auto_all(hum_plan, location):
         print("Would you like to proceed?")
         confirm = input(">>Enter [Y] or [N]: ").capitalize()
         if confirm == "Y":
-            logging.debug("Smart-allocation confirmed. Resources will be topped up to each camp in turn.")
-            for i in resources.index:
-                refugees = resources.loc[i, "refugees"]
-                # food
-                food_needed = refugees * 7 - resources.loc[i, "food"]
-                humani_plan.loc[humani_plan['location'] == location, 'food_storage'] -= food_needed
-                resources.loc[i, "food"] += food_needed
-                # water
-                water_needed = refugees * 7 - resources.loc[i, "water"]
-                humani_plan.loc[
-                    humani_plan['location'] == location, 'water_storage'] -= water_needed
-                resources.loc[i, "water"] += water_needed
-                # first-aid
-                firstaid_needed = med_needed(hum_plan[:-4], camp_name)*7 - resources.loc[i, "firstaid_kits"]
-                humani_plan.loc[
-                    humani_plan['location'] == location, 'firstaid_kits_storage'] -= firstaid_needed
-                resources.loc[i, "firstaid_kits"] += firstaid_needed
-                # write each iterate into two .csv
-                resources.to_csv(os.path.join('data', hum_plan), index=False)
-                humani_plan.to_csv(os.path.join('data', 'humanitarian_plan.csv'), index=False)
+            logging.debug("Smart-allocation confirmed. Resources will be topped up to all camps at once.")
+            services.top_up(hum_plan[:-4])
+            resources = data_access.read_camps(hum_plan[:-4])
+            humani_plan = data_access.read_table('humanitarian_plan.csv')
             logging.debug("Smart-allocation complete. humanitarian_plan.csv and camps csv file updated.")
             print(f"\nAllocation complete. Currently, the resources in {hum_plan[:-4]} are as follows:"
                   f"\n{resources}")
@@ -132,8 +106,9 @@ def auto_one(hum_plan, location):
     :param location: 'London' for example
     :return:
     """
-    resources = pd.read_csv(os.path.join('data', hum_plan))
-    humani_plan = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
+    from progs import services  # services imports this module
+    resources = data_access.read_camps(hum_plan[:-4])
+    humani_plan = data_access.read_table('humanitarian_plan.csv')
     print(f"\n{humani_plan.loc[humani_plan.location == location, ['location', 'start_date', 'food_storage', 'water_storage', 'firstaid_kits_storage']]}\n")
     print(resources.to_string(index=False))
     logging.debug("Admin prompted to select camp.")
@@ -150,18 +125,8 @@ def auto_one(hum_plan, location):
             continue
 
         logging.debug(f"Calculating the amount of each resource needed to top up {camp_name} to 7 days of supplies.")
-        refugees = int(resources.loc[resources['camp_name'] == camp_name, "refugees"].iloc[0])
-        food_needed = refugees * 7 - int(resources.loc[resources['camp_name'] == camp_name, "food"].iloc[0])
-        if food_needed < 0:  # if we have more than 7 days, no need to top-up
-            food_needed = 0
-        water_needed = refugees * 7 - int(resources.loc[resources['camp_name'] == camp_name, "water"].iloc[0])
-        if water_needed < 0:
-            water_needed = 0
-        # each person consumes 1/3 kit per day (presumably)
-        firstaid_needed = med_needed(hum_plan[:-4], camp_name)*7 - int(
-            resources.loc[resources['camp_name'] == camp_name, "firstaid_kits"].iloc[0])
-        if firstaid_needed < 0:
-            firstaid_needed = 0
+        # amount needed to top up to 7 days; 0 if the camp already has more than 7 days
+        food_needed, water_needed, firstaid_needed = services.top_up_needed(hum_plan[:-4], [camp_name]).iloc[0]
 
         # check if we have enough resources in store.
         food_in_storage = int(humani_plan.loc[humani_plan.location == location, 'food_storage'].iloc[0])
@@ -190,20 +155,9 @@ def auto_one(hum_plan, location):
                 return
             elif confirm == "Y":
                 logging.debug(f"Smart-allocation confirmed. Resources will be topped up to {camp_name}.")
-                # food
-                humani_plan.loc[humani_plan['location'] == location, 'food_storage'] -= food_needed
-                resources.loc[resources['camp_name'] == camp_name, "food"] += food_needed
-                # water
-                humani_plan.loc[
-                    humani_plan['location'] == location, 'water_storage'] -= water_needed
-                resources.loc[resources['camp_name'] == camp_name, "water"] += water_needed
-                # first-aid
-                humani_plan.loc[
-                    humani_plan['location'] == location, 'firstaid_kits_storage'] -= firstaid_needed
-                resources.loc[resources['camp_name'] == camp_name, "firstaid_kits"] += firstaid_needed
-                # write each iterate into two .csv
-                resources.to_csv(os.path.join('data', hum_plan), index=False)
-                humani_plan.to_csv(os.path.join('data', 'humanitarian_plan.csv'), index=False)
+                services.top_up(hum_plan[:-4], [camp_name])
+                resources = data_access.read_camps(hum_plan[:-4])
+                humani_plan = data_access.read_table('humanitarian_plan.csv')
 
                 logging.debug("Smart-allocation complete. humanitarian_plan.csv and camps csv file updated.")
                 print(f"\nAllocation complete. Currently, the resources in {hum_plan[:-4]} are as follows:"
@@ -0,0 +1,144 @@
+"""
+Registers many refugee families at once from an intake file (csv or json), e.g. during a mass-arrival event.
+The whole file is validated column by column and the capacity of each camp is checked in aggregate before
+anything is written. The new refugees are then given a contiguous block of refugee IDs, and refugees.csv and the
+camps table of each affected plan are saved together, once each.
+
+Run this file to import an intake file without logging in:
+    python -m progs.bulk_import intake.csv
+"""
+import pandas as pd, numpy as np
+import sys, datetime
+import logging
+from progs import data_access, id_sequence
+
+# columns expected in an intake file; remarks is optional
+COLUMNS = ['refugee_name', 'gender', 'date_of_birth', 'plan_id', 'camp_name', 'medical_condition', 'family_members']
+NAME_PATTERN = r"^[A-Z][a-zA-Z-' ]*$"
+# columns of refugees.csv, in order
+REFUGEE_COLUMNS = ['refugee_id', 'refugee_name', 'gender', 'date_of_birth', 'plan_id', 'camp_name', 'medical_condition',
+                   'family_members', 'remarks']
+
+
+def read_intake(path):
+    """Reads an intake file into a DataFrame. The file format is taken from the extension (.csv or .json)."""
+    if path.lower().endswith('.csv'):
+        intake = pd.read_csv(path, dtype=str)
+    elif path.lower().endswith('.json'):
+        intake = pd.read_json(path, orient='records', dtype=False)
+    else:
+        raise ValueError("The intake file must be a .csv or .json file.")
+    missing = [col for col in COLUMNS if col not in intake.columns]
+    if missing:
+        raise ValueError(f"The intake file is missing the column(s): {', '.join(missing)}.")
+    if 'remarks' not in intake.columns:
+        intake['remarks'] = None
+    return intake[COLUMNS + ['remarks']]
+
+
+def _as_int(col):
+    """Converts a column to integers, with NA where a value is not a whole number."""
+    nums = pd.to_numeric(col, errors='coerce')
+    return nums.where(nums == nums.round()).astype('Int64')
+
+
+def validate(intake):
+    """
+    Checks every row of an intake DataFrame with the same rules as the refugee profile menus.
+    Returns a DataFrame with the row number (as in the file, counting the header as row 1) and the problem found,
+    which is empty if every row is valid. The gender, medical_condition and family_members columns are
+    converted to integers in place.
+    """
+    intake['refugee_name'] = intake['refugee_name'].astype('string').str.strip()
+    intake['gender'] = _as_int(intake['gender'])
+    intake['medical_condition'] = _as_int(intake['medical_condition'])
+    intake['family_members'] = _as_int(intake['family_members'])
+    dates = intake['date_of_birth'].astype('string').str.strip()
+    dob = pd.to_datetime(dates, format="%d-%m-%Y", errors='coerce')
+
+    checks = {
+        "Name can only contain letters, hyphen (-) and apostrophe ('), and must start with a capital letter.":
+            ~intake['refugee_name'].str.match(NAME_PATTERN).fillna(False).astype(bool),
+        "Gender must be 1, 2 or 3.": ~intake['gender'].isin([1, 2, 3]),
+        "Date of birth must be in the format DD-MM-YYYY.": dob.isna() | (dates.str.len() != 10).fillna(True),
+        "Date of birth cannot be in the future.": (dob > pd.Timestamp(datetime.date.today())).fillna(False),
+        "Medical condition must be an integer from 1 to 7.": ~intake['medical_condition'].isin(range(1, 8)),
+        "Number of family members must be a positive integer.": ~(intake['family_members'] >= 1).fillna(False),
+        "A humanitarian plan and camp must be given.": intake['plan_id'].isna() | intake['camp_name'].isna(),
+    }
+    errors = [pd.DataFrame({'row': intake.index[failed] + 2, 'problem': problem})
+              for problem, failed in checks.items() if failed.any()]
+    if not errors:
+        return pd.DataFrame(columns=['row', 'problem'])
+    return pd.concat(errors, ignore_index=True).sort_values(by='row', kind='stable').reset_index(drop=True)
+
+
+def check_capacity(intake):
+    """
+    Checks that each camp in the intake exists in an ongoing plan and has enough remaining capacity
+    for all the families assigned to it. Returns a list of the problems found (empty if every camp can take
+    its families) and a dictionary of the camps table of each affected plan, with the number of refugees updated.
+    """
+    plans = data_access.read_table('humanitarian_plan.csv')
+    ongoing = set(plans.loc[plans['end_date'].isna(), 'plan_id'])
+    arrivals = intake.groupby(['plan_id', 'camp_name'])['family_members'].sum()
+    problems = []
+    updated = {}
+    for plan_id, plan_arrivals in arrivals.groupby(level='plan_id'):
+        if plan_id not in ongoing:
+            problems.append(f"{plan_id} is not an ongoing humanitarian plan.")
+            continue
+        camps = data_access.read_camps(plan_id)
+        new = plan_arrivals.droplevel('plan_id').reindex(camps['camp_name'], fill_value=0).to_numpy()
+        unknown = plan_arrivals.index.get_level_values('camp_name').difference(camps['camp_name'])
+        problems += [f"{camp_name} does not exist in {plan_id}." for camp_name in unknown]
+        remaining = camps['capacity'].to_numpy() - camps['refugees'].to_numpy()
+        for i in np.flatnonzero(new > remaining):
+            problems.append(f"{camps['camp_name'].iloc[i]} of {plan_id} only has space for {remaining[i]} more people, "
+                            f"but {new[i]} are being registered.")
+        camps['refugees'] += new
+        updated[plan_id] = camps
+    return problems, updated
+
+
+def import_refugees(intake):
+    """
+    Registers every family in an intake DataFrame (or the path of an intake file).
+    Raises ValueError listing the problems found if any row is invalid or any camp lacks capacity; nothing is written then.
+    Returns the refugee IDs given to the new families, in the order of the intake.
+    """
+    if isinstance(intake, str):
+        intake = read_intake(intake)
+    intake = intake.reset_index(drop=True)
+    if len(intake.index) == 0:
+        raise ValueError("The intake file does not contain any refugees.")
+    errors = validate(intake)
+    if len(errors.index) > 0:
+        raise ValueError("\n".join(f"Row {row}: {problem}" for row, problem in errors.itertuples(index=False)))
+    problems, camps = check_capacity(intake)
+    if problems:
+        raise ValueError("\n".join(problems))
+
+    with data_access.UnitOfWork():
+        new_ids = np.array(id_sequence.next_ids('refugees.csv', len(intake.index)))
+        new_refugees = intake.assign(refugee_id=new_ids,
+                                     date_of_birth=intake['date_of_birth'].astype('string').str.strip())
+        data_access.append_rows('refugees.csv', new_refugees[REFUGEE_COLUMNS].to_dict('records'))
+        logging.debug("refugees.csv updated")
+        for plan_id, plan_camps in camps.items():
+            data_access.write_camps(plan_camps, plan_id)
+            logging.debug(f"{plan_id}.csv updated")
+    logging.info(f"{len(new_ids)} refugee families imported with IDs {new_ids[0]} to {new_ids[-1]}.")
+    return new_ids.tolist()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Usage: python -m progs.bulk_import <intake file>")
+        sys.exit(1)
+    try:
+        ids = import_refugees(sys.argv[1])
+    except (ValueError, FileNotFoundError) as e:
+        print(f"Nothing was imported.\n{e}")
+        sys.exit(1)
+    print(f"{len(ids)} refugee families imported with IDs {ids[0]} to {ids[-1]}.")
@@ -0,0 +1,570 @@
+"""
+Shared data-access layer for the csv tables in the data directory.
+Every table read goes through read_table(), which keeps the parsed DataFrame in memory keyed by file path,
+with the compact column types in schema.py, and returns it without copying the data.
+A cached table is only parsed again when the file on disk has changed (checked using its mtime, size and inode),
+so repeated reads within a menu action or across menu loops do not parse the file again.
+
+Setting the HMS_BACKEND environment variable to 'sqlite' stores the tables in an SQLite database instead
+(see sqlite_backend.py). The csv files remain the default, which suits small deployments.
+
+Writes that belong to one user action can be grouped in a UnitOfWork. The tables written inside it are kept in
+memory and each one is saved once when the unit is committed, so a failure part-way through an action does not
+leave some tables updated and others not.
+
+Every read and write is counted and timed in io_stats.py.
+"""
+import pandas as pd, numpy as np, os, csv, io, time
+import logging
+from progs import sqlite_backend, schema, io_stats
+
+DATA_DIR = os.environ.get('HMS_DATA_DIR', 'data')
+BACKEND = os.environ.get('HMS_BACKEND', 'csv')
+DB_PATH = os.environ.get('HMS_DB', os.path.join(DATA_DIR, 'hms.db'))
+
+# options passed to pd.read_csv for particular tables
+READ_OPTIONS = {
+    'users.csv': {'dtype': {'password': str}},
+}
+
+# camps of every humanitarian plan, with a plan_id column
+CAMPS_FILE = 'camps.csv'
+
+# columns with an in-memory hash index, used by lookup() instead of comparing every row (see _index());
+# a tuple of columns is one index of their combined values
+INDEXED_COLUMNS = {
+    'users.csv': ['username'],
+    'refugees.csv': ['refugee_id', ('plan_id', 'camp_name'), 'plan_id'],
+}
+
+# path -> (stamp, DataFrame)
+_cache = {}
+# (path, column or tuple of columns) -> (cached DataFrame the index was built from, {value: array of row positions})
+_indexes = {}
+# connection to the SQLite database, opened on first use
+_conn = None
+# the UnitOfWork in progress, if any
+_unit = None
+
+
+def table_path(filename):
+    """Returns the path of a file in the data directory."""
+    return os.path.join(DATA_DIR, filename)
+
+
+def _db():
+    """
+    Returns the connection to the SQLite database.
+    If the database does not exist yet, it is created and the csv files in the data directory are imported into it.
+    """
+    global _conn
+    if _conn is None:
+        new = not os.path.exists(DB_PATH)
+        _conn = sqlite_backend.connect(DB_PATH)
+        if new:
+            logging.info(f"Creating {DB_PATH} from the csv files in {DATA_DIR}.")
+            sqlite_backend.import_csv_dir(_conn, DATA_DIR)
+    return _conn
+
+
+def _stamp(path):
+    """Returns the (mtime, size, inode) of a file, used to check whether a cached table is still valid."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def read_table(filename, expand=(), saved=False):
+    """
+    Returns a DataFrame of the csv table with the given file name (e.g. 'users.csv'), with the compact column types
+    in schema.py (e.g. categorical plan_id and camp_name).
+    The table is only parsed if it has not been read before or the file has changed since it was last read.
+    A shallow copy of the cached table is returned: with copy-on-write, callers can modify it without affecting
+    the cache, and only the columns they change are copied.
+    The columns listed in expand have the types pd.read_csv gives instead, for callers that set them to new values
+    (a categorical column only takes the values it already has).
+    If saved is True, the saved contents are returned, without the changes of the UnitOfWork in progress.
+    """
+    if saved or _unit is None:
+        df = _read_saved(filename)
+    elif filename in _unit.tables:
+        df = schema.compact(_unit.tables[filename].copy(deep=False), filename)
+    elif filename in _unit.appends:
+        df = _read_saved(filename)
+        df = pd.concat([df, pd.DataFrame(_unit.appends[filename], columns=df.columns)], ignore_index=True)
+        df = schema.compact(df, filename)
+    else:
+        df = _read_saved(filename)
+    return schema.expand(df, filename, expand) if expand else df
+
+
+def _read_saved(filename):
+    """Returns a shallow copy of the saved contents of a table, ignoring any changes in the UnitOfWork in progress."""
+    if BACKEND == 'sqlite' and sqlite_backend.is_stored(filename):
+        start = time.perf_counter()
+        df = sqlite_backend.read_table(_db(), filename)
+        io_stats.record_read(filename, True, time.perf_counter() - start)
+        return schema.compact(df, filename)
+    return _load(filename).copy(deep=False)
+
+
+def _load(filename):
+    """
+    Returns the cached DataFrame of a csv table, with the compact column types, parsing the file first
+    if it has changed. This is the cached object itself, so it must not be modified.
+    """
+    path = table_path(filename)
+    if filename == CAMPS_FILE and not os.path.exists(path):
+        migrate_camp_files()
+    stamp = _stamp(path)  # raises FileNotFoundError if the table does not exist
+    cached = _cache.get(path)
+    if cached is None or cached[0] != stamp:
+        start = time.perf_counter()
+        df = schema.compact(pd.read_csv(path, **READ_OPTIONS.get(filename, {})), filename)
+        io_stats.record_read(filename, True, time.perf_counter() - start, stamp[1])
+        _cache[path] = (stamp, df)
+        logging.debug(f"{filename} parsed and cached.")
+    else:
+        io_stats.record_read(filename, False)
+        df = cached[1]
+    return df
+
+
+def _build_index(df, column):
+    """Returns a dictionary of each value of a column (or tuple of values of a tuple of columns) to the sorted positions of its rows."""
+    return df.groupby(list(column) if isinstance(column, tuple) else column, sort=False, observed=True).indices
+
+
+def _index(filename, column):
+    """
+    Returns the cached DataFrame of a csv table and a hash index of one of its columns (see _build_index()).
+    The index is built the first time it is needed after the table is parsed or rewritten. Rows appended with
+    append_rows() are added to it, and it is kept when update_rows() changes columns that are not part of it.
+    """
+    df = _load(filename)
+    key = (table_path(filename), column)
+    entry = _indexes.get(key)
+    if entry is None or entry[0] is not df:
+        entry = (df, _build_index(df, column))
+        _indexes[key] = entry
+    return entry
+
+
+def check_indexes():
+    """
+    Rebuilds every index from its table and returns the (file name, column) of those that did not match the
+    maintained index. The rebuilt indexes replace the maintained ones.
+    """
+    mismatched = []
+    for filename, columns in INDEXED_COLUMNS.items():
+        if BACKEND == 'sqlite' and sqlite_backend.is_stored(filename):
+            continue
+        for column in columns:
+            key = (table_path(filename), column)
+            entry = _indexes.get(key)
+            try:
+                df = _load(filename)
+            except FileNotFoundError:
+                continue
+            rebuilt = _build_index(df, column)
+            if entry is not None and entry[0] is df and (
+                    entry[1].keys() != rebuilt.keys()
+                    or any(not np.array_equal(entry[1][value], positions) for value, positions in rebuilt.items())):
+                mismatched.append((filename, column))
+                logging.warning(f"Index of {column} in {filename} was inconsistent and has been rebuilt.")
+            _indexes[key] = (df, rebuilt)
+    return mismatched
+
+
+def count_rows(filename):
+    """Returns the number of rows in a table, without copying it."""
+    if _unit is not None and filename in _unit.tables:
+        return len(_unit.tables[filename].index)
+    appended = len(_unit.appends.get(filename, [])) if _unit is not None else 0
+    if BACKEND == 'sqlite' and sqlite_backend.is_stored(filename):
+        return sqlite_backend.count_rows(_db(), filename) + appended
+    return len(_load(filename).index) + appended
+
+
+def _write_csv(df, filename):
+    """Saves a DataFrame to a temporary file next to the csv table and returns the temporary file's path."""
+    tmp_path = table_path(filename) + '.tmp'
+    start = time.perf_counter()
+    df.to_csv(tmp_path, index=False)
+    io_stats.record_write(filename, time.perf_counter() - start, os.path.getsize(tmp_path))
+    return tmp_path
+
+
+def _replace_csv(tmp_path, df, filename):
+    """Replaces the csv table with the temporary file written by _write_csv() and updates the cache."""
+    path = table_path(filename)
+    os.replace(tmp_path, path)
+    # cache the table as it would be parsed from the file, with a fresh index
+    _cache[path] = (_stamp(path), schema.compact(df.reset_index(drop=True), filename))
+
+
+def write_table(df, filename, camps=None):
+    """
+    Saves a DataFrame to the csv table with the given file name and updates the cache.
+    The file is written to a temporary file first and then renamed, so a table is never left half-written.
+    Inside a UnitOfWork, the table is only saved when the unit is committed.
+    camps is the (plan_id, camp_name) of the camps whose rows have changed, if the caller knows them:
+    the tables derived from this one (see supply_status.py) are then only recalculated for those camps.
+    """
+    if _unit is not None:
+        _unit.tables[filename] = df.copy()
+        _unit.appends.pop(filename, None)  # rows appended earlier in the unit are part of df
+        _unit.changed(filename, camps)
+        return
+    if BACKEND == 'sqlite' and sqlite_backend.is_stored(filename):
+        start = time.perf_counter()
+        sqlite_backend.write_table(_db(), df, filename)
+        io_stats.record_write(filename, time.perf_counter() - start)
+    else:
+        _replace_csv(_write_csv(df, filename), df, filename)
+    _table_written(filename, camps={filename: camps} if camps is not None else None)
+
+
+def read_camps(plan_id):
+    """Returns a DataFrame of the camps in the given humanitarian plan, without the plan_id column."""
+    camps = lookup(CAMPS_FILE, plan_id=plan_id)
+    return camps[sqlite_backend.CAMP_COLUMNS].reset_index(drop=True)
+
+
+def read_all_camps():
+    """Returns a DataFrame of the camps of every humanitarian plan, with a plan_id column."""
+    return read_table(CAMPS_FILE)
+
+
+def write_camps(camps, plan_id):
+    """Saves the camps of the given humanitarian plan, replacing its rows in camps.csv."""
+    # camps of the plan that are not in camps any more are removed, which the derived tables notice without them
+    changed = [(plan_id, camp_name) for camp_name in camps['camp_name']]
+    if BACKEND == 'sqlite' and _unit is None:
+        start = time.perf_counter()
+        sqlite_backend.write_camps(_db(), camps, plan_id)
+        io_stats.record_write(CAMPS_FILE, time.perf_counter() - start)
+        _table_written(CAMPS_FILE, camps={CAMPS_FILE: changed})
+        return
+    all_camps = read_table(CAMPS_FILE)
+    others = all_camps[all_camps['plan_id'] != plan_id]
+    write_table(pd.concat([others, camps.assign(plan_id=plan_id)[all_camps.columns]], ignore_index=True), CAMPS_FILE,
+                camps=changed)
+
+
+def migrate_camp_files(data_dir=None):
+    """
+    Combines the camps csv files of older versions, one per plan (e.g. London_2023.csv), into camps.csv
+    and removes them. Plans without a camps file are skipped.
+    """
+    data_dir = data_dir or DATA_DIR
+    plans = pd.read_csv(os.path.join(data_dir, 'humanitarian_plan.csv'))
+    frames = []
+    for plan_id in plans['plan_id']:
+        path = os.path.join(data_dir, plan_id + '.csv')
+        if os.path.exists(path):
+            frames.append(pd.read_csv(path).assign(plan_id=plan_id))
+    camps = pd.DataFrame(columns=list(sqlite_backend.TABLES['camps']))
+    if frames:
+        camps = pd.concat(frames, ignore_index=True)[camps.columns]
+    camps.to_csv(os.path.join(data_dir, CAMPS_FILE), index=False)
+    for plan_id in plans['plan_id']:
+        path = os.path.join(data_dir, plan_id + '.csv')
+        if os.path.exists(path):
+            os.remove(path)
+    logging.info(f"Camps of {len(frames)} plans moved to {CAMPS_FILE}.")
+
+
+def lookup(filename, **criteria):
+    """
+    Returns a DataFrame of the rows of a table whose columns match the given values,
+    e.g. lookup('users.csv', username='volunteer1'), with the compact column types as read_table() returns them.
+    With the SQLite backend this is an indexed query.
+    With the csv files, a column in INDEXED_COLUMNS is looked up in its hash index, so the cost does not depend
+    on the size of the table.
+    """
+    unchanged = _unit is None or (filename not in _unit.tables and filename not in _unit.appends)
+    if BACKEND == 'sqlite' and sqlite_backend.is_stored(filename) and unchanged:
+        start = time.perf_counter()
+        df = sqlite_backend.read_table(_db(), filename, **criteria)
+        io_stats.record_read(filename, True, time.perf_counter() - start)
+        return schema.compact(df, filename)
+    indexed = [column for column in INDEXED_COLUMNS.get(filename, [])
+               if all(col in criteria for col in (column if isinstance(column, tuple) else (column,)))]
+    if indexed and unchanged:
+        # only the rows found in the first index that applies are copied and compared
+        column = indexed[0]
+        value = tuple(criteria[col] for col in column) if isinstance(column, tuple) else criteria[column]
+        df, index = _index(filename, column)
+        df = df.iloc[index.get(value, [])]
+    else:
+        df = read_table(filename)
+    for col, value in criteria.items():
+        df = df[df[col] == value]
+    return df
+
+
+def update_rows(filename, values, **criteria):
+    """
+    Sets the columns in values (a dictionary of column: new value) in the rows matching the given column values,
+    e.g. update_rows('users.csv', {'active': 0}, username='volunteer1'). Returns the number of rows updated.
+    """
+    if BACKEND == 'sqlite' and sqlite_backend.is_stored(filename) and _unit is None:
+        changed = _camps_of(lookup(filename, **criteria), values)
+        start = time.perf_counter()
+        updated = sqlite_backend.update_rows(_db(), filename, values, **criteria)
+        io_stats.record_write(filename, time.perf_counter() - start)
+        _table_written(filename, camps={filename: changed} if changed is not None else None)
+        return updated
+    df = read_table(filename)
+    cached = _cache.get(table_path(filename))
+    match = pd.Series(True, index=df.index)
+    for col, value in criteria.items():
+        match &= df[col] == value
+    changed = _camps_of(df[match], values)
+    for col, value in values.items():
+        schema.set_value(df, filename, match, col, value)
+    write_table(df, filename, camps=changed)
+    if _unit is None and cached is not None:
+        # the rows have not moved, so the indexes of the columns that were not changed still apply
+        _keep_indexes(filename, cached[1], [column for column in INDEXED_COLUMNS.get(filename, [])
+                                            if not set(column if isinstance(column, tuple) else (column,)) & set(values)])
+    return int(match.sum())
+
+
+def _camps_of(rows, values=None):
+    """
+    Returns the (plan_id, camp_name) of the camps of the given rows, before and after setting the columns in values,
+    or None if the table has no plan_id and camp_name columns.
+    """
+    if 'plan_id' not in rows.columns or 'camp_name' not in rows.columns:
+        return None
+    before = set(zip(rows['plan_id'], rows['camp_name']))
+    if values and ('plan_id' in values or 'camp_name' in values):
+        return before | {(values.get('plan_id', plan_id), values.get('camp_name', camp_name))
+                         for plan_id, camp_name in before}
+    return before
+
+
+def _keep_indexes(filename, old_df, columns):
+    """Moves the indexes of the given columns built from the previous contents of a table to its new contents."""
+    path = table_path(filename)
+    if path not in _cache:
+        return
+    for column in columns:
+        entry = _indexes.get((path, column))
+        if entry is not None and entry[0] is old_df:
+            _indexes[(path, column)] = (_cache[path][1], entry[1])
+
+
+def append_row(filename, row):
+    """Adds a single row, given as a dictionary of column values, to the end of a table."""
+    append_rows(filename, [row])
+
+
+def append_rows(filename, rows):
+    """
+    Adds rows, given as a list of dictionaries of column values, to the end of a table.
+    With the csv files, only the new lines are written, so the cost does not depend on the size of the table.
+    Columns missing from a row are left empty. Raises ValueError if a row has a column the table does not have.
+    """
+    _check_columns(filename, rows)
+    changed = ({(row['plan_id'], row['camp_name']) for row in rows}
+               if all('plan_id' in row and 'camp_name' in row for row in rows) else None)
+    if _unit is not None:
+        if filename in _unit.tables:
+            df = _unit.tables[filename]
+            _unit.tables[filename] = pd.concat([df, pd.DataFrame(rows, columns=df.columns)], ignore_index=True)
+        else:
+            _unit.appends.setdefault(filename, []).extend(rows)
+        _unit.changed(filename, changed)
+        return
+    if BACKEND == 'sqlite' and sqlite_backend.is_stored(filename):
+        start = time.perf_counter()
+        sqlite_backend.append_rows(_db(), filename, rows)
+        io_stats.record_write(filename, time.perf_counter() - start)
+    else:
+        _append_csv(filename, rows)
+    _table_written(filename, camps={filename: changed} if changed is not None else None)
+
+
+def _csv_columns(filename):
+    """Returns the columns in the header of a csv table."""
+    with open(table_path(filename), newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def _check_columns(filename, rows):
+    """
+    Raises ValueError if any of the rows to append to a table has a column the table does not have,
+    before anything is written.
+    """
+    if _unit is not None and filename in _unit.tables:
+        columns = _unit.tables[filename].columns
+    elif BACKEND == 'sqlite' and sqlite_backend.is_stored(filename):
+        columns = sqlite_backend.TABLES[sqlite_backend.table_name(filename)]
+    else:
+        columns = _csv_columns(filename)
+    unknown = set().union(*rows) - set(columns)
+    if unknown:
+        raise ValueError(f"{filename} has no column {', '.join(sorted(unknown))}.")
+
+
+def _append_csv(filename, rows):
+    """
+    Appends rows to a csv table, with their values in the order of the columns in its header.
+    If the cached table was up to date before the append,
+    only the new lines are parsed and added to it, instead of parsing the whole file again on the next read.
+    """
+    path = table_path(filename)
+    stamp = _stamp(path)  # raises FileNotFoundError if the table does not exist
+    start = time.perf_counter()
+    columns = _csv_columns(filename)
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows([['' if pd.isna(row.get(col)) else row.get(col) for col in columns]
+                                                       for row in rows])
+    with open(path, 'rb') as f:
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+        last_char = f.read(1)
+    with open(path, 'a', newline='') as f:
+        if last_char not in (b'', b'\n'):  # files written by hand or by older versions may not end with a newline
+            f.write('\n')
+        f.write(buffer.getvalue())
+    io_stats.record_write(filename, time.perf_counter() - start, _stamp(path)[1] - stamp[1])
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == stamp and len(cached[1].index) > 0:
+        buffer.seek(0)
+        new_rows = pd.read_csv(buffer, header=None, names=cached[1].columns, **READ_OPTIONS.get(filename, {}))
+        # the new rows are given the compact types of the cached table, so the table itself is not converted again
+        df, new_rows = schema.extend_types(cached[1], new_rows)
+        if new_rows is None:  # a value that does not fit the type of its column
+            _cache.pop(path)
+            return
+        _cache[path] = (_stamp(path), pd.concat([df, new_rows], ignore_index=True))
+        _extend_indexes(filename, cached[1], new_rows)
+
+
+def _extend_indexes(filename, old_df, new_rows):
+    """Adds rows appended to the end of a cached table to the indexes built from its previous contents."""
+    path = table_path(filename)
+    for column in INDEXED_COLUMNS.get(filename, []):
+        entry = _indexes.get((path, column))
+        if entry is None or entry[0] is not old_df:
+            continue
+        index = entry[1]
+        for value, positions in _build_index(new_rows, column).items():
+            positions = positions + len(old_df.index)
+            index[value] = np.concatenate([index[value], positions]) if value in index else positions
+        _indexes[(path, column)] = (_cache[path][1], index)
+
+
+def _table_written(*filenames, camps=None):
+    """
+    Updates the tables derived from the tables that have just been written (see supply_status.py).
+    camps is a dictionary of file name: (plan_id, camp_name) of the camps whose rows have changed,
+    for the tables where they are known.
+    """
+    # imported here since it reads and writes tables through this module
+    from progs import supply_status
+    supply_status.table_written(*filenames, camps=camps or {})
+
+
+def invalidate(filename=None):
+    """Removes a table from the cache, or every table if no file name is given."""
+    if filename is None:
+        _cache.clear()
+        _indexes.clear()
+    else:
+        _cache.pop(table_path(filename), None)
+        for column in INDEXED_COLUMNS.get(filename, []):
+            _indexes.pop((table_path(filename), column), None)
+
+
+class UnitOfWork:
+    """
+    Groups the table writes of one user action, e.g.
+        with data_access.UnitOfWork():
+            data_access.write_table(users, 'users.csv')
+            data_access.write_camps(camps, plan_id)
+    Inside the unit, written tables and appended rows are kept in memory and reads of them return the new contents.
+    When the block ends, each changed table is saved once: the csv files are all written to temporary files before
+    any of them replaces its table, then the appended rows are added to the end of their tables.
+    The SQLite backend saves every change in one transaction.
+    If an exception is raised inside the block, the changes are discarded instead.
+    A unit started inside another unit is part of the outer one.
+    """
+
+    def __init__(self):
+        self.tables = {}  # file name -> DataFrame to be saved
+        self.appends = {}  # file name -> rows to be appended to a table that is not rewritten
+        self.camps = {}  # file name -> (plan_id, camp_name) of the camps changed in it, or None if not known
+        self.outer = None
+
+    def __enter__(self):
+        global _unit
+        self.outer = _unit
+        if self.outer is None:
+            _unit = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.outer is not None:  # the outer unit commits or rolls back
+            return False
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def changed(self, filename, camps):
+        """Adds the camps whose rows have changed in a table (None if not known) to those changed earlier in the unit."""
+        if camps is None or self.camps.get(filename, set()) is None:
+            self.camps[filename] = None
+        else:
+            self.camps[filename] = self.camps.get(filename, set()) | set(camps)
+
+    def commit(self):
+        """Saves every table written inside the unit."""
+        global _unit
+        _unit = None
+        tables, self.tables = self.tables, {}
+        appends, self.appends = self.appends, {}
+        camps, self.camps = self.camps, {}
+        if not tables and not appends:
+            return
+        in_db = {filename for filename in list(tables) + list(appends)
+                 if BACKEND == 'sqlite' and sqlite_backend.is_stored(filename)}
+        if in_db:
+            start = time.perf_counter()
+            sqlite_backend.write_tables(_db(), {filename: tables[filename] for filename in in_db if filename in tables},
+                                        {filename: appends[filename] for filename in in_db if filename in appends})
+            # the tables are saved in one transaction, so its time is shared between them
+            seconds = (time.perf_counter() - start) / len(in_db)
+            for filename in in_db:
+                io_stats.record_write(filename, seconds)
+        csv_tables = {filename: df for filename, df in tables.items() if filename not in in_db}
+        tmp_paths = {}
+        try:
+            for filename, df in csv_tables.items():
+                tmp_paths[filename] = _write_csv(df, filename)
+        except BaseException:
+            for tmp_path in tmp_paths.values():
+                os.remove(tmp_path)
+            raise
+        for filename, tmp_path in tmp_paths.items():
+            _replace_csv(tmp_path, csv_tables[filename], filename)
+        for filename, rows in appends.items():
+            if filename not in in_db:
+                _append_csv(filename, rows)
+        logging.debug(f"{', '.join(list(tables) + list(appends))} saved.")
+        _table_written(*tables, *appends,
+                       camps={filename: changed for filename, changed in camps.items() if changed is not None})
+
+    def rollback(self):
+        """Discards every table written inside the unit."""
+        global _unit
+        _unit = None
+        self.tables = {}
+        self.appends = {}
+        self.camps = {}
+        logging.debug("Unsaved changes discarded.")
@@ -1,5 +1,5 @@
-import re, logging, datetime, pandas as pd, os
-from progs import verify as v
+import re, logging, datetime
+from progs import verify as v, data_access, services
 
 def add_description():
     """Prompts the admin to enter the description of the humanitarian plan."""
@@ -42,8 +42,11 @@ def add_location():
             print("\nPlease ensure location contains text.")
             logging.error("Invalid user input.")
             continue
-        if loc.lower() not in v.valid_cities:
+        if not v.is_valid_city(loc):
             print("\nThe city you have entered does not exist. Please try again.")
+            suggestions = v.cities_starting_with(loc)
+            if suggestions:
+                print("Cities starting with", loc + ":", ", ".join(city.title() for city in suggestions))
             logging.error("Location entered is not a valid city name.")
             continue
         return loc
@@ -75,7 +78,7 @@ def add_start_date(location):
             logging.error("Admin entered a start date in the future.")
             continue
         new_id = location + "_" + start_date[6:]
-        plans = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
+        plans = data_access.read_table('humanitarian_plan.csv')
         if new_id in plans['plan_id'].values:
             print("\nThere is already a humanitarian plan with plan ID", new_id + ",",
                   "i.e. location in", location, "and start date in", start_date[6:] + ".",
@@ -156,9 +159,9 @@ def edit_description(plan_id, cur_desc):
             continue
         break
     # update csv file
-    hum_plan_df = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
+    hum_plan_df = data_access.read_table('humanitarian_plan.csv')
     hum_plan_df.loc[hum_plan_df["plan_id"] == plan_id, "description"] = new_desc
-    hum_plan_df.to_csv(os.path.join('data', 'humanitarian_plan.csv'), index=False)
+    data_access.write_table(hum_plan_df, 'humanitarian_plan.csv')
     logging.debug("humanitarian_plan.csv updated")
     return new_desc
 
@@ -171,9 +174,6 @@ def edit_no_camps(plan_id, num_camps):
    If admin chooses to open camps, they have 0 refugees, volunteers, capacity and resources by default -
    admin can choose to edit these details by choosing from the main menu.
     '''
-    hum_plan_df = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
-    plan_df = pd.read_csv(os.path.join('data', plan_id + '.csv'))
-
     logging.debug("Admin prompted to enter new number of camps.")
     while True:
         print("\nEnter [X] to return to the previous menu or [B] to go back to the previous step.")
@@ -196,18 +196,11 @@ def edit_no_camps(plan_id, num_camps):
             continue
         break
 
-    hum_plan_df.loc[hum_plan_df["plan_id"] == plan_id, "number_of_camps"] = new_num
     difference = new_num - num_camps
-    refugee_df = pd.read_csv(os.path.join('data', 'refugees.csv'))
-    volunteer_df = pd.read_csv(os.path.join('data', 'users.csv'))
-    volunteering_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
 
     if difference < 0:
         difference = abs(difference)
-        closed_camps_reverse = []
-        for d in range(0, difference):
-            closed_camps_reverse.append(f'Camp {num_camps - d}')
-        closed_camps = closed_camps_reverse[::-1]
+        closed_camps = [f'Camp {num_camps - d}' for d in range(difference)][::-1]
         print(f'You have chosen to set the number of camps to {new_num}, '
               f'this means you are closing {closed_camps}.')
         logging.debug(f"{difference} camps will be closed. Admin prompted to choose whether to reallocate refugees.")
@@ -225,165 +218,44 @@ def edit_no_camps(plan_id, num_camps):
             if choice != 'Y' and choice != 'N':
                 print('\nPlease enter [Y] for reallocating refugees, volunteers and resources, [N] for no.')
                 logging.error("Invalid user input.")
-            else:
-                if choice == 'N':
-                    logging.debug("Admin chose not to reallocate.")
-                    # all refugee profiles will be deleted and volunteers camps removed
-                    print('\nAll refugee profiles belonging to those camps will be deleted.')
-                    logging.debug("Removing refugee profiles.")
-                    refugee_df = refugee_df.drop(refugee_df[(refugee_df['plan_id'] == plan_id)
-                                                            & (refugee_df['camp_name'].isin(closed_camps))].index)
-                    # removed_refugees = []
-                    # index = 0
-                    # for refugee_family in refugee_df.iterrows():
-                    #     if refugee_family[1]['plan_id'] == plan_id and refugee_family[1]['camp_name'] in closed_camps:
-                    #         removed_refugees.append(index)
-                    #     index += 1
-                    # refugee_df = refugee_df[~refugee_df.index.isin(removed_refugees)]
-
-                    print('All volunteers at camps that are being closed will have their camp identification removed.')
-                    logging.debug("Removing volunteers' camp identification.")
-                    for camp in closed_camps:
-                        volunteer_df.loc[(volunteer_df["plan_id"] == plan_id)
-                                         & (volunteer_df["camp_name"] == camp), "camp_name"] = None
-                        # for volunteer in volunteer_df.iterrows():
-                        #     username = volunteer[1]['username']
-                        #     if volunteer[1]['plan_id'] == plan_id and volunteer[1]['camp_name'] == camp:
-                        #         volunteer_df.loc[volunteer_df.username == username, 'camp_name'] = None
-                        #         plan_df.loc[plan_df.camp_name == camp, 'volunteers'] -= 1
-
-                    # remove all volunteering sessions for the given plan_id and camp
-                    logging.debug("Removing volunteering sessions.")
-                    volunteering_times = volunteering_times.drop(volunteering_times[(volunteering_times['plan_id'] == plan_id)
-                                                            & (volunteering_times['camp_name'].isin(closed_camps))].index)
-                    # removed_times = []
-                    # index = 0
-                    # for time in volunteering_times.iterrows():
-                    #     if time[1]['plan_id'] == plan_id and time[1]['camp_name'] in closed_camps:
-                    #         removed_times.append(index)
-                    #     index += 1
-                    # volunteering_times = volunteering_times[~volunteering_times.index.isin(removed_times)]
-
-                    # remove camp rows for closed camps in plan.csv
-                    plan_df = plan_df[~plan_df['camp_name'].isin(closed_camps)]
-                    refugee_df.to_csv(os.path.join('data', 'refugees.csv'), index=False)
-                    volunteer_df.to_csv(os.path.join('data', 'users.csv'), index=False)
-                    volunteering_times.to_csv(os.path.join('data', 'volunteering_times.csv'), index=False)
-                    plan_df.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
-                    hum_plan_df.to_csv(os.path.join('data', 'humanitarian_plan.csv'), index=False)
-                    logging.debug("All csv files updated.")
-                    print('All changes have been saved.')
-                    return new_num
-                elif choice == 'Y':
-                    logging.debug("Admin chose to reallocate.")
-                    # can't close camps if not enough total remaining capacity
-                    closed_camps_df = plan_df[plan_df.camp_name.isin(closed_camps)]
-                    open_camps_df = plan_df[plan_df.camp_name.isin(closed_camps) == False]
-                    total_remaining_capacity = sum(open_camps_df.capacity) - sum(open_camps_df.refugees)
-                    total_displaced = 0
-                    for camp in range(len(closed_camps_df)):
-                        total_displaced += closed_camps_df.iloc[camp, 2]
-                    if total_displaced > total_remaining_capacity:
-                        print('Total number of displaced refugees is less than the total remaining capacity of the remaining '
-                              'camps.'
-                              '\nPlease edit the capacity of the remaining camps before closing camps. '
-                              '\nChanges to the number of camps have not been saved.')
-                        logging.warning("Insufficient capacity in remaining camps to reallocate refugees in closed camps. Returning to previous step.")
-                        return "B"
-                    # dict of camps and remaining capacity, sort by highest to lowest capacity, iterate through each family and
-                    # allocate each to the camp with highest remaining capacity
-                    # if family cannot fit into the camp with largest remaining capacity then return function
-                    remaining_capacity = dict(zip(open_camps_df.camp_name, (open_camps_df.capacity - open_camps_df.refugees)))
-                    print('Reallocating refugee families from closed camps to remaining camps...')
-                    logging.debug("Reallocating refugees.")
-                    for camp in closed_camps:
-                        print(f'List of reallocated refugee families from {camp} and their new camps '
-                              f'(in format (refugee_id, new_camp)):')
-                        for refugee_family in refugee_df.iterrows():
-                            reassigned_camp = max(remaining_capacity, key=remaining_capacity.get)
-                            if refugee_family[1]['plan_id'] == plan_id:
-                                if remaining_capacity[reassigned_camp] < refugee_family[1]['family_members']:
-                                    print('The capacity of the remaining camps is not sufficient to host one or more of the '
-                                          'families belonging to camps being closed down.'
-                                          '\nPlease increase the capacity of remaining camps or close down fewer camps.'
-                                          '\nChanges to the camp number have not been saved.')
-                                    logging.warning(
-                                        "Insufficient capacity in remaining camps to reallocate refugees in closed camps. Returning to previous step.")
-                                    return "B"
-                                else:
-                                    refugee_id = refugee_family[1]['refugee_id']
-                                    if refugee_family[1]['camp_name'] == camp:
-                                        refugee_df.loc[refugee_df.refugee_id == refugee_id, 'camp_name'] = reassigned_camp
-                                        remaining_capacity[reassigned_camp] -= refugee_family[1]['family_members']
-                                        plan_df.loc[plan_df.camp_name == reassigned_camp, 'refugees'] += refugee_family[1][
-                                            'family_members']
-                                        plan_df.loc[plan_df.camp_name == camp, 'refugees'] -= refugee_family[1]['family_members']
-                                        print(refugee_id, reassigned_camp)
-
-                    # volunteer - just change camp name to NaN if volunteer's camp is closed
-                    logging.debug("Removing volunteers' camp identification.")
-                    print('All volunteers at camps that are being closed will have their camp identification removed.'
-                          '\nAny volunteering sessions for camps that are being closed will be removed.')
-                    for camp in closed_camps:
-                        volunteer_df.loc[(volunteer_df["plan_id"] == plan_id)
-                                         & (volunteer_df["camp_name"] == camp), "camp_name"] = None
-                        # for volunteer in volunteer_df.iterrows():
-                        #     if volunteer[1]['plan_id'] == plan_id:
-                        #         username = volunteer[1]['username']
-                        #         if volunteer[1]['camp_name'] == camp:
-                        #             volunteer_df.loc[volunteer_df.username == username, 'camp_name'] = None
-                        #             plan_df.loc[plan_df.camp_name == camp, 'volunteers'] -= 1
-
-                    # remove all volunteering sessions for the given plan_id and camp
-                    logging.debug("Removing volunteering sessions.")
-                    volunteering_times = volunteering_times.drop(
-                        volunteering_times[(volunteering_times['plan_id'] == plan_id)
-                                           & (volunteering_times['camp_name'].isin(closed_camps))].index)
-                    # removed_times = []
-                    # index = 0
-                    # for time in volunteering_times.iterrows():
-                    #     if time[1]['plan_id'] == plan_id and time[1]['camp_name'] in closed_camps:
-                    #         removed_times.append(index)
-                    #     index += 1
-                    # volunteering_times = volunteering_times[~volunteering_times.index.isin(removed_times)]
+                continue
+            break
 
-                    # resources - add back to storage
-                    logging.debug("Returning resources to storage.")
-                    print('Resources (food packs, water and first-aid kits) of camps being closed will be moved back to storage'
-                          ' in the same plan.')
-                    for camp in closed_camps:
-                        select_camp = plan_df[plan_df['camp_name'] == camp]
-                        hum_plan_df.loc[hum_plan_df["plan_id"] == plan_id, "food_storage"] += select_camp.iloc[0]['food']
-                        plan_df.loc[plan_df.camp_name == camp, 'food'] = 0
-                        hum_plan_df.loc[hum_plan_df["plan_id"] == plan_id, "water_storage"] += select_camp.iloc[0]['water']
-                        plan_df.loc[plan_df.camp_name == camp, 'water'] = 0
-                        hum_plan_df.loc[hum_plan_df["plan_id"] == plan_id, "firstaid_kits_storage"] += select_camp.iloc[0]['firstaid_kits']
-                        plan_df.loc[plan_df.camp_name == camp, 'firstaid_kits'] = 0
-                    # remove camp rows for closed camps in plan.csv
-                    plan_df = plan_df[~plan_df['camp_name'].isin(closed_camps)]
-                    # saving to csv files
-                    refugee_df.to_csv(os.path.join('data', 'refugees.csv'), index=False)
-                    volunteer_df.to_csv(os.path.join('data', 'users.csv'), index=False)
-                    volunteering_times.to_csv(os.path.join('data', 'volunteering_times.csv'), index=False)
-                    plan_df.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
-                    hum_plan_df.to_csv(os.path.join('data', 'humanitarian_plan.csv'), index=False)
-                    logging.debug("All csv files updated.")
-                    print('All changes have been saved.')
-                    return new_num
+        try:
+            moves = services.close_camps(plan_id, difference, reallocate=(choice == 'Y'))
+        except services.InsufficientCapacity as e:
+            print(str(e) + '\nChanges to the number of camps have not been saved.')
+            logging.warning("Insufficient capacity in remaining camps to reallocate refugees in closed camps. Returning to previous step.")
+            return "B"
+        except ValueError as e:
+            print(str(e) + '\nChanges to the number of camps have not been saved.')
+            logging.error(f"Camps could not be closed: {e} Returning to previous step.")
+            return "B"
+        if choice == 'Y':
+            logging.debug("Admin chose to reallocate.")
+            for camp, camp_moves in moves.items():
+                print(f'List of reallocated refugee families from {camp} and their new camps '
+                      f'(in format (refugee_id, new_camp)):')
+                for refugee_id, reassigned_camp in camp_moves:
+                    print(refugee_id, reassigned_camp)
+            print('All volunteers at camps that are being closed will have their camp identification removed.'
+                  '\nAny volunteering sessions for camps that are being closed will be removed.')
+            print('Resources (food packs, water and first-aid kits) of camps being closed will be moved back to storage'
+                  ' in the same plan.')
+        else:
+            logging.debug("Admin chose not to reallocate.")
+            print('\nAll refugee profiles belonging to those camps will be deleted.')
+            print('All volunteers at camps that are being closed will have their camp identification removed.')
+        print('All changes have been saved.')
+        return new_num
     elif difference > 0:
         logging.debug(f"{difference} camps will be added.")
         print(f'You have chosen to set the number of camps to {new_num}, '
               f'this means you are opening {difference} camps.'
               f'\nPlease note new camps have 0 refugees, volunteers, capacity and resources.'
               f'You can change this by choosing to do so on the main menu.')
-        for i in range(1, difference + 1):
-            add_camps = open(os.path.join('data', plan_id + '.csv'), "a")
-            add_camps.write(f"\nCamp {num_camps + i},0,0,0,0,0,0")
-        add_camps.close()
-        new_plan = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+        new_plan = services.open_camps(plan_id, difference)
         print(f'The change has been saved. The updated details of {plan_id} are as follows:'
               f'\n{new_plan}')
-        hum_plan_df.to_csv(os.path.join('data', 'humanitarian_plan.csv'), index=False)
-        logging.debug("All csv files updated.")
         print('All changes have been saved.')
         return new_num
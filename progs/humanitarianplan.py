@@ -1,4 +1,6 @@
-import logging, os
+import pandas as pd
+import logging
+from progs import data_access
 
 class HumanitarianPlan:
     """
@@ -10,7 +12,7 @@ class HumanitarianPlan:
 
     When initialised, end_date is set to 'None' and can later be edited with edit_end_date method of Admin class.
 
-    When initialised, a camps csv file is created with a row for the details of each camp in the plan.
+    When initialised, a row for the details of each camp in the plan is added to camps.csv.
     """
 
     def __init__(self, description, location, start_date, nb_of_camps):
@@ -21,10 +23,8 @@ class HumanitarianPlan:
         self.nb_of_camps = int(nb_of_camps)
         self.end_date = None  # end_date will be redefined with end_event method from Admin class
 
-        # When a Humanitarian Plan object is created, it also creates 2 .csv files for that HP
-        create = open(os.path.join('data', self.name + '.csv'), "w") #this one for general info + CURRENT amount of resources in each camp (can be edited by volunteers/admin)
-        create.write("camp_name,volunteers,refugees,capacity,food,water,firstaid_kits")
-        create.close()
+        # When a Humanitarian Plan object is created, it also adds its camps to the camps table
+        # this one for general info + CURRENT amount of resources in each camp (can be edited by volunteers/admin)
         # resources = open(f"{self.name}_resources.csv", "w") #this one for resources specifically: how much in storage and how much ALLOCATED to each camp by admin
         # resources.write("location,food_packs,water,firstaid_kits"
         #                 "\nStorage,100,100,25") # default amount of resources
@@ -34,9 +34,10 @@ class HumanitarianPlan:
 
         # Adds the rows for each camp into the resources.csv file, based on how many camps exist
         # e.g. if nb_of_camps is 3, there will be a row added to the csv for Camp 1, Camp 2, and Camp 3
-        add_camps = open(os.path.join('data', self.name + '.csv'), "a")
-        for i in range(1, self.nb_of_camps + 1):  # starts at 1 since default is 0 and doesn't make sense to have Camp 0
-            add_camps.write(f"\nCamp {i},0,0,0,0,0,0")  # at the start, each camp has 0 of every resource type
-        add_camps.close()
+        # starts at 1 since default is 0 and doesn't make sense to have Camp 0
+        camps = pd.DataFrame({'camp_name': [f"Camp {i}" for i in range(1, self.nb_of_camps + 1)]})
+        for col in ('volunteers', 'refugees', 'capacity', 'food', 'water', 'firstaid_kits'):
+            camps[col] = 0  # at the start, each camp has 0 of every resource type
+        data_access.write_camps(camps, self.name)
 
-        logging.debug("Created csv file for the humanitarian plan's camps.")
+        logging.debug("camps.csv updated")
@@ -0,0 +1,61 @@
+"""
+Hands out IDs for new rows (e.g. refugee_id) from a persisted sequence in id_sequences.csv, one row per table.
+The next ID only ever increases, so IDs are not reused when the last row of a table is deleted,
+and a new ID does not require reading the table it is for.
+The first time a sequence is used, it starts after the largest ID already in the table.
+"""
+import pandas as pd
+import logging
+from progs import data_access
+
+SEQUENCES_FILE = 'id_sequences.csv'
+COLUMNS = ['table_name', 'next_id']
+# column holding the ID of each table that has a sequence
+ID_COLUMNS = {
+    'refugees.csv': 'refugee_id',
+}
+
+
+def _read_sequences():
+    """Returns the sequences table, or an empty one if it does not exist yet."""
+    try:
+        return data_access.read_table(SEQUENCES_FILE)
+    except FileNotFoundError:
+        return pd.DataFrame(columns=COLUMNS)
+
+
+def _first_id(filename):
+    """Returns the ID after the largest one in a table, used to start its sequence."""
+    try:
+        ids = data_access.read_table(filename)[ID_COLUMNS[filename]]
+    except FileNotFoundError:
+        return 1
+    return 1 if len(ids.index) == 0 else int(ids.max()) + 1
+
+
+def next_ids(filename, count=1):
+    """
+    Reserves a contiguous block of count IDs for the given table (e.g. 'refugees.csv') and returns them as a range.
+    Inside a data_access.UnitOfWork, the IDs are only reserved if the unit is committed.
+    """
+    if filename not in ID_COLUMNS:
+        raise ValueError(f"No ID sequence for {filename}.")
+    if count < 1:
+        raise ValueError("At least one ID must be reserved.")
+    sequences = _read_sequences()
+    row = sequences['table_name'] == filename
+    if row.any():
+        first = int(sequences.loc[row, 'next_id'].iloc[0])
+        sequences.loc[row, 'next_id'] = first + count
+    else:
+        first = _first_id(filename)
+        sequences = pd.concat([sequences, pd.DataFrame({'table_name': [filename], 'next_id': [first + count]})],
+                              ignore_index=True)
+    data_access.write_table(sequences, SEQUENCES_FILE)
+    logging.debug(f"{SEQUENCES_FILE} updated")
+    return range(first, first + count)
+
+
+def next_id(filename):
+    """Reserves and returns the next ID for the given table."""
+    return next_ids(filename)[0]
@@ -0,0 +1,100 @@
+"""
+Counts and times the table reads and writes made through data_access, per user action.
+An action is a call to a public method of the Admin or Volunteer class (e.g. Admin.display_hum_plan), which the
+track_actions class decorator marks. Reads and writes made by an action are counted under the innermost action
+in progress, so those made by a menu itself (e.g. the notifications in Admin.admin_menu) are counted separately
+from those of the actions chosen in it.
+
+For each action and table, the following are recorded: reads (including those served from the cache),
+parses from disk (or queries of the database) and the time spent on them, writes and the time spent serialising them,
+and the bytes read and written. When a user logs out, dump() logs one line per action with these numbers
+(e.g. "I/O stats: {"action": "Admin.admin_menu", "files": {...}}") and, if the HMS_IO_STATS environment variable
+is set to 1, also prints them as a table.
+"""
+import pandas as pd
+import os, json, functools, contextlib
+import logging
+
+FIELDS = ['reads', 'parses', 'parse_s', 'bytes_read', 'writes', 'write_s', 'bytes_written']
+# name under which reads and writes made outside any action (e.g. at login) are counted
+NO_ACTION = 'other'
+
+# action -> file name -> counters
+_stats = {}
+# the innermost action in progress, if any
+_action = None
+
+
+def _counters(filename):
+    """Returns the counters of a table for the action in progress."""
+    return _stats.setdefault(_action or NO_ACTION, {}).setdefault(filename, dict.fromkeys(FIELDS, 0))
+
+
+def record_read(filename, parsed, seconds=0.0, nbytes=0):
+    """Records a read of a table, which was parsed (or queried) if parsed is True and taken from the cache otherwise."""
+    counters = _counters(filename)
+    counters['reads'] += 1
+    if parsed:
+        counters['parses'] += 1
+        counters['parse_s'] += seconds
+        counters['bytes_read'] += nbytes
+
+
+def record_write(filename, seconds, nbytes=0):
+    """Records a write of a table (or rows appended to it), which took the given time to serialise and save."""
+    counters = _counters(filename)
+    counters['writes'] += 1
+    counters['write_s'] += seconds
+    counters['bytes_written'] += nbytes
+
+
+@contextlib.contextmanager
+def action(name):
+    """Counts the reads and writes made inside the block under the given action name."""
+    global _action
+    outer, _action = _action, name
+    try:
+        yield
+    finally:
+        _action = outer
+
+
+def _tracked(name, method):
+    """Returns the method wrapped so that each call is an action with the given name."""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with action(name):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def track_actions(cls):
+    """Class decorator making each call to a public method of the class an action named Class.method."""
+    for name, method in list(vars(cls).items()):
+        if callable(method) and not name.startswith('_'):
+            setattr(cls, name, _tracked(f"{cls.__name__}.{name}", method))
+    return cls
+
+
+def report():
+    """Returns a DataFrame of the counters of each table read or written by each action, one row per action and table."""
+    rows = [{'action': name, 'file': filename, **counters}
+            for name, files in _stats.items() for filename, counters in files.items()]
+    return pd.DataFrame(rows, columns=['action', 'file'] + FIELDS)
+
+
+def reset():
+    """Clears the counters."""
+    _stats.clear()
+
+
+def dump():
+    """Logs the counters of each action as one structured line, prints them if HMS_IO_STATS=1, and clears them."""
+    for name, files in _stats.items():
+        rounded = {filename: {field: round(value, 6) if isinstance(value, float) else value
+                              for field, value in counters.items()} for filename, counters in files.items()}
+        logging.info(f"I/O stats: {json.dumps({'action': name, 'files': rounded})}")
+    if os.environ.get('HMS_IO_STATS') == '1' and _stats:
+        print("\nTable reads and writes in this session:")
+        print(report().to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+    reset()
@@ -1,6 +1,7 @@
-import re, datetime, pandas as pd, os
+import re, datetime
 import logging
 from progs.coded_vars import convert_gender, convert_medical_condition
+from progs import data_access
 
 def add_name():
     """Prompts the user to enter the refugee's name."""
@@ -205,10 +206,7 @@ def edit_refugee_name(refugee_id, refugee_name):
             new_name = f"{new_name[0].upper()}{new_name[1:]}"
             break
     # update csv file
-    refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-    cur = (refugees['refugee_id'] == refugee_id)
-    refugees.loc[cur, 'refugee_name'] = new_name
-    refugees.to_csv(os.path.join('data', 'refugees.csv'), index=False)
+    data_access.update_rows('refugees.csv', {'refugee_name': new_name}, refugee_id=refugee_id)
     logging.debug("refugees.csv updated")
     print("\nRefugee name updated successfully!")
     print("Refugee's name has been changed to:", new_name)
@@ -244,10 +242,7 @@ def edit_gender(refugee_id, gender):
             continue
         break
     # update csv file
-    refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-    cur = (refugees['refugee_id'] == refugee_id)
-    refugees.loc[cur, 'gender'] = new_gender
-    refugees.to_csv(os.path.join('data', 'refugees.csv'), index=False)
+    data_access.update_rows('refugees.csv', {'gender': new_gender}, refugee_id=refugee_id)
     logging.debug("refugees.csv updated")
     new_gender_str = convert_gender(new_gender)
     print("\nGender updated successfully!")
@@ -310,10 +305,7 @@ def edit_dob(refugee_id, date_of_birth):
             logging.debug("Date of birth confirmed.")
         break
     # update csv file
-    refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-    cur = (refugees['refugee_id'] == refugee_id)
-    refugees.loc[cur, 'date_of_birth'] = new_dob
-    refugees.to_csv(os.path.join('data', 'refugees.csv'), index=False)
+    data_access.update_rows('refugees.csv', {'date_of_birth': new_dob}, refugee_id=refugee_id)
     logging.debug("refugees.csv updated")
     print("\nDate of birth updated successfully!")
     print("Refugee's date of birth has been changed to:", new_dob)
@@ -353,10 +345,7 @@ def edit_medical_cond(refugee_id, medical_cond):
             continue
         break
     # update csv file
-    refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-    cur = (refugees['refugee_id'] == refugee_id)
-    refugees.loc[cur, 'medical_condition'] = new_medical_cond
-    refugees.to_csv(os.path.join('data', 'refugees.csv'), index=False)
+    data_access.update_rows('refugees.csv', {'medical_condition': new_medical_cond}, refugee_id=refugee_id)
     logging.debug("refugees.csv updated")
     new_medical_str = convert_medical_condition(new_medical_cond)
     print("\nMedical condition updated successfully!")
@@ -370,7 +359,7 @@ def edit_family(plan_id, camp_name, refugee_id, family):
     If the family size exceeds 12, a warning is displayed and the user is asked to confirm the input.
     """
     print("\nCurrent no. of members in refugee's family:", family)
-    camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+    camps = data_access.read_camps(plan_id)
     cur_camp = camps[camps['camp_name'] == camp_name]
     remaining_cap = cur_camp.iloc[0]['capacity'] - cur_camp.iloc[0]['refugees']
     print("Your camp's remaining capacity is " + str(remaining_cap) + ".")
@@ -424,17 +413,14 @@ def edit_family(plan_id, camp_name, refugee_id, family):
             logging.debug("Number of family members confirmed.")
         break
     # update csv files
-    refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-    cur = (refugees['refugee_id'] == refugee_id)
-    refugees.loc[cur, 'family_members'] = new_family
-    refugees.to_csv(os.path.join('data', 'refugees.csv'), index=False)
+    data_access.update_rows('refugees.csv', {'family_members': new_family}, refugee_id=refugee_id)
     logging.debug("refugees.csv updated")
     print("\nFamily members updated successfully!")
     print("New no. of members in refugee's family:", new_family)
 
     chosen = (camps['camp_name'] == camp_name)
     camps.loc[chosen, 'refugees'] = camps.loc[chosen, 'refugees'] - family + new_family
-    camps.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
+    data_access.write_camps(camps, plan_id)
     logging.debug("camps csv file updated")
     logging.debug("Family size updated successfully")
     return
@@ -467,10 +453,7 @@ def edit_remarks(refugee_id, remarks):
             continue
         break
     # update csv file
-    refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-    cur = (refugees['refugee_id'] == refugee_id)
-    refugees.loc[cur, 'remarks'] = new_remarks
-    refugees.to_csv(os.path.join('data', 'refugees.csv'), index=False)
+    data_access.update_rows('refugees.csv', {'remarks': new_remarks}, refugee_id=refugee_id)
     logging.debug("refugees.csv updated")
     print("\nRemarks updated successfully!")
     print("Remarks on refugee have been changed to:", new_remarks)
@@ -499,15 +482,15 @@ def remove_refugee(plan_id, camp_name, refugee_id, refugee_name, family):
 
     logging.debug("Removal of refugee profile confirmed.")
     # update csv files
-    refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
+    refugees = data_access.read_table('refugees.csv')
     refugees = refugees.drop(refugees[refugees['refugee_id'] == refugee_id].index)
-    refugees.to_csv(os.path.join('data', 'refugees.csv'), index=False)
+    data_access.write_table(refugees, 'refugees.csv', camps=[(plan_id, camp_name)])
     logging.debug("refugees.csv updated")
 
-    camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+    camps = data_access.read_camps(plan_id)
     chosen = (camps['camp_name'] == camp_name)
     camps.loc[chosen, 'refugees'] = camps.loc[chosen, 'refugees'] - family
-    camps.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
+    data_access.write_camps(camps, plan_id)
     logging.debug("camps csv file updated")
 
     print("\nRefugee's profile has been removed.")
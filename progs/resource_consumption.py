@@ -1,12 +1,12 @@
-import pandas as pd, os
 import logging
+from progs import data_access, services
 
 def edit_food(plan_id, camp_name):
     """
     Prompts the user to enter the number of food packets consumed at the selected camp.
     The user is asked for confirmation before the update is applied.
     """
-    camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+    camps = data_access.read_camps(plan_id)
     my_camp = camps[camps['camp_name'] == camp_name]
     cur_food = my_camp.iloc[0]['food']
     print("\nCurrent supply of food packets at " + plan_id + ", " + camp_name + ": " + str(cur_food))
@@ -53,10 +53,7 @@ def edit_food(plan_id, camp_name):
         break
     logging.debug("Consumption of food confirmed.")
     # update csv file
-    chosen = (camps['camp_name'] == camp_name)
-    camps.loc[chosen, 'food'] = cur_food - food_consumed
-    camps.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
-    logging.debug("updated camps csv file")
+    services.record_consumption(plan_id, camp_name, food=food_consumed)
     print("\nFood supply updated successfully!")
     print("Updated supply of food packets:", cur_food - food_consumed)
     return
@@ -66,7 +63,7 @@ def edit_water(plan_id, camp_name):
     Prompts the user to enter the number of water portions consumed at the selected camp.
     The user is asked for confirmation before the update is applied.
     """
-    camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+    camps = data_access.read_camps(plan_id)
     my_camp = camps[camps['camp_name'] == camp_name]
     cur_water = my_camp.iloc[0]['water']
     print("\nCurrent supply of water portions at " + plan_id + ", " + camp_name + ": " + str(cur_water))
@@ -112,10 +109,7 @@ def edit_water(plan_id, camp_name):
         break
     logging.debug("Consumption of water confirmed.")
     # update csv file
-    chosen = (camps['camp_name'] == camp_name)
-    camps.loc[chosen, 'water'] = cur_water - water_consumed
-    camps.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
-    logging.debug("updated camps csv file")
+    services.record_consumption(plan_id, camp_name, water=water_consumed)
     print("\nWater supply updated successfully!")
     print("Updated supply of water portions:", cur_water - water_consumed)
     return
@@ -125,7 +119,7 @@ def edit_medical_supplies(plan_id, camp_name):
     Prompts the user to enter the number of first-aid kits used at the selected camp.
     The user is asked for confirmation before the update is applied.
     """
-    camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+    camps = data_access.read_camps(plan_id)
     my_camp = camps[camps['camp_name'] == camp_name]
     cur_medical = my_camp.iloc[0]['firstaid_kits']
     print("\nCurrent supply of first-aid kits at " + plan_id + ", " + camp_name + ": " + str(cur_medical))
@@ -172,10 +166,7 @@ def edit_medical_supplies(plan_id, camp_name):
         break
     logging.debug("Consumption of first-aid kits confirmed.")
     # update csv file
-    chosen = (camps['camp_name'] == camp_name)
-    camps.loc[chosen, 'firstaid_kits'] = cur_medical - medical_used
-    camps.to_csv(os.path.join('data', plan_id + '.csv'), index=False)
-    logging.debug("updated camps csv file")
+    services.record_consumption(plan_id, camp_name, firstaid_kits=medical_used)
     print("\nSupply of first-aid kits updated successfully!")
     print("Updated supply of first-aid kits:", cur_medical - medical_used)
     return
@@ -0,0 +1,240 @@
+"""
+Append-only ledger of the movements of food, water and first-aid kits (resource_ledger.csv).
+Each row is one movement: when it happened, the plan, the camp (or STORAGE for the plan's storage), the resource,
+the change in stock, the reason and the user who made it.
+
+The functions that change the stock (in services.py, and the admin's menus for resource requests and storage)
+call record() with the movements and their reason, inside the UnitOfWork that saves the stock columns,
+so a movement is only recorded if the change is saved. The stock columns of camps.csv and humanitarian_plan.csv
+remain what the menus read. check() compares them with the ledger, and reconcile() records any difference
+(e.g. after the csv files are edited by hand) when an admin logs in.
+
+The stock according to the ledger is the latest snapshot (resource_snapshots.csv) plus the movements after it.
+A snapshot is appended every SNAPSHOT_EVERY movements, so only a short tail has to be replayed,
+and the result is kept in memory between movements.
+"""
+import pandas as pd
+import datetime, itertools, logging
+from progs import auto_resources, data_access
+
+LEDGER_FILE = 'resource_ledger.csv'
+SNAPSHOT_FILE = 'resource_snapshots.csv'
+LEDGER_COLUMNS = ['timestamp', 'plan_id', 'camp_name', 'resource', 'delta', 'reason', 'actor']
+SNAPSHOT_COLUMNS = ['position', 'timestamp', 'plan_id', 'camp_name', 'resource', 'stock']
+# camp_name of the movements in and out of a plan's storage
+STORAGE = 'storage'
+# reasons of the movements
+ALLOCATION = 'allocation'  # from storage to a camp, chosen by the admin (services.allocate())
+TOP_UP = 'top_up'  # from storage to camps, to give them a number of days of supplies (services.top_up())
+CONSUMPTION = 'consumption'  # used at a camp (services.record_consumption())
+REQUEST = 'request'  # from storage to a camp, for an approved resource request
+CAMP_CLOSURE = 'camp_closure'  # from closed camps back to storage, or removed with them (services.close_camps())
+DELIVERY = 'delivery'  # added to a plan's storage
+CORRECTION = 'correction'  # differences between the tables and the ledger found by reconcile()
+# number of movements after which a new snapshot is taken
+SNAPSHOT_EVERY = 1000
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+KEY = ['plan_id', 'camp_name', 'resource']
+
+# username of the logged-in user, recorded as the actor of each movement
+_actor = None
+# (path of the ledger, ledger rows replayed, stock after them as in stock_levels(), position of the latest snapshot)
+_state = None
+
+
+def set_actor(username):
+    """Records the given user as the actor of the movements from now on (called when a user logs in)."""
+    global _actor
+    _actor = username
+    start()
+
+
+def stock_levels(saved=False):
+    """
+    Returns a dictionary of the stock of each resource at each camp and in each plan's storage, as in the tables,
+    keyed by (plan_id, camp_name, resource). If saved is True, the changes of the UnitOfWork in progress are left out.
+    """
+    camps = data_access.read_table(data_access.CAMPS_FILE, saved=saved)
+    plans = data_access.read_table('humanitarian_plan.csv', saved=saved)
+    camp_plans, camp_names, plan_ids = camps['plan_id'].tolist(), camps['camp_name'].tolist(), plans['plan_id'].tolist()
+    stock = {}
+    for resource, storage in zip(auto_resources.RESOURCES, auto_resources.STORAGE):
+        stock.update(zip(zip(camp_plans, camp_names, itertools.repeat(resource)),
+                         camps[resource].fillna(0).astype(int).tolist()))
+        stock.update(zip(zip(plan_ids, itertools.repeat(STORAGE), itertools.repeat(resource)),
+                         plans[storage].fillna(0).astype(int).tolist()))
+    return stock
+
+
+def _now():
+    """Returns the current time as recorded in the ledger."""
+    return datetime.datetime.now().strftime(TIME_FORMAT)
+
+
+def _snapshot_rows(position, stock):
+    """Returns the rows of a snapshot of the given stock, taken after the first position movements in the ledger."""
+    timestamp = _now()
+    return [{'position': position, 'timestamp': timestamp, 'plan_id': plan_id, 'camp_name': camp_name,
+             'resource': resource, 'stock': amount} for (plan_id, camp_name, resource), amount in stock.items() if amount != 0]
+
+
+def _count_rows(filename):
+    """Returns the number of rows in a table, or None if it does not exist."""
+    try:
+        return data_access.count_rows(filename)
+    except FileNotFoundError:
+        return None
+
+
+def _started():
+    """
+    Returns True if the ledger has been started, i.e. its snapshot file exists. With the SQLite backend,
+    where the table is created empty with the database, the ledger is started once it has a snapshot or a movement.
+    """
+    snapshots = _count_rows(SNAPSHOT_FILE)
+    if snapshots is None:
+        return False
+    if data_access.BACKEND == 'sqlite':
+        return snapshots > 0 or bool(_count_rows(LEDGER_FILE))
+    return True
+
+
+def start():
+    """
+    Starts the ledger if the data directory does not have one yet, with a snapshot of the stock in the tables
+    as saved, so that the movements of a UnitOfWork in progress are not counted in it as well.
+    Movements made before the ledger was started are not recorded.
+    """
+    global _state
+    if _started():
+        return
+    rows = _count_rows(LEDGER_FILE)
+    if rows is None:
+        data_access.write_table(pd.DataFrame(columns=LEDGER_COLUMNS), LEDGER_FILE)
+        rows = 0
+    stock = stock_levels(saved=True)
+    data_access.write_table(pd.DataFrame(_snapshot_rows(rows, stock), columns=SNAPSHOT_COLUMNS), SNAPSHOT_FILE)
+    _state = (data_access.table_path(LEDGER_FILE), rows, stock, rows)
+    logging.info(f"{LEDGER_FILE} started with a snapshot of {len(stock)} stock levels.")
+
+
+def _replayed():
+    """
+    Returns the number of rows in the ledger, the stock after them (the latest snapshot plus the movements after it)
+    and the position of the latest snapshot. The result is kept, so the tail is only replayed again if the ledger
+    has been changed in another way than by record() (e.g. by another process, or a UnitOfWork that was discarded).
+    """
+    global _state
+    path = data_access.table_path(LEDGER_FILE)
+    rows = data_access.count_rows(LEDGER_FILE)
+    if _state is not None and _state[:2] == (path, rows):
+        return _state[1:]
+    snapshots = data_access.read_table(SNAPSHOT_FILE)
+    position = int(snapshots['position'].max()) if len(snapshots.index) > 0 else 0
+    latest = snapshots[snapshots['position'] == position]
+    stock = dict(zip(zip(*(latest[col].tolist() for col in KEY)), latest['stock'].tolist()))
+    tail = data_access.read_table(LEDGER_FILE).iloc[position:]
+    for key, delta in tail.groupby(KEY)['delta'].sum().items():
+        stock[key] = stock.get(key, 0) + int(delta)
+    _state = (path, rows, stock, position)
+    return _state[1:]
+
+
+def transfers(plan_id, camp_amounts):
+    """
+    Returns the movements of moving resources from a plan's storage to its camps, given as a dictionary of
+    camp_name: amounts of food, water and first-aid kits (negative amounts move them back to storage).
+    """
+    movements = []
+    for camp_name, amounts in camp_amounts.items():
+        for resource, amount in zip(auto_resources.RESOURCES, amounts):
+            movements += [(plan_id, STORAGE, resource, -int(amount)), (plan_id, camp_name, resource, int(amount))]
+    return movements
+
+
+def record(reason, movements):
+    """
+    Appends movements, given as a list of (plan_id, camp_name, resource, delta), to the ledger with the given reason,
+    and a snapshot if SNAPSHOT_EVERY movements have been added since the last one.
+    Movements of 0 are left out. Called inside the UnitOfWork that saves the change in stock, so both are saved
+    together. Returns the number of movements recorded.
+    """
+    global _state
+    movements = [movement for movement in movements if movement[3] != 0]
+    if not movements:
+        return 0
+    start()
+    rows, stock, position = _replayed()
+    timestamp = _now()
+    data_access.append_rows(LEDGER_FILE, [
+        {'timestamp': timestamp, 'plan_id': plan_id, 'camp_name': camp_name, 'resource': resource,
+         'delta': int(delta), 'reason': reason, 'actor': _actor} for plan_id, camp_name, resource, delta in movements])
+    rows += len(movements)
+    stock = dict(stock)
+    for plan_id, camp_name, resource, delta in movements:
+        stock[(plan_id, camp_name, resource)] = stock.get((plan_id, camp_name, resource), 0) + int(delta)
+    if rows - position >= SNAPSHOT_EVERY:
+        data_access.append_rows(SNAPSHOT_FILE, _snapshot_rows(rows, stock))
+        position = rows
+        logging.debug(f"{SNAPSHOT_FILE} updated")
+    _state = (data_access.table_path(LEDGER_FILE), rows, stock, position)
+    logging.debug(f"{len(movements)} movements recorded in {LEDGER_FILE} ({reason}).")
+    return len(movements)
+
+
+def current_stock():
+    """
+    Returns a DataFrame of the stock of food, water and first-aid kits at each camp and in each plan's storage
+    (camp_name STORAGE) according to the ledger. Camps and storage without any stock are left out.
+    """
+    start()
+    camps = {}
+    for (plan_id, camp_name, resource), amount in _replayed()[1].items():
+        if amount != 0:
+            camps.setdefault((plan_id, camp_name), dict.fromkeys(auto_resources.RESOURCES, 0))[resource] = amount
+    return pd.DataFrame([{'plan_id': plan_id, 'camp_name': camp_name, **amounts}
+                         for (plan_id, camp_name), amounts in camps.items()],
+                        columns=['plan_id', 'camp_name'] + auto_resources.RESOURCES)
+
+
+def check():
+    """
+    Compares the stock according to the ledger with the stock in the tables.
+    Returns a DataFrame of the stock levels that differ (empty if they all match).
+    """
+    start()
+    stock = _replayed()[1]
+    levels = stock_levels()
+    return pd.DataFrame([(*key, stock.get(key, 0), levels.get(key, 0)) for key in sorted(stock.keys() | levels.keys())
+                         if stock.get(key, 0) != levels.get(key, 0)], columns=KEY + ['ledger', 'tables'])
+
+
+def reconcile():
+    """
+    Records each difference between the stock in the tables and the stock according to the ledger (see check())
+    as a movement with the reason CORRECTION, so that the ledger matches the tables again.
+    Called when an admin logs in. Returns the differences.
+    """
+    differences = check()
+    if len(differences.index) > 0:
+        logging.warning(f"{len(differences.index)} stock levels differ from {LEDGER_FILE} and have been corrected.")
+        record(CORRECTION, list(zip(differences['plan_id'], differences['camp_name'], differences['resource'],
+                                    differences['tables'] - differences['ledger'])))
+    return differences
+
+
+def history(**criteria):
+    """Returns the movements matching the given column values, e.g. history(plan_id='London_2023', resource='food')."""
+    return data_access.lookup(LEDGER_FILE, **criteria)
+
+
+def consumption_rates(days=7, now=None):
+    """
+    Returns a DataFrame of the average daily consumption of food, water and first-aid kits at each camp
+    over the given number of days before now (the current time by default).
+    """
+    now = now or datetime.datetime.now()
+    used = history(reason=CONSUMPTION)
+    used = used[pd.to_datetime(used['timestamp'], format=TIME_FORMAT) >= now - datetime.timedelta(days=days)]
+    rates = (-used.groupby(['plan_id', 'camp_name', 'resource'])['delta'].sum() / days).unstack('resource', fill_value=0)
+    return rates.reindex(columns=auto_resources.RESOURCES, fill_value=0).rename_axis(columns=None).reset_index()
@@ -0,0 +1,157 @@
+"""
+Compact column types for the tables kept in memory by data_access.
+Columns with few distinct values (plan_id, camp_name, ...) are stored as categoricals and small integer codes
+(gender, medical_condition, ...) as int8/int16, which takes a fraction of the memory of the types pd.read_csv gives.
+data_access caches tables in this compact form and read_table() returns them in it. A caller that sets a column
+to values its compact type may not hold (e.g. a new camp_name) reads it with the usual type using expand=[column],
+or sets it with set_value().
+
+Run this file to print how much memory each table takes in both forms:
+    python -m progs.schema
+"""
+import pandas as pd, numpy as np
+
+# compact type of each column, by table; other columns keep the type given by pd.read_csv
+SCHEMAS = {
+    'users.csv': {
+        'account_type': 'category', 'active': 'int8', 'deactivation_requested': 'int8', 'gender': 'int8',
+        'plan_id': 'category', 'camp_name': 'category',
+    },
+    'refugees.csv': {
+        'refugee_id': 'int32', 'gender': 'int8', 'plan_id': 'category', 'camp_name': 'category',
+        'medical_condition': 'int8', 'family_members': 'int16', 'remarks': 'category',
+    },
+    'volunteering_times.csv': {
+        'username': 'category', 'plan_id': 'category', 'camp_name': 'category',
+    },
+    'camps.csv': {
+        'plan_id': 'category', 'camp_name': 'category',
+    },
+    'resource_requests.csv': {
+        'plan_id': 'category', 'camp_name': 'category', 'resolved': 'category',
+    },
+    'resource_ledger.csv': {
+        'plan_id': 'category', 'camp_name': 'category', 'resource': 'category', 'reason': 'category', 'actor': 'category',
+    },
+}
+
+
+def _fits(col, dtype):
+    """Returns True if every value of an integer column is in the range of the given integer type."""
+    if len(col.index) == 0 or col.isna().all():
+        return True
+    info = np.iinfo(dtype)
+    return info.min <= col.min() and col.max() <= info.max
+
+
+def compact(df, filename):
+    """
+    Returns a DataFrame of a table with the compact column types.
+    Integer columns with missing values, and columns whose values do not fit the compact type, are left unchanged,
+    so a missing number still reads as NaN.
+    """
+    schema = SCHEMAS.get(filename)
+    if not schema:
+        return df
+    types = {}
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            continue
+        if dtype == 'category':
+            types[col] = dtype
+        elif df[col].dtype.kind in 'iuf' and _fits(df[col], dtype) and not df[col].isna().any():
+            if df[col].dtype.kind != 'f' or (df[col] == df[col].round()).all():
+                types[col] = dtype
+    return df.astype(types)
+
+
+def extend_types(df, new_rows):
+    """
+    Returns df and new_rows (rows parsed from the same csv table) with the same column types, so they can be
+    concatenated without converting df: categories in new_rows that df does not have are added to its categoricals,
+    and the columns of new_rows are converted to the types of df.
+    Returns (df, None) if a value in new_rows does not fit the type of its column (e.g. text in a numeric column).
+    """
+    changed = {}
+    new_columns = {}
+    for col, dtype in df.dtypes.items():
+        new = new_rows[col]
+        if isinstance(dtype, pd.CategoricalDtype):
+            added = [value for value in new.dropna().unique() if value not in dtype.categories]
+            if added:
+                changed[col] = df[col].cat.add_categories(added)
+                dtype = changed[col].dtype
+            new_columns[col] = pd.Categorical(new, dtype=dtype)
+            continue
+        if dtype.kind in 'iuf' and new.dtype.kind not in 'iufb':  # text added to a numeric column
+            return df, None
+        if dtype.kind in 'iu':
+            if new.isna().any():
+                return df, None
+            if not _fits(new, dtype) or \
+                    (new.dtype.kind == 'f' and not (new.dropna() == new.dropna().round()).all()):
+                return df, None
+        new_columns[col] = new.astype(dtype)
+    return (df.assign(**changed) if changed else df), pd.DataFrame(new_columns, index=new_rows.index)
+
+
+def expand(df, filename, columns=None):
+    """
+    Returns a DataFrame of a table with the column types that pd.read_csv gives, undoing compact().
+    If a list of columns is given, only those columns are converted.
+    """
+    schema = SCHEMAS.get(filename)
+    if not schema:
+        return df
+    types = {}
+    for col in schema:
+        if col not in df.columns or (columns is not None and col not in columns):
+            continue
+        dtype = df[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            types[col] = dtype.categories.dtype
+        elif dtype.kind in 'iu':
+            types[col] = 'float64' if df[col].isna().any() else 'int64'
+    return df.astype(types)
+
+
+def set_value(df, filename, rows, col, value):
+    """
+    Sets a column of a table with compact types to value in the given rows, as df.loc[rows, col] = value does.
+    If the compact type cannot hold the value (e.g. a category the column does not have yet, or a number too large
+    for an int8 column), the column is first given the type pd.read_csv gives.
+    """
+    new = value if isinstance(value, pd.Series) else pd.Series([value])
+    dtype = df[col].dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        fits = new.dropna().isin(dtype.categories).all()
+    elif dtype.kind in 'iu':
+        fits = new.dtype.kind in 'iu' and _fits(new, dtype)
+    else:
+        fits = True
+    if not fits:
+        df[col] = expand(df[[col]], filename)[col]
+    df.loc[rows, col] = value
+
+
+def memory_report():
+    """
+    Returns a DataFrame with the number of rows of each table and the memory it takes in bytes
+    with the types given by pd.read_csv and with the compact types.
+    """
+    from progs import data_access  # data_access uses this module to compact the tables it caches
+    rows = []
+    for filename in SCHEMAS:
+        try:
+            df = data_access.read_table(filename)
+        except FileNotFoundError:
+            continue
+        plain = int(expand(df, filename).memory_usage(deep=True).sum())
+        packed = int(df.memory_usage(deep=True).sum())
+        rows.append({'table': filename, 'rows': len(df.index), 'memory': plain, 'compact_memory': packed,
+                     'saving': f"{1 - packed / plain:.0%}" if plain else "0%"})
+    return pd.DataFrame(rows, columns=['table', 'rows', 'memory', 'compact_memory', 'saving'])
+
+
+if __name__ == '__main__':
+    print(memory_report().to_string(index=False))
@@ -1,10 +1,10 @@
-import pandas as pd, os
 import logging
+from progs import data_access
 
 def select_plan():
     """Prompts the admin to select a humanitarian plan."""
     print("\nSelect a humanitarian plan.")
-    plans = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
+    plans = data_access.read_table('humanitarian_plan.csv')
     plans = plans[plans['end_date'].isna()]
     print("Number - Location - Start Date")
     for row in range(len(plans.index)):
@@ -32,7 +32,7 @@ def select_camp(plan_id):
     Prompts the admin to select a camp at this plan.
     """
     print("\nSelect a camp.")
-    camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+    camps = data_access.read_camps(plan_id)
     print("Camp Name - # Volunteers - # Refugees - Refugee Capacity")
     for row in range(len(camps.index)):
         vol_str = " volunteer" if camps['volunteers'].iloc[row] == 1 else " volunteers"
@@ -54,4 +54,4 @@ def select_camp(plan_id):
             print("\nPlease enter a camp number corresponding to a camp listed above.")
             logging.error("Invalid user input.")
             continue
-        return camps['camp_name'].iloc[camp_num-1]
\ No newline at end of file
+        return camps['camp_name'].iloc[camp_num-1]
\ No newline at end of file
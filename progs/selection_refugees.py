@@ -1,10 +1,10 @@
-import pandas as pd, os
 import logging
+from progs import data_access
 
 def select_plan():
     """Prompts the admin to select a humanitarian plan."""
     print("\nSelect a humanitarian plan.")
-    plans = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
+    plans = data_access.read_table('humanitarian_plan.csv')
     plans = plans[plans['end_date'].isna()]
     print("Number - Location - Start Date")
     for row in range(len(plans.index)):
@@ -33,15 +33,14 @@ def select_camp(plan_id):
     Prompts the admin to select a camp at this plan.
     The function checks whether any refugees can be selected at this plan and returns the admin to the previous step if not.
     """
-    refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-    refugees = refugees[refugees['plan_id'] == plan_id]
+    refugees = data_access.lookup('refugees.csv', plan_id=plan_id)
     if len(refugees.index) == 0:
         logging.warning("No refugees to select from.")
         print("\nThere are no refugees at the selected plan. Please try again.")
         return "B"
 
     print("\nSelect a camp.")
-    camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+    camps = data_access.read_camps(plan_id)
     print("Camp Name - # Volunteers - # Refugees - Refugee Capacity")
     for row in range(len(camps.index)):
         vol_str = " volunteer" if camps['volunteers'].iloc[row] == 1 else " volunteers"
@@ -72,8 +71,7 @@ def select_refugee(plan_id, camp_name):
     The function checks whether any refugees can be selected at this camp and returns the admin to the previous step if not.
     The admin is given the option to list all refugees at the camp before entering the refugee ID.
     """
-    refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-    refugees = refugees[(refugees['plan_id'] == plan_id) & (refugees['camp_name'] == camp_name)]
+    refugees = data_access.lookup('refugees.csv', plan_id=plan_id, camp_name=camp_name)
     if len(refugees.index) == 0:
         print("\nThere are no refugees at the selected camp. Please try again.")
         return "B"
@@ -115,8 +113,7 @@ def initial_selection():
     The function checks whether there are any refugees that can be selected and returns the admin to the previous menu if not.
     """
     while True:
-        refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-        if len(refugees.index) == 0:
+        if data_access.count_rows('refugees.csv') == 0:
             logging.warning("No refugees to select from.")
             print("There are currently no refugees at humanitarian plans.")
             return 0
@@ -148,7 +145,8 @@ def initial_selection():
                 break
             try:
                 refugee_id = int(refugee_id)
-                if refugee_id not in refugees['refugee_id'].values:
+                selected = data_access.lookup('refugees.csv', refugee_id=refugee_id)
+                if len(selected.index) == 0:
                     raise ValueError
             except ValueError:
                 print("\nRefugee ID not found. Please enter again.")
@@ -159,7 +157,6 @@ def initial_selection():
         if refugee_id == "B":
             logging.debug("Returning to previous step.")
             continue
-        selected = refugees[refugees['refugee_id'] == refugee_id]
         return selected.iloc[0]['plan_id'], selected.iloc[0]['camp_name'], refugee_id
 
 # for admin methods requiring volunteer to be selected at the start (but no further progress loop)
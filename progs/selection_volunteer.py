@@ -1,11 +1,12 @@
-import pandas as pd, numpy as np, os
+import numpy as np
 import logging
+from progs import data_access
 
 # select plan allowing user to go back to direct username vs plan->camp->volunteer
 def select_plan():
     """Prompts the admin to select a humanitarian plan."""
     print("\nSelect a humanitarian plan.")
-    plans = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
+    plans = data_access.read_table('humanitarian_plan.csv')
     plans = plans[plans['end_date'].isna()]
     print("Number - Location - Start Date")
     for row in range(len(plans.index)):
@@ -36,7 +37,7 @@ def select_camp(plan_id, active):
     noting that volunteers must have a camp to be selected.
     The parameter active (1 or 0) specifies whether the volunteer's account must be active to be selected.
     """
-    users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+    users = data_access.read_table('users.csv')
     if active:
         users = users[(users['account_type'] == "volunteer") & (users['plan_id'] == plan_id) & (users['active'] == 1)
                       & (users['camp_name'].notna())]
@@ -52,7 +53,7 @@ def select_camp(plan_id, active):
         return "B"
 
     print("\nSelect a camp.")
-    camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+    camps = data_access.read_camps(plan_id)
     print("Camp Name - # Volunteers - # Refugees - Refugee Capacity")
     for row in range(len(camps.index)):
         vol_str = " volunteer" if camps['volunteers'].iloc[row] == 1 else " volunteers"
@@ -85,7 +86,7 @@ def select_camp_none(plan_id, active):
     The function checks whether any volunteers can be selected at this plan and returns the admin to the previous step if not.
     The parameter active (1 or 0) specifies whether the volunteer's account must be active to be selected.
     """
-    users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+    users = data_access.read_table('users.csv')
     if active:
         users = users[(users['account_type'] == "volunteer") & (users['plan_id'] == plan_id) & (users['active'] == 1)]
     else:
@@ -99,7 +100,7 @@ def select_camp_none(plan_id, active):
         return "B"
 
     print("\nSelect a camp.")
-    camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+    camps = data_access.read_camps(plan_id)
     print("Camp Name - # Volunteers - # Refugees - Refugee Capacity")
     for row in range(len(camps.index)):
         vol_str = " volunteer" if camps['volunteers'].iloc[row] == 1 else " volunteers"
@@ -136,9 +137,10 @@ def select_volunteer(plan_id, camp_name, active):
     The admin is given the option to list all volunteers at the camp before entering the username.
     The parameter active (1 or 0) specifies whether the volunteer's account must be active to be selected.
     """
-    users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+    users = data_access.read_table('users.csv')
     users = users[(users['account_type'] == "volunteer") & (users['plan_id'] == plan_id)]
     users = users.replace({np.nan: None})
+    users = users.sort_values(by=['username'])  # new accounts are added to the end of users.csv
     if active:
         users = users[users['active'] == 1]
     if camp_name:
@@ -203,7 +205,7 @@ def initial_selection(active, none):
     The parameter none (1 or 0) specifies whether the volunteer must have a camp to be selected (none = 1 means volunteer need not have a camp).
     """
     while True:
-        users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+        users = data_access.read_table('users.csv')
         users = users[users['account_type'] == "volunteer"]
         if active:
             users = users[users['active'] == 1]
@@ -313,4 +315,4 @@ def select_plan_camp_vol(active, none):
             else:
                 progress += 1
 
-    return plan_id, camp_name, username
\ No newline at end of file
+    return plan_id, camp_name, username
\ No newline at end of file
@@ -0,0 +1,466 @@
+"""
+Service layer: the operations behind the admin and volunteer menus, without any input() or print() calls.
+The menus collect and check the user's input, then call these functions to update the tables.
+They can also be called directly to script operations in bulk.
+Each function checks that the operation is possible and raises a ValueError with a message for the user if not,
+before anything is written.
+"""
+import pandas as pd, numpy as np
+import bisect, heapq, logging
+from progs import auto_resources, data_access, id_sequence, schema, supply_status, resource_ledger
+
+# resource columns in the camps tables and the matching storage columns in humanitarian_plan.csv
+RESOURCES = auto_resources.RESOURCES
+STORAGE = auto_resources.STORAGE
+# separates the usernames of the volunteers who made a merged resource request
+REQUESTER_SEPARATOR = ';'
+
+
+class InsufficientCapacity(ValueError):
+    """Raised when the refugees of camps being closed cannot all be moved to the remaining camps."""
+
+
+def _plan_row(plans, plan_id):
+    """Returns a boolean Series selecting the given plan in humanitarian_plan.csv. Raises ValueError if it does not exist."""
+    row = plans['plan_id'] == plan_id
+    if not row.any():
+        raise ValueError(f"Humanitarian plan {plan_id} does not exist.")
+    return row
+
+
+def _camp_row(camps, plan_id, camp_name):
+    """Returns a boolean Series selecting the given camp in a plan's camps table. Raises ValueError if it does not exist."""
+    row = camps['camp_name'] == camp_name
+    if not row.any():
+        raise ValueError(f"{camp_name} does not exist in {plan_id}.")
+    return row
+
+
+def create_refugee(plan_id, camp_name, refugee_name, gender, date_of_birth, medical_condition, family_members,
+                   remarks=None):
+    """
+    Adds a refugee (and their family) to a camp and updates the camp's number of refugees.
+    gender is coded 1-3 and medical_condition 1-7 (see coded_vars.py), date_of_birth is in the format DD-MM-YYYY.
+    Returns the new refugee ID.
+    """
+    if gender not in (1, 2, 3):
+        raise ValueError("Gender must be 1, 2 or 3.")
+    if medical_condition not in range(1, 8):
+        raise ValueError("Medical condition must be an integer from 1 to 7.")
+    if family_members < 1:
+        raise ValueError("Number of family members must be at least 1.")
+    camps = data_access.read_camps(plan_id)
+    chosen = _camp_row(camps, plan_id, camp_name)
+    remaining_cap = int(camps.loc[chosen, 'capacity'].iloc[0] - camps.loc[chosen, 'refugees'].iloc[0])
+    if family_members > remaining_cap:
+        raise ValueError(f"{camp_name} only has space for {remaining_cap} more people.")
+
+    with data_access.UnitOfWork():
+        refugee_id = id_sequence.next_id('refugees.csv')
+        # the new row is appended to the end of refugees.csv instead of rewriting the whole file
+        data_access.append_row('refugees.csv', {
+            'refugee_id': refugee_id, 'refugee_name': refugee_name, 'gender': gender, 'date_of_birth': date_of_birth,
+            'plan_id': plan_id, 'camp_name': camp_name, 'medical_condition': medical_condition,
+            'family_members': family_members, 'remarks': remarks})
+        logging.debug("refugees.csv updated")
+
+        camps.loc[chosen, 'refugees'] += family_members
+        data_access.write_camps(camps, plan_id)
+        logging.debug("camps csv file updated")
+    return refugee_id
+
+
+def create_volunteer(username, password, first_name, last_name, email, phone_number, gender, date_of_birth,
+                     plan_id, camp_name=None):
+    """
+    Registers a volunteer account at a humanitarian plan, and optionally a camp of the plan.
+    If a camp is given, the camp's number of volunteers is updated.
+    """
+    if len(data_access.lookup('users.csv', username=username).index) > 0:
+        raise ValueError(f"Username {username} is already taken.")
+    if camp_name:
+        camps = data_access.read_camps(plan_id)
+        chosen = _camp_row(camps, plan_id, camp_name)
+
+    with data_access.UnitOfWork():
+        # the new row is appended to the end of users.csv instead of rewriting the whole file
+        data_access.append_row('users.csv', {
+            'username': username, 'password': password, 'account_type': 'volunteer', 'active': 1,
+            'deactivation_requested': 0, 'first_name': first_name, 'last_name': last_name, 'email': email,
+            'phone_number': phone_number, 'gender': gender, 'date_of_birth': date_of_birth,
+            'plan_id': plan_id, 'camp_name': camp_name})
+        logging.debug("users.csv updated")
+
+        if camp_name:
+            camps.loc[chosen, 'volunteers'] += 1
+            data_access.write_camps(camps, plan_id)
+            logging.debug("camps csv file updated")
+
+
+def allocate(plan_id, camp_name, food=0, water=0, firstaid_kits=0):
+    """Moves the given amounts of food packets, water portions and first-aid kits from the plan's storage to a camp."""
+    amounts = np.array([food, water, firstaid_kits])
+    if (amounts < 0).any():
+        raise ValueError("Amounts to allocate cannot be negative.")
+    plans = data_access.read_table('humanitarian_plan.csv')
+    plan_row = _plan_row(plans, plan_id)
+    camps = data_access.read_camps(plan_id)
+    chosen = _camp_row(camps, plan_id, camp_name)
+    if (plans.loc[plan_row, STORAGE].iloc[0].to_numpy() < amounts).any():
+        raise ValueError("The amount entered exceeds the amount available in storage.")
+
+    with data_access.UnitOfWork():
+        plans.loc[plan_row, STORAGE] -= amounts
+        camps.loc[chosen, RESOURCES] += amounts
+        data_access.write_camps(camps, plan_id)
+        data_access.write_table(plans, 'humanitarian_plan.csv')
+        resource_ledger.record(resource_ledger.ALLOCATION, resource_ledger.transfers(plan_id, {camp_name: amounts}))
+    logging.debug(f"Allocated {food} food packets, {water} water portions and {firstaid_kits} first-aid kits "
+                  f"to {plan_id}, {camp_name}.")
+
+
+def top_up_needed(plan_id, camp_names=None, days=7):
+    """
+    Returns a DataFrame with the amount of each resource needed to give the camps (all camps of the plan by default)
+    the given number of days of supplies, one row per camp. Camps that already have enough need 0.
+    """
+    camps = data_access.read_camps(plan_id)
+    if camp_names is not None:
+        camps = camps[camps['camp_name'].isin(camp_names)]
+    index = pd.MultiIndex.from_product([[plan_id], camps['camp_name']])
+    kits_per_day = auto_resources.med_demand().reindex(index, fill_value=0).to_numpy()
+    refugees = camps['refugees'].to_numpy()
+    daily = np.column_stack([refugees, refugees, kits_per_day])
+    needed = np.clip(daily * days - camps[RESOURCES].to_numpy(), 0, None)
+    return pd.DataFrame(needed, columns=RESOURCES, index=camps['camp_name'].to_numpy())
+
+
+def top_up(plan_id, camp_names=None, days=7):
+    """
+    Allocates from storage the amounts returned by top_up_needed(), writing each table once.
+    Returns the amounts allocated to each camp.
+    """
+    needed = top_up_needed(plan_id, camp_names, days)
+    plans = data_access.read_table('humanitarian_plan.csv')
+    plan_row = _plan_row(plans, plan_id)
+    total = needed.to_numpy().sum(axis=0)
+    if (plans.loc[plan_row, STORAGE].iloc[0].to_numpy() < total).any():
+        raise ValueError("Resources insufficient, please enter manually or request new resources.")
+
+    camps = data_access.read_camps(plan_id)
+    chosen = camps['camp_name'].isin(needed.index)
+    camps.loc[chosen, RESOURCES] += needed.loc[camps.loc[chosen, 'camp_name']].to_numpy()
+    with data_access.UnitOfWork():
+        plans.loc[plan_row, STORAGE] -= total
+        data_access.write_camps(camps, plan_id)
+        data_access.write_table(plans, 'humanitarian_plan.csv')
+        resource_ledger.record(resource_ledger.TOP_UP, resource_ledger.transfers(
+            plan_id, dict(zip(needed.index, needed.to_numpy()))))
+    logging.debug(f"Topped up {len(needed.index)} camps of {plan_id} to {days} days of supplies.")
+    return needed
+
+
+def record_consumption(plan_id, camp_name, food=0, water=0, firstaid_kits=0):
+    """Records the consumption of food packets, water portions and first-aid kits at a camp."""
+    amounts = np.array([food, water, firstaid_kits])
+    if (amounts < 0).any():
+        raise ValueError("Amounts consumed cannot be negative.")
+    camps = data_access.read_camps(plan_id)
+    chosen = _camp_row(camps, plan_id, camp_name)
+    if (camps.loc[chosen, RESOURCES].iloc[0].to_numpy() < amounts).any():
+        raise ValueError("Amount consumed exceeds the current supply.")
+    camps.loc[chosen, RESOURCES] -= amounts
+    with data_access.UnitOfWork():
+        data_access.write_camps(camps, plan_id)
+        resource_ledger.record(resource_ledger.CONSUMPTION, [(plan_id, camp_name, resource, -int(amount))
+                                                             for resource, amount in zip(RESOURCES, amounts)])
+    logging.debug("updated camps csv file")
+
+
+def open_camps(plan_id, n):
+    """Adds n camps to a plan, with 0 refugees, volunteers, capacity and resources. Returns the updated camps."""
+    plans = data_access.read_table('humanitarian_plan.csv')
+    plan_row = _plan_row(plans, plan_id)
+    camps = data_access.read_camps(plan_id)
+    num_camps = len(camps.index)
+    new_camps = pd.DataFrame({'camp_name': [f"Camp {num_camps + i}" for i in range(1, n + 1)]})
+    for col in camps.columns[1:]:
+        new_camps[col] = 0
+    camps = pd.concat([camps, new_camps], ignore_index=True)
+    with data_access.UnitOfWork():
+        plans.loc[plan_row, 'number_of_camps'] = num_camps + n
+        data_access.write_camps(camps, plan_id)
+        data_access.write_table(plans, 'humanitarian_plan.csv')
+    logging.debug(f"{n} camps opened in {plan_id}.")
+    return camps
+
+
+def _worst_fit(sizes, order, remaining_capacity):
+    """
+    Places the families (sizes, in the given order) each in the camp with the most space left, kept in a max-heap.
+    Returns an array of the new camp of each family, or None if a family does not fit in any camp.
+    """
+    heap = [(-space, camp) for camp, space in remaining_capacity.items()]
+    heapq.heapify(heap)
+    new_camps = np.empty(len(order), dtype=object)
+    for i in order:
+        family = sizes[i]
+        if not heap or -heap[0][0] < family:
+            return None
+        space, camp = heapq.heappop(heap)
+        new_camps[i] = camp
+        heapq.heappush(heap, (space + family, camp))
+    return new_camps
+
+
+def _best_fit(sizes, order, remaining_capacity):
+    """
+    Places the families (sizes, in the given order) each in the camp with the least space left that fits them,
+    kept in a sorted list. Returns an array of the new camp of each family, or None if a family does not fit in any camp.
+    """
+    spaces = sorted((space, camp) for camp, space in remaining_capacity.items())
+    new_camps = np.empty(len(order), dtype=object)
+    for i in order:
+        family = sizes[i]
+        # (family,) sorts before every (family, camp), so this is the first camp with enough space
+        j = bisect.bisect_left(spaces, (family,))
+        if j == len(spaces):
+            return None
+        space, camp = spaces.pop(j)
+        new_camps[i] = camp
+        bisect.insort(spaces, (space - family, camp))
+    return new_camps
+
+
+def plan_reallocation(family_sizes, remaining_capacity):
+    """
+    Plans where to move refugee families, given a Series of family sizes and a dictionary of the remaining
+    capacity of each open camp. The largest families are placed first, each in the camp with the most space left,
+    so the families are spread evenly. That can leave no camp big enough for a later family when another placement
+    would fit them all, so if it fails the families are placed again, each in the camp with the least space left
+    that fits them (best-fit decreasing), which keeps the large spaces for the large families.
+    Neither finds a placement for every set of families that could fit, but best-fit decreasing rarely misses one.
+    Returns a Series of the new camp of each family, with the same index as family_sizes,
+    or None if both fail.
+    """
+    sizes = family_sizes.to_numpy(dtype=int)
+    order = np.argsort(-sizes, kind='stable')
+    new_camps = _worst_fit(sizes, order, remaining_capacity)
+    if new_camps is None:
+        new_camps = _best_fit(sizes, order, remaining_capacity)
+        if new_camps is None:
+            return None
+    return pd.Series(new_camps, index=family_sizes.index, dtype=object)
+
+
+def close_camps(plan_id, n, reallocate=True):
+    """
+    Closes the last n camps of a plan. Volunteers at these camps are disaffiliated from their camp
+    and their volunteering sessions at these camps are removed.
+    If reallocate is True, the refugee families are moved to the open camps as planned by plan_reallocation() and the
+    resources of the closed camps are moved back to storage. Raises InsufficientCapacity if the families cannot all be
+    moved.
+    Otherwise, the refugee profiles and resources of the closed camps are deleted.
+    Returns a dictionary of each closed camp and the (refugee_id, new_camp) of the families moved from it.
+    """
+    plans = data_access.read_table('humanitarian_plan.csv')
+    plan_row = _plan_row(plans, plan_id)
+    camps = data_access.read_camps(plan_id)
+    num_camps = len(camps.index)
+    if n not in range(1, num_camps):
+        raise ValueError(f"The number of camps to close must be from 1 to {num_camps - 1}.")
+    closed_camps = [f'Camp {num_camps - d}' for d in range(n)][::-1]
+    closing = camps['camp_name'].isin(closed_camps)
+    refugees = data_access.read_table('refugees.csv')
+    users = data_access.read_table('users.csv')
+    vol_times = data_access.read_table('volunteering_times.csv')
+    displaced = (refugees['plan_id'] == plan_id) & refugees['camp_name'].isin(closed_camps)
+
+    moves = {camp: [] for camp in closed_camps}
+    if reallocate:
+        open_camps_df = camps[~closing]
+        families = refugees.loc[displaced, ['refugee_id', 'camp_name', 'family_members']]
+        if families['family_members'].sum() > (open_camps_df['capacity'] - open_camps_df['refugees']).sum():
+            raise InsufficientCapacity("Total number of displaced refugees is more than the total remaining capacity of the "
+                             "remaining camps.\nPlease edit the capacity of the remaining camps before closing camps.")
+        new_camps = plan_reallocation(families['family_members'],
+                                      dict(zip(open_camps_df['camp_name'],
+                                               open_camps_df['capacity'] - open_camps_df['refugees'])))
+        if new_camps is None:
+            raise InsufficientCapacity("The capacity of the remaining camps is not sufficient to host one or more of "
+                             "the families belonging to camps being closed down.\nPlease increase the capacity "
+                             "of remaining camps or close down fewer camps.")
+        # apply the whole plan at once
+        schema.set_value(refugees, 'refugees.csv', new_camps.index, 'camp_name', new_camps)
+        arrivals = families['family_members'].groupby(new_camps).sum()
+        camps['refugees'] += camps['camp_name'].map(arrivals).fillna(0).astype(int)
+        for refugee_id, old_camp, new_camp in zip(families['refugee_id'], families['camp_name'], new_camps):
+            moves[old_camp].append((int(refugee_id), new_camp))
+        # resources of the closed camps are moved back to storage
+        plans.loc[plan_row, STORAGE] += camps.loc[closing, RESOURCES].to_numpy().sum(axis=0)
+    else:
+        refugees = refugees[~displaced]
+
+    # resources of the closed camps, moved back to storage or removed with them
+    closed_stock = dict(zip(camps.loc[closing, 'camp_name'], camps.loc[closing, RESOURCES].fillna(0).to_numpy(dtype=int)))
+    if reallocate:
+        movements = resource_ledger.transfers(plan_id, {camp: -amounts for camp, amounts in closed_stock.items()})
+    else:
+        movements = [(plan_id, camp, resource, -int(amount)) for camp, amounts in closed_stock.items()
+                     for resource, amount in zip(RESOURCES, amounts)]
+
+    users.loc[(users['plan_id'] == plan_id) & users['camp_name'].isin(closed_camps), 'camp_name'] = None
+    vol_times = vol_times[~((vol_times['plan_id'] == plan_id) & vol_times['camp_name'].isin(closed_camps))]
+    # families are only moved or removed within the plan
+    plan_camps = [(plan_id, camp_name) for camp_name in camps['camp_name']]
+    camps = camps[~closing]
+    plans.loc[plan_row, 'number_of_camps'] = num_camps - n
+
+    with data_access.UnitOfWork():
+        data_access.write_table(refugees, 'refugees.csv', camps=plan_camps)
+        data_access.write_table(users, 'users.csv')
+        data_access.write_table(vol_times, 'volunteering_times.csv')
+        data_access.write_camps(camps, plan_id)
+        data_access.write_table(plans, 'humanitarian_plan.csv')
+        resource_ledger.record(resource_ledger.CAMP_CLOSURE, movements)
+    logging.debug(f"{closed_camps} closed in {plan_id}. All csv files updated.")
+    return moves
+
+
+def _requesters(usernames):
+    """Returns the usernames in a list of requesters columns, each once and in order, joined with REQUESTER_SEPARATOR."""
+    names = [name for usernames_str in usernames for name in str(usernames_str).split(REQUESTER_SEPARATOR)]
+    return REQUESTER_SEPARATOR.join(dict.fromkeys(names))
+
+
+def request_resources(username, plan_id, camp_name, food=0, water=0, firstaid_kits=0):
+    """
+    Records a volunteer's request for resources for their camp. Each camp has at most one pending request:
+    if there is one already, the amounts are added to it and the volunteer to its requesters
+    (the username column lists them, separated by REQUESTER_SEPARATOR). Otherwise a new request is appended.
+    """
+    amounts = np.array([food, water, firstaid_kits])
+    if (amounts < 0).any():
+        raise ValueError("Amounts requested cannot be negative.")
+    if (amounts == 0).all():
+        raise ValueError("At least one resource must be requested.")
+    new = {'username': username, 'plan_id': plan_id, 'camp_name': camp_name,
+           'food': food, 'water': water, 'firstaid_kits': firstaid_kits, 'resolved': 'no'}
+    try:
+        requests = data_access.read_table('resource_requests.csv')
+    except FileNotFoundError:
+        data_access.write_table(pd.DataFrame([new]), 'resource_requests.csv')
+        logging.info("resource_requests.csv not found. New csv file created.")
+        return
+    pending = requests.index[(requests['plan_id'] == plan_id) & (requests['camp_name'] == camp_name)
+                             & (requests['resolved'] == 'no')]
+    if len(pending) == 0:
+        # the request is appended to the end of resource_requests.csv instead of rewriting the whole file
+        data_access.append_row('resource_requests.csv', new)
+    else:
+        row = pending[0]
+        requests.loc[row, RESOURCES] += amounts
+        requests.at[row, 'username'] = _requesters([requests.at[row, 'username'], username])
+        data_access.write_table(requests, 'resource_requests.csv')
+    logging.debug("resource_requests.csv updated")
+
+
+def merge_pending_requests():
+    """
+    Migrates resource_requests.csv to one pending request per camp, merging the pending requests of each camp
+    as request_resources() does. Requests saved with resolved=0 by older versions are marked as pending ('no').
+    The table is only rewritten if anything changes. Returns the number of requests removed by merging.
+    """
+    requests = data_access.read_table('resource_requests.csv')
+    resolved = requests['resolved'].astype(str)
+    resolved = resolved.where(resolved == 'yes', 'no')
+    pending = requests[resolved == 'no']
+    duplicates = pending.duplicated(subset=['plan_id', 'camp_name'])
+    if not duplicates.any() and (resolved == requests['resolved']).all():
+        return 0
+    merged = pending.groupby(['plan_id', 'camp_name'], sort=False).agg(
+        username=('username', _requesters), food=('food', 'sum'), water=('water', 'sum'),
+        firstaid_kits=('firstaid_kits', 'sum')).reset_index().assign(resolved='no')
+    requests = pd.concat([requests[resolved == 'yes'], merged[requests.columns]], ignore_index=True)
+    data_access.write_table(requests, 'resource_requests.csv')
+    logging.info(f"{int(duplicates.sum())} pending resource requests merged into the request of their camp.")
+    return int(duplicates.sum())
+
+
+def pending_requests():
+    """
+    Returns the unresolved resource requests, most urgent first, with the days of supplies left at the requesting camp
+    (the lowest of its food, water and first-aid kit days) and the first-aid kits the camp needs per day.
+    The requests are taken from a priority queue keyed on (days left, -kits per day), so among camps with
+    the same days left, those with the greatest medical demand come first.
+    The index of the DataFrame is the row of each request in resource_requests.csv.
+    """
+    requests = data_access.read_table('resource_requests.csv')
+    pending = requests[requests['resolved'] == 'no']
+    status = supply_status.read_status().set_index(['plan_id', 'camp_name'])
+    index = pd.MultiIndex.from_frame(pending[['plan_id', 'camp_name']])
+    # camps missing from the status table (e.g. without refugees) are the least urgent
+    days_left = status[['food_days', 'water_days', 'firstaid_days']].min(axis=1).reindex(index, fill_value=np.inf)
+    kits_per_day = auto_resources.med_demand().reindex(index, fill_value=0)
+    heap = list(zip(days_left.to_numpy(), -kits_per_day.to_numpy(), pending.index))
+    heapq.heapify(heap)
+    order = [heapq.heappop(heap)[2] for _ in range(len(heap))]
+    pending = pending.assign(days_left=days_left.to_numpy(), kits_per_day=kits_per_day.to_numpy())
+    return pending.loc[order]
+
+
+def resolve_requests(approve=(), decline=()):
+    """
+    Approves and declines pending resource requests (given as rows of resource_requests.csv) in one go.
+    The amounts of each approved request move from its plan's storage to its camp, and the requests approved
+    or declined are marked as resolved. Requests are approved in the order given; one that needs more than is left
+    in its plan's storage, or whose camp no longer exists, is left unresolved.
+    humanitarian_plan.csv, camps.csv and resource_requests.csv are each written once.
+    Returns the lists of the rows approved, declined and left unresolved.
+    """
+    requests = data_access.read_table('resource_requests.csv')
+    pending = set(requests.index[requests['resolved'] == 'no'])
+    unknown = [row for row in list(approve) + list(decline) if row not in pending]
+    if unknown:
+        raise ValueError(f"Rows {', '.join(map(str, unknown))} are not pending resource requests.")
+    plans = data_access.read_table('humanitarian_plan.csv')
+    camps = data_access.read_all_camps()
+    storage = dict(zip(plans['plan_id'], plans[STORAGE].to_numpy()))
+    camp_rows = {key: i for i, key in enumerate(zip(camps['plan_id'], camps['camp_name']))}
+    added = np.zeros((len(camps.index), len(RESOURCES)), dtype=int)
+
+    approved, skipped, movements = [], [], []
+    for row in approve:
+        plan_id, camp_name = requests.at[row, 'plan_id'], requests.at[row, 'camp_name']
+        amounts = requests.loc[row, RESOURCES].to_numpy(dtype=int)
+        if (plan_id, camp_name) not in camp_rows or (storage[plan_id] < amounts).any():
+            skipped.append(row)
+            continue
+        storage[plan_id] = storage[plan_id] - amounts
+        added[camp_rows[(plan_id, camp_name)]] += amounts
+        movements += resource_ledger.transfers(plan_id, {camp_name: amounts})
+        approved.append(row)
+    declined = list(decline)
+
+    with data_access.UnitOfWork():
+        if approved:
+            plans[STORAGE] = np.array([storage[plan_id] for plan_id in plans['plan_id']])
+            camps[RESOURCES] += added
+            data_access.write_table(plans, 'humanitarian_plan.csv')
+            data_access.write_table(camps, data_access.CAMPS_FILE,
+                                    camps=[key for key, row in camp_rows.items() if added[row].any()])
+            resource_ledger.record(resource_ledger.REQUEST, movements)
+        if approved or declined:
+            schema.set_value(requests, 'resource_requests.csv', approved + declined, 'resolved', 'yes')
+            data_access.write_table(requests, 'resource_requests.csv')
+    logging.debug(f"{len(approved)} resource requests approved, {len(declined)} declined "
+                  f"and {len(skipped)} left unresolved.")
+    return approved, declined, skipped
+
+
+def auto_approve():
+    """
+    Approves the pending resource requests in order of urgency (see pending_requests()), as long as each plan's storage
+    has enough for the whole request. Returns the lists of the rows approved, declined (none) and left unresolved.
+    """
+    return resolve_requests(approve=pending_requests().index.tolist())
@@ -0,0 +1,217 @@
+"""
+SQLite storage backend, used instead of the csv files when the HMS_BACKEND environment variable is set to 'sqlite'.
+Each csv table is stored as a table of the same name (e.g. users.csv -> users) and the camps of every humanitarian plan
+are stored in a single camps table with a plan_id column. Indexes on username, refugee_id and (plan_id, camp_name)
+allow single rows to be looked up and updated without reading the whole table.
+
+Run this file to import the csv files in the data directory into a new database:
+    python -m progs.sqlite_backend [data_dir] [db_path]
+"""
+import pandas as pd, os, sys
+import sqlite3
+import logging
+
+# columns of each table, in the same order as the csv files
+TABLES = {
+    'users': {
+        'username': 'TEXT PRIMARY KEY', 'password': 'TEXT', 'account_type': 'TEXT', 'active': 'INTEGER',
+        'deactivation_requested': 'INTEGER', 'first_name': 'TEXT', 'last_name': 'TEXT', 'email': 'TEXT',
+        'phone_number': 'TEXT', 'gender': 'INTEGER', 'date_of_birth': 'TEXT', 'plan_id': 'TEXT', 'camp_name': 'TEXT'
+    },
+    'refugees': {
+        'refugee_id': 'INTEGER PRIMARY KEY', 'refugee_name': 'TEXT', 'gender': 'INTEGER', 'date_of_birth': 'TEXT',
+        'plan_id': 'TEXT', 'camp_name': 'TEXT', 'medical_condition': 'INTEGER', 'family_members': 'INTEGER',
+        'remarks': 'TEXT'
+    },
+    'volunteering_times': {
+        'username': 'TEXT', 'plan_id': 'TEXT', 'camp_name': 'TEXT', 'start_time': 'TEXT', 'end_time': 'TEXT'
+    },
+    'resource_requests': {
+        'username': 'TEXT', 'plan_id': 'TEXT', 'camp_name': 'TEXT', 'food': 'INTEGER', 'water': 'INTEGER',
+        'firstaid_kits': 'INTEGER', 'resolved': 'TEXT'
+    },
+    'humanitarian_plan': {
+        'plan_id': 'TEXT PRIMARY KEY', 'description': 'TEXT', 'location': 'TEXT', 'start_date': 'TEXT',
+        'number_of_camps': 'INTEGER', 'end_date': 'TEXT', 'food_storage': 'INTEGER', 'water_storage': 'INTEGER',
+        'firstaid_kits_storage': 'INTEGER'
+    },
+    'id_sequences': {'table_name': 'TEXT PRIMARY KEY', 'next_id': 'INTEGER'},
+    'camps': {
+        'plan_id': 'TEXT', 'camp_name': 'TEXT', 'volunteers': 'INTEGER', 'refugees': 'INTEGER',
+        'capacity': 'INTEGER', 'food': 'INTEGER', 'water': 'INTEGER', 'firstaid_kits': 'INTEGER'
+    },
+    'resource_ledger': {
+        'timestamp': 'TEXT', 'plan_id': 'TEXT', 'camp_name': 'TEXT', 'resource': 'TEXT', 'delta': 'INTEGER',
+        'reason': 'TEXT', 'actor': 'TEXT'
+    },
+    'resource_snapshots': {
+        'position': 'INTEGER', 'timestamp': 'TEXT', 'plan_id': 'TEXT', 'camp_name': 'TEXT', 'resource': 'TEXT',
+        'stock': 'INTEGER'
+    },
+}
+
+INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS camps_plan_camp ON camps (plan_id, camp_name)",
+    "CREATE INDEX IF NOT EXISTS users_plan_camp ON users (plan_id, camp_name)",
+    "CREATE INDEX IF NOT EXISTS refugees_plan_camp ON refugees (plan_id, camp_name)",
+    "CREATE INDEX IF NOT EXISTS volunteering_times_username ON volunteering_times (username)",
+    "CREATE INDEX IF NOT EXISTS volunteering_times_plan_camp ON volunteering_times (plan_id, camp_name)",
+    "CREATE INDEX IF NOT EXISTS resource_requests_plan_camp ON resource_requests (plan_id, camp_name)",
+    "CREATE INDEX IF NOT EXISTS resource_ledger_plan_camp ON resource_ledger (plan_id, camp_name)",
+    "CREATE INDEX IF NOT EXISTS resource_snapshots_position ON resource_snapshots (position)",
+]
+
+# columns of the camps of a single plan, as returned by data_access.read_camps() (the camps table without plan_id)
+CAMP_COLUMNS = list(TABLES['camps'])[1:]
+
+
+def is_stored(filename):
+    """Returns True if the csv file with the given name is stored in the database (reference data such as worldcities.csv is not)."""
+    return filename[:-4] in TABLES
+
+
+def table_name(filename):
+    """Returns the name of the table that stores the csv file with the given name, e.g. 'users.csv' -> 'users'."""
+    name = filename[:-4] if filename.endswith('.csv') else filename
+    if name not in TABLES:
+        raise ValueError(f"No table for {filename}.")
+    return name
+
+
+def connect(db_path):
+    """Opens the database at db_path, creating the tables and indexes if they do not exist yet."""
+    conn = sqlite3.connect(db_path)
+    for table, columns in TABLES.items():
+        cols = ", ".join(f'"{col}" {col_type}' for col, col_type in columns.items())
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({cols})")
+    for index in INDEXES:
+        conn.execute(index)
+    conn.commit()
+    return conn
+
+
+def _where(criteria):
+    """Returns the WHERE clause and parameters matching every column in criteria to its value."""
+    if not criteria:
+        return "", []
+    clause = " AND ".join(f'"{col}" = ?' for col in criteria)
+    return " WHERE " + clause, [_to_sql(value) for value in criteria.values()]
+
+
+def _to_sql(value):
+    """Converts NumPy scalars and NaN to values that sqlite3 can store."""
+    if pd.isna(value):
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def read_table(conn, filename, **criteria):
+    """Returns a DataFrame of the rows of a table, optionally only those matching the given column values."""
+    table = table_name(filename)
+    where, params = _where(criteria)
+    return pd.read_sql_query(f"SELECT * FROM {table}" + where, conn, params=params)
+
+
+def _insert(conn, table, df):
+    """Inserts the rows of a DataFrame into a table, without committing."""
+    if len(df.index) == 0:
+        return
+    cols = ", ".join(f'"{col}"' for col in df.columns)
+    placeholders = ", ".join("?" for _ in df.columns)
+    conn.executemany(f"INSERT INTO {table} ({cols}) VALUES ({placeholders})",
+                     [[_to_sql(v) for v in row] for row in df.itertuples(index=False)])
+
+
+def _replace(conn, df, filename):
+    """Replaces the rows of a table, without committing."""
+    table = table_name(filename)
+    conn.execute(f"DELETE FROM {table}")
+    _insert(conn, table, df)
+
+
+def write_table(conn, df, filename):
+    """Replaces the contents of a table with the rows of a DataFrame."""
+    with conn:
+        _replace(conn, df, filename)
+
+
+def write_tables(conn, tables, appends=None):
+    """
+    Replaces the rows of several tables and inserts rows into others in a single transaction,
+    so that either all or none of the changes are made.
+    tables is a dictionary of csv file name: DataFrame.
+    appends is a dictionary of csv file name: list of rows to insert, each a dictionary of column values.
+    """
+    with conn:
+        for filename, df in tables.items():
+            _replace(conn, df, filename)
+        for filename, rows in (appends or {}).items():
+            _insert(conn, table_name(filename), pd.DataFrame(rows))
+
+
+def write_camps(conn, camps, plan_id):
+    """Replaces the camps of the given humanitarian plan."""
+    with conn:
+        conn.execute("DELETE FROM camps WHERE plan_id = ?", [plan_id])
+        _insert(conn, 'camps', camps.assign(plan_id=plan_id)[list(TABLES['camps'])])
+
+
+def count_rows(conn, filename):
+    """Returns the number of rows in the table of a csv file."""
+    return conn.execute(f'SELECT COUNT(*) FROM "{table_name(filename)}"').fetchone()[0]
+
+
+def append_rows(conn, filename, rows):
+    """Inserts rows, given as a list of dictionaries of column values, into a table."""
+    with conn:
+        _insert(conn, table_name(filename), pd.DataFrame(rows))
+
+
+def update_rows(conn, filename, values, **criteria):
+    """Sets the given column values in the rows of a table matching the criteria. Returns the number of rows updated."""
+    table = table_name(filename)
+    assignments = ", ".join(f'"{col}" = ?' for col in values)
+    where, params = _where(criteria)
+    with conn:
+        cur = conn.execute(f"UPDATE {table} SET {assignments}" + where,
+                           [_to_sql(v) for v in values.values()] + params)
+    return cur.rowcount
+
+
+def import_csv_dir(conn, data_dir):
+    """
+    Imports the csv files in data_dir into the database, replacing any rows already in its tables.
+    If data_dir has no camps.csv (older versions kept one camps csv file per plan),
+    the camps csv file of every plan listed in humanitarian_plan.csv is imported into the camps table instead.
+    """
+    for table in TABLES:
+        path = os.path.join(data_dir, table + '.csv')
+        if not os.path.exists(path):
+            if table != 'camps':
+                logging.warning(f"{path} not found, {table} table left empty.")
+            continue
+        df = pd.read_csv(path, dtype={'password': str} if table == 'users' else None)
+        write_table(conn, df, table + '.csv')
+        logging.debug(f"{table}.csv imported.")
+    if os.path.exists(os.path.join(data_dir, 'camps.csv')):
+        return
+
+    with conn:
+        conn.execute("DELETE FROM camps")
+    plans = read_table(conn, 'humanitarian_plan.csv')
+    for plan_id in plans['plan_id']:
+        path = os.path.join(data_dir, plan_id + '.csv')
+        if not os.path.exists(path):
+            logging.warning(f"{path} not found, no camps imported for {plan_id}.")
+            continue
+        write_camps(conn, pd.read_csv(path), plan_id)
+        logging.debug(f"{plan_id}.csv imported.")
+
+
+if __name__ == '__main__':
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else 'data'
+    db_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(data_dir, 'hms.db')
+    import_csv_dir(connect(db_path), data_dir)
+    print(f"Imported {data_dir} into {db_path}.")
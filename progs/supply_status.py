@@ -0,0 +1,107 @@
+"""
+Keeps a table of how many days of supplies each camp of each ongoing humanitarian plan has left (supply_status.csv).
+data_access calls table_written() after every write with the camps whose rows have changed, and only the rows
+of those camps are recalculated (all of them if a table is written without its changed camps).
+Which plans are ongoing is checked whenever the table is refreshed, so ending a plan drops the rows of its camps.
+The admin's low-resources warning then only has to read this one table instead of every camp and refugee.
+"""
+import pandas as pd, numpy as np
+import logging
+from progs import auto_resources, data_access, resource_ledger
+
+STATUS_FILE = 'supply_status.csv'
+COLUMNS = ['plan_id', 'camp_name', 'food_days', 'water_days', 'firstaid_days', 'low']
+# a camp has low resources if it has less than 2 days' worth of food, water or first-aid kits
+LOW_DAYS = 2
+# tables whose changes do not affect the days of supplies at any camp
+UNRELATED_TABLES = ('users.csv', 'volunteering_times.csv', 'resource_requests.csv', 'worldcities.csv', 'id_sequences.csv',
+                    STATUS_FILE, resource_ledger.LEDGER_FILE, resource_ledger.SNAPSHOT_FILE)
+
+
+def camp_status(camps, demand):
+    """
+    Returns a DataFrame with the number of days of food, water and first-aid kits left at each camp,
+    and whether the camp has low resources. camps has the columns of camps.csv (including plan_id) and
+    demand is the result of auto_resources.med_demand(). Camps without any refugees have an infinite number of days left.
+    """
+    # looked up in a dictionary, since reindexing on the categorical plan and camp levels is slower for a few camps
+    kits = dict(zip(demand.index, demand.tolist()))
+    kits_per_day = np.array([kits.get(key, 0) for key in zip(camps['plan_id'].tolist(), camps['camp_name'].tolist())],
+                            dtype=int)
+    # as floats, since the columns of a camps.csv that was empty when read are not numeric
+    refugees = camps['refugees'].to_numpy(dtype=float)
+    daily = np.column_stack([refugees, refugees, kits_per_day])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days = np.where(daily > 0, camps[auto_resources.RESOURCES].to_numpy(dtype=float) / daily, np.inf)
+    status = pd.DataFrame(days.round(2), columns=['food_days', 'water_days', 'firstaid_days'])
+    status.insert(0, 'plan_id', camps['plan_id'].to_numpy())
+    status.insert(1, 'camp_name', camps['camp_name'].to_numpy())
+    status['low'] = (days < LOW_DAYS).any(axis=1).astype(int)
+    return status
+
+
+def refresh(changed=None):
+    """
+    Recalculates the days of supplies at the given camps (a set of (plan_id, camp_name)), or at every camp
+    if changed is None, and saves the table. Camps of ongoing plans without a row are also calculated,
+    and the rows of camps that have been removed or whose plan has ended are dropped.
+    The table is not saved if none of its rows change (e.g. when only the number of volunteers at a camp changes).
+    """
+    plans = data_access.read_table('humanitarian_plan.csv')
+    ongoing = plans.loc[plans['end_date'].isna(), 'plan_id'].tolist()
+    camps = data_access.read_all_camps()
+    camps = camps[camps['plan_id'].isin(ongoing)]
+    # keep the rows in the same order as the plans in humanitarian_plan.csv
+    camps = camps.sort_values(by='plan_id', key=lambda col: pd.Index(ongoing).get_indexer(col), kind='stable')
+    try:
+        status = data_access.read_table(STATUS_FILE) if changed is not None else None
+    except FileNotFoundError:
+        status = None
+    if status is None:
+        status = camp_status(camps, auto_resources.med_demand())
+    else:
+        rows = dict(zip(zip(status['plan_id'].tolist(), status['camp_name'].tolist()), range(len(status.index))))
+        keys = list(zip(camps['plan_id'].tolist(), camps['camp_name'].tolist()))
+        stale = np.array([key in changed or key not in rows for key in keys], dtype=bool)
+        if not stale.any() and len(rows) == len(keys):
+            return
+        frames = [status.iloc[[rows[key] for key, is_stale in zip(keys, stale) if not is_stale]]]
+        if stale.any():
+            stale_camps = camps[stale]
+            # only the families of the plans of the stale camps are read
+            demand = auto_resources.med_demand(stale_camps['plan_id'].unique().tolist())
+            frames.append(camp_status(stale_camps, demand))
+        updated = pd.concat(frames, ignore_index=True)
+        # put the recalculated rows back in the order of the camps
+        updated = updated.iloc[np.argsort(np.concatenate([np.flatnonzero(~stale), np.flatnonzero(stale)]))]
+        if len(updated.index) == len(status.index) and (updated.to_numpy() == status.to_numpy()).all():
+            return
+        status = updated
+    data_access.write_table(status, STATUS_FILE)
+    logging.debug(f"{STATUS_FILE} updated")
+
+
+def table_written(*filenames, camps=None):
+    """
+    Called by data_access after tables are written, with a dictionary of file name: (plan_id, camp_name) of the camps
+    whose rows have changed, for the tables where they are known. Refreshes the rows of those camps,
+    or the whole table if a table that affects it was written without them.
+    """
+    camps = camps or {}
+    related = [filename for filename in filenames if filename not in UNRELATED_TABLES]
+    if not related:
+        return
+    # which plans are ongoing is checked on every refresh, so humanitarian_plan.csv needs no camps
+    if any(filename not in camps for filename in related if filename != 'humanitarian_plan.csv'):
+        refresh()
+    else:
+        refresh(set().union(*(camps.get(filename, ()) for filename in related)))
+
+
+def read_status():
+    """Returns the days of supplies left at each camp of each ongoing plan, creating the table if it does not exist."""
+    try:
+        return data_access.read_table(STATUS_FILE)
+    except FileNotFoundError:
+        refresh()
+        return data_access.read_table(STATUS_FILE)
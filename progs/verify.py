@@ -1,19 +1,74 @@
-import datetime, os
-import logging
-import pandas as pd, re, datetime
-
+import datetime, logging, re, os, csv, pickle, bisect
+from progs import data_access
 
 """
 This is a function set that verify all the inputs to include all exception handling.
 You can simply use them to replace the input() functions.
 """
 
-# Creating list of valid cities in the world.
+# Valid cities in the world.
 # The csv file comes from the World Cities Database by SimpleMaps.com, last updated: March 31, 2023.
 # The file contains data for about 43 thousand cities.
-valid_cities_csv = pd.read_csv(os.path.join('data', 'worldcities.csv'))
-valid_cities = valid_cities_csv['city'].tolist()
-valid_cities = [city.lower() for city in valid_cities]
+# The city names are only loaded the first time a location is checked, from a pickled copy of the sorted names
+# which is regenerated whenever the csv file changes.
+CITIES_FILE = 'worldcities.csv'
+CITIES_CACHE = 'worldcities.pickle'
+_cities = None  # (frozenset of lowercase city names, sorted list of the same names)
+
+
+def _city_index():
+    """Returns the set and the sorted list of lowercase city names, loading them on first use."""
+    global _cities
+    if _cities is None:
+        names = _load_city_names()
+        _cities = (frozenset(names), names)
+    return _cities
+
+
+def _load_city_names():
+    """
+    Returns the sorted list of lowercase city names from the cache file if it is up to date with worldcities.csv.
+    Otherwise the names are read from worldcities.csv and the cache file is rewritten.
+    """
+    csv_path = data_access.table_path(CITIES_FILE)
+    cache_path = data_access.table_path(CITIES_CACHE)
+    st = os.stat(csv_path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_stamp, names = pickle.load(f)
+        if cached_stamp == stamp:
+            return names
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
+
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        names = sorted({row['city'].lower() for row in csv.DictReader(f)})
+    try:
+        with open(cache_path, 'wb') as f:
+            pickle.dump((stamp, names), f, protocol=pickle.HIGHEST_PROTOCOL)
+        logging.debug(f"{CITIES_CACHE} regenerated from {CITIES_FILE}.")
+    except OSError:
+        logging.warning(f"Unable to write {CITIES_CACHE}.")
+    return names
+
+
+def is_valid_city(city):
+    """Returns True if the city (in any case) is in the World Cities Database."""
+    return city.lower() in _city_index()[0]
+
+
+def cities_starting_with(prefix, limit=5):
+    """Returns up to limit lowercase city names starting with the given prefix, in alphabetical order."""
+    prefix = prefix.lower()
+    names = _city_index()[1]
+    matches = []
+    for i in range(bisect.bisect_left(names, prefix), len(names)):
+        if not names[i].startswith(prefix) or len(matches) == limit:
+            break
+        matches.append(names[i])
+    return matches
+
 
 def integer(line):
     """
@@ -33,6 +88,32 @@ def integer(line):
             print(e)
 
 
+def numbers(line, maximum):
+    """
+    Verify if the input is a selection of numbers from 1 to maximum, such as 1,3,5-8, or "all".
+    User will be requested to input again if not.
+    Returns the sorted list of numbers selected, or "0" to go back.
+    """
+    while True:
+        _numbers = input(line).strip().replace(" ", "")
+        if _numbers == "0":
+            return _numbers
+        if _numbers.lower() == "all":
+            return list(range(1, maximum + 1))
+        selected = set()
+        try:
+            for part in _numbers.split(","):
+                first, _, last = part.partition("-")
+                first, last = int(first), int(last or first)
+                if not 1 <= first <= last <= maximum:
+                    raise ValueError
+                selected.update(range(first, last + 1))
+            return sorted(selected)
+        except ValueError:
+            logging.error('ValueError raised from user input')
+            print(f"\nPlease enter numbers from 1 to {maximum}, separated by commas (e.g. 1,3,5-8), or [all].")
+
+
 def string(line):
     """
     Verify if the input is a string only.
@@ -88,7 +169,7 @@ def location(line):
         while True:
             # first checks that location is a string
             _location = string(line)
-            if _location.lower() in valid_cities:
+            if is_valid_city(_location):
                 return _location
             else:
                 logging.error(f'Location {_location} input by user is not a valid city in the database.')
@@ -120,8 +201,6 @@ def username(line):
     while True:
         _username = input(line).strip()
         s = re.search("^[a-zA-Z]+[a-zA-Z0-9_]*$", _username)
-        users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
-        select_username = users[users['username'] == _username]
         if _username == "0":
             return _username
         elif _username == "":
@@ -131,7 +210,7 @@ def username(line):
             logging.error(f'Username {_username} input by user is not in the correct format.')
             print("\nUsername can only contain letters, digits (0-9) and underscore (_), and must start with a letter. "
                   "\nPlease choose another username.")
-        elif 0 < len(select_username.index):  # username already exists
+        elif 0 < len(data_access.lookup('users.csv', username=_username).index):  # username already exists
             print("\nUsername is taken. Please choose another username.")
             logging.error("User entered a username that already exists.")
         else:
@@ -1,11 +1,12 @@
 # built-in modules
-import pandas as pd, numpy as np, re, datetime, os
+import pandas as pd, numpy as np, re, datetime
 import logging
 # custom modules and functions from other files
 from progs.coded_vars import convert_gender, convert_medical_condition
-from progs import refugee_profile_funcs, volunteering_session_funcs, resource_consumption
+from progs import refugee_profile_funcs, volunteering_session_funcs, resource_consumption, data_access, services, io_stats, resource_ledger
 from progs import verify as v
 
+@io_stats.track_actions
 class Volunteer:
     """Class for Volunteer users. Initialised when a user successfully logs in as a volunteer."""
     def __init__(self, username, password, first_name, last_name, email, phone_number, gender, date_of_birth, plan_id, camp_name):
@@ -21,6 +22,7 @@ class Volunteer:
         self.plan_id = plan_id
         self.camp_name = camp_name
         self.logged_in = True
+        resource_ledger.set_actor(username)  # movements of resources are recorded under the volunteer's username
 
     def volunteer_menu(self):
         """Main menu when a volunteer logs in, providing options to access sub-menus and methods for the various volunteer functionalities."""
@@ -230,6 +232,7 @@ class Volunteer:
         """Changes the user's logged_in attribute to False, causing the user to log out."""
         self.logged_in = False
         print("You are now logged out. See you again!\n")
+        io_stats.dump()
 
     def request_deactivation(self):
         """
@@ -261,10 +264,10 @@ class Volunteer:
 
         logging.debug("Deactivation request confirmed.")
         # update csv files
-        users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+        users = data_access.read_table('users.csv')
         cur_user = (users['username'] == self.username)
         users.loc[cur_user, 'deactivation_requested'] = 1
-        users.to_csv(os.path.join('data', 'users.csv'), index=False)
+        data_access.write_table(users, 'users.csv')
         logging.info("users.csv updated")
 
         print("\nYour request to deactivate your account has been registered.")
@@ -330,26 +333,21 @@ class Volunteer:
                     print("\nNew username is the same as current username.\n")
                     logging.error("Invalid user input.")
                     continue
-                users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
-                select_username = users[users['username'] == new_username]
+                select_username = data_access.lookup('users.csv', username=new_username)
                 if len(select_username.index) > 0:  # username already exists
                     print('\nUsername "' + new_username + '"is taken. '
                                                           '\nPlease choose another username.\n')
                     logging.error(f"{self.username} entered a username that already exists.")
                     continue
                 break
-            # update csv file
-            cur_user = (users['username'] == self.username)
-            users.loc[cur_user, 'username'] = new_username
-            users = users.sort_values(by=['username'])  # sort by username before saving
-            users.to_csv(os.path.join('data', 'users.csv'), index=False)
-            logging.debug("users.csv updated")
+            # update csv files, both saved when the block ends
+            with data_access.UnitOfWork():
+                data_access.update_rows('users.csv', {'username': new_username}, username=self.username)
+                logging.debug("users.csv updated")
 
-            # also update for volunteering sessions
-            vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
-            vol_times.loc[vol_times["username"] == self.username, "username"] = new_username
-            vol_times.to_csv(os.path.join('data', 'volunteering_times.csv'), index=False)
-            logging.debug("volunteering_times.csv updated")
+                # also update for volunteering sessions
+                data_access.update_rows('volunteering_times.csv', {'username': new_username}, username=self.username)
+                logging.debug("volunteering_times.csv updated")
             print("\nUsername updated successfully!")
             print("Your new username is:", new_username)
             self.username = new_username
@@ -382,10 +380,10 @@ class Volunteer:
                     continue
                 break
             # update csv file
-            users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+            users = data_access.read_table('users.csv')
             cur_user = (users['username'] == self.username)
             users.loc[cur_user, 'password'] = new_password
-            users.to_csv(os.path.join('data', 'users.csv'), index=False)
+            data_access.write_table(users, 'users.csv')
             logging.debug("users.csv updated")
             print("\nPassword updated successfully!")
             print("Your new password is:", new_password)
@@ -410,10 +408,10 @@ class Volunteer:
                     new_fname = f"{new_fname[0].upper()}{new_fname[1:]}"
                     break
             # update csv file
-            users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+            users = data_access.read_table('users.csv')
             cur_user = (users['username'] == self.username)
             users.loc[cur_user, 'first_name'] = new_fname
-            users.to_csv(os.path.join('data', 'users.csv'), index=False)
+            data_access.write_table(users, 'users.csv')
             logging.debug("users.csv updated")
             print("\nFirst name updated successfully!")
             print("You have changed your first name to:", new_fname)
@@ -436,10 +434,10 @@ class Volunteer:
                 else:
                     break
             # update csv file
-            users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+            users = data_access.read_table('users.csv')
             cur_user = (users['username'] == self.username)
             users.loc[cur_user, 'last_name'] = new_lname
-            users.to_csv(os.path.join('data', 'users.csv'), index=False)
+            data_access.write_table(users, 'users.csv')
             logging.debug("users.csv updated")
             print("\nLast name updated successfully!")
             print("You have changed your last name to:", new_lname)
@@ -476,10 +474,10 @@ class Volunteer:
                     continue
                 break
             # update csv file
-            users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+            users = data_access.read_table('users.csv')
             cur_user = (users['username'] == self.username)
             users.loc[cur_user, 'gender'] = new_gender
-            users.to_csv(os.path.join('data', 'users.csv'), index=False)
+            data_access.write_table(users, 'users.csv')
             logging.debug("users.csv updated")
 
             new_gender_str = convert_gender(new_gender)
@@ -514,10 +512,10 @@ class Volunteer:
                     continue
                 break
             # update csv file
-            users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+            users = data_access.read_table('users.csv')
             cur_user = (users['username'] == self.username)
             users.loc[cur_user, 'email'] = new_email
-            users.to_csv(os.path.join('data', 'users.csv'), index=False)
+            data_access.write_table(users, 'users.csv')
             logging.debug("users.csv updated")
             print("\nEmail address updated successfully!")
             print("You have changed your email address to:", new_email)
@@ -552,10 +550,10 @@ class Volunteer:
                     new_phone_num = "+" + new_phone_num
                 break
             # update csv file
-            users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+            users = data_access.read_table('users.csv')
             cur_user = (users['username'] == self.username)
             users.loc[cur_user, 'phone_number'] = new_phone_num
-            users.to_csv(os.path.join('data', 'users.csv'), index=False)
+            data_access.write_table(users, 'users.csv')
             logging.debug("users.csv updated")
             print("\nPhone number updated successfully!")
             print("You have changed your phone number to:", new_phone_num)
@@ -616,7 +614,7 @@ class Volunteer:
         """
         def add_camp(plan_id):
             """Prompts the volunteer to select a camp if they currently do not have a camp."""
-            camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+            camps = data_access.read_camps(plan_id)
             logging.debug(f"{self.username} currently has no camp and is prompted to select a camp.")
             while True:
                 print("\nPlease choose a camp from the list below.")
@@ -647,7 +645,7 @@ class Volunteer:
 
         def edit_camp(plan_id):
             """Prompts the volunteer to select a new camp if they currently have a camp."""
-            camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+            camps = data_access.read_camps(plan_id)
             if len(camps.index) == 1:
                 print("There is currently only one camp in your plan. "
                       "\nUnable to change your camp identification now.")
@@ -738,32 +736,33 @@ class Volunteer:
 
         # update csv files
         if new_camp != self.camp_name:
-            users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
-            cur_user = (users['username'] == self.username)
-            users.loc[cur_user, 'camp_name'] = new_camp
-            users.to_csv(os.path.join('data', 'users.csv'), index=False)
-            logging.debug("users.csv updated")
-
-            camps = pd.read_csv(os.path.join('data', self.plan_id + '.csv'))
-            if new_camp:
-                chosen = (camps['camp_name'] == new_camp)
-                camps.loc[chosen, 'volunteers'] = camps.loc[chosen, 'volunteers'] + 1
-            if self.camp_name:
-                old = (camps['camp_name'] == self.camp_name)
-                camps.loc[old, 'volunteers'] = camps.loc[old, 'volunteers'] - 1
-            camps.to_csv(os.path.join('data', self.plan_id + '.csv'), index=False)
-            logging.debug("camps csv file updated")
-
-            if self.camp_name and not new_camp: # remove volunteering sessions
-                vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
-                vol_times = vol_times.drop(vol_times[vol_times['username'] == self.username].index)
-                vol_times.to_csv(os.path.join('data', 'volunteering_times.csv'), index=False)
-                logging.debug("volunteering_times.csv updated")
-            if self.camp_name and new_camp: # change camp_name in volunteering_times.csv
-                vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
-                vol_times.loc[vol_times["username"] == self.username, "camp_name"] = new_camp
-                vol_times.to_csv(os.path.join('data', 'volunteering_times.csv'), index=False)
-                logging.debug("volunteering_times.csv updated")
+            with data_access.UnitOfWork():
+                users = data_access.read_table('users.csv', expand=['camp_name'])
+                cur_user = (users['username'] == self.username)
+                users.loc[cur_user, 'camp_name'] = new_camp
+                data_access.write_table(users, 'users.csv')
+                logging.debug("users.csv updated")
+
+                camps = data_access.read_camps(self.plan_id)
+                if new_camp:
+                    chosen = (camps['camp_name'] == new_camp)
+                    camps.loc[chosen, 'volunteers'] = camps.loc[chosen, 'volunteers'] + 1
+                if self.camp_name:
+                    old = (camps['camp_name'] == self.camp_name)
+                    camps.loc[old, 'volunteers'] = camps.loc[old, 'volunteers'] - 1
+                data_access.write_camps(camps, self.plan_id)
+                logging.debug("camps csv file updated")
+
+                if self.camp_name and not new_camp: # remove volunteering sessions
+                    vol_times = data_access.read_table('volunteering_times.csv')
+                    vol_times = vol_times.drop(vol_times[vol_times['username'] == self.username].index)
+                    data_access.write_table(vol_times, 'volunteering_times.csv')
+                    logging.debug("volunteering_times.csv updated")
+                if self.camp_name and new_camp: # change camp_name in volunteering_times.csv
+                    vol_times = data_access.read_table('volunteering_times.csv', expand=['camp_name'])
+                    vol_times.loc[vol_times["username"] == self.username, "camp_name"] = new_camp
+                    data_access.write_table(vol_times, 'volunteering_times.csv')
+                    logging.debug("volunteering_times.csv updated")
 
             print("\nCamp identification updated successfully!")
             print("Your new camp is:", new_camp)
@@ -798,7 +797,7 @@ class Volunteer:
 
         print("\n--------------------------------------------")
         print("\tCREATE REFUGEE PROFILE")
-        camps = pd.read_csv(os.path.join('data', self.plan_id + '.csv'))
+        camps = data_access.read_camps(self.plan_id)
         cur_camp = camps[camps['camp_name'] == self.camp_name]
         remaining_cap = cur_camp.iloc[0]['capacity'] - cur_camp.iloc[0]['refugees']
 
@@ -811,7 +810,7 @@ class Volunteer:
 
         progress = 0
         # loop allowing user to go back
-        while progress < 6:
+        while progress < 7:
             if progress == 0:
                 refugee_name = add_name()
                 if refugee_name == "0":
@@ -875,26 +874,26 @@ class Volunteer:
                 else:
                     progress += 1
 
-        logging.debug(f"{self.username} has finished entering refugee details.")
-        # Update csv tables
-        refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-        if len(refugees.index) == 0:
-            refugee_id = 1
-        else:
-            refugee_id = refugees['refugee_id'].iloc[-1] + 1
-        new_row = {'refugee_id': [refugee_id], 'refugee_name': [refugee_name], 'gender': [gender],
-                   'date_of_birth': [date_of_birth], 'plan_id': [self.plan_id], 'camp_name': [self.camp_name],
-                   'medical_condition': [medical_cond], 'family_members': [family], 'remarks': [remarks]}
-        new = pd.DataFrame(new_row)
-        refugees = pd.concat([refugees, new], ignore_index=True)
-        refugees.to_csv(os.path.join('data', 'refugees.csv'), index=False)
-        logging.debug("refugees.csv updated")
-
-        camps = pd.read_csv(os.path.join('data', self.plan_id + '.csv'))
-        chosen = (camps['camp_name'] == self.camp_name)
-        camps.loc[chosen, 'refugees'] = camps.loc[chosen, 'refugees'] + family
-        camps.to_csv(os.path.join('data', self.plan_id + '.csv'), index=False)
-        logging.debug("camps csv file updated")
+            elif progress == 6:
+                logging.debug(f"{self.username} has finished entering refugee details.")
+                # Update csv tables
+                try:
+                    refugee_id = services.create_refugee(self.plan_id, self.camp_name, refugee_name, gender,
+                                                         date_of_birth, medical_cond, family, remarks)
+                except ValueError as e:  # the camp has filled up since its remaining capacity was shown
+                    print(f"\n{e}")
+                    logging.error(f"Refugee profile not created: {e}")
+                    cur_camp = data_access.lookup(data_access.CAMPS_FILE, plan_id=self.plan_id, camp_name=self.camp_name)
+                    remaining_cap = cur_camp.iloc[0]['capacity'] - cur_camp.iloc[0]['refugees']
+                    family = refugee_profile_funcs.add_family(remaining_cap)
+                    if family == "X":
+                        logging.debug("Returning to previous menu.")
+                        return
+                    elif family == "B":
+                        logging.debug("Returning to previous step.")
+                        progress -= 1
+                else:
+                    progress += 1
 
         # Print details provided
         gender_str = convert_gender(gender)
@@ -915,8 +914,7 @@ class Volunteer:
         """Enables the volunteer to view the profile of a selected refugee at their camp."""
         print("\n--------------------------------------------")
         print("\tVIEW REFUGEE PROFILE")
-        refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-        refugees = refugees[(refugees['plan_id'] == self.plan_id) & (refugees['camp_name'] == self.camp_name)]
+        refugees = data_access.lookup('refugees.csv', plan_id=self.plan_id, camp_name=self.camp_name)
         if len(refugees.index) == 0:
             print("There are no refugees at your current camp.")
             logging.warning(f"No refugees at {self.username}'s camp. Returning to previous menu.")
@@ -996,8 +994,7 @@ class Volunteer:
         """
         print("\n--------------------------------------------")
         print("    EDIT OR REMOVE REFUGEE PROFILE")
-        refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-        refugees = refugees[(refugees['plan_id'] == self.plan_id) & (refugees['camp_name'] == self.camp_name)]
+        refugees = data_access.lookup('refugees.csv', plan_id=self.plan_id, camp_name=self.camp_name)
         if len(refugees.index) == 0:
             print("There are no refugees at your current camp.")
             logging.warning(f"No refugees at {self.username}'s camp. Returning to previous menu.")
@@ -1046,8 +1043,7 @@ class Volunteer:
 
         # outer loop to edit multiple attributes, exit if 0 is entered
         while True:
-            refugees = pd.read_csv(os.path.join('data', 'refugees.csv'))
-            selected = refugees[refugees['refugee_id'] == refugee_id]
+            selected = data_access.lookup('refugees.csv', refugee_id=refugee_id)
             selected = selected.replace({np.nan: None})
             refugee_name = selected.iloc[0]['refugee_name']
             gender = selected.iloc[0]['gender']
@@ -1105,7 +1101,7 @@ class Volunteer:
         logging.debug(f"Printing details of {self.username}'s camp.")
         print("\n--------------------------------------------")
         print("\tDISPLAY CAMP INFORMATION")
-        camps = pd.read_csv(os.path.join('data', self.plan_id + '.csv'))
+        camps = data_access.read_camps(self.plan_id)
         my_camp = camps[camps['camp_name'] == self.camp_name]
         print("Your camp is " + self.camp_name + " for plan ID " + self.plan_id + ".")
         print("Number of volunteers: ", my_camp.iloc[0]['volunteers'])
@@ -1124,7 +1120,7 @@ class Volunteer:
         """
         def edit_capacity():
             """Prompts the volunteer to enter the new capacity of their camp."""
-            camps = pd.read_csv(os.path.join('data', self.plan_id + '.csv'))
+            camps = data_access.read_camps(self.plan_id)
             my_camp = camps[camps['camp_name'] == self.camp_name]
             print("\nCurrent capacity of " + self.camp_name + ": " + str(my_camp.iloc[0]['capacity']))
             print("The camp currently has " + str(my_camp.iloc[0]['refugees']) + " refugees.")
@@ -1158,7 +1154,7 @@ class Volunteer:
             # update csv file
             chosen = (camps['camp_name'] == self.camp_name)
             camps.loc[chosen, 'capacity'] = new_capacity
-            camps.to_csv(os.path.join('data', self.plan_id + '.csv'), index=False)
+            data_access.write_camps(camps, self.plan_id)
             print("\nRefugee capacity updated successfully!")
             print("New refugee capacity:", new_capacity)
             logging.debug("camps csv file updated")
@@ -1206,10 +1202,10 @@ class Volunteer:
         """
         print("\n--------------------------------------------")
         print("\tADD VOLUNTEERING SESSION")
-        vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
+        vol_times = data_access.read_table('volunteering_times.csv')
         cur_user_times = vol_times[vol_times['username'] == self.username]
-        # sort existing times by ascending start time (need date in YYYY-MM-DD format)
-        cur_user_times = cur_user_times.sort_values(by=['start_time'])
+        # interval index of the existing sessions, sorted by start time
+        sessions = volunteering_session_funcs.SessionIndex(cur_user_times)
 
         progress = 0
         # loop allowing user to go back
@@ -1223,7 +1219,7 @@ class Volunteer:
                     progress += 1
 
             elif progress == 1:
-                start_time = volunteering_session_funcs.select_start_time(vol_date, cur_user_times)
+                start_time = volunteering_session_funcs.select_start_time(vol_date, sessions)
                 if start_time == "0":
                     logging.debug("Returning to previous menu.")
                     return
@@ -1234,7 +1230,7 @@ class Volunteer:
                     progress += 1
 
             elif progress == 2:
-                end_time = volunteering_session_funcs.select_end_time(start_time, cur_user_times)
+                end_time = volunteering_session_funcs.select_end_time(start_time, sessions)
                 if end_time == "X":
                     logging.debug("Returning to previous menu.")
                     return
@@ -1257,9 +1253,9 @@ class Volunteer:
 
         logging.debug(f"{self.username} has finished entering details of new volunteering session.")
         # update csv file
-        vol_times = open(os.path.join('data', 'volunteering_times.csv'), "a")
-        vol_times.write(f'\n{self.username},{self.plan_id},{self.camp_name},{start_time},{end_time}')
-        vol_times.close()
+        data_access.append_row('volunteering_times.csv', {'username': self.username, 'plan_id': self.plan_id,
+                                                          'camp_name': self.camp_name, 'start_time': start_time,
+                                                          'end_time': end_time})
         logging.debug("volunteering_times.csv updated")
         print("\nVolunteering session added successfully!")
         return
@@ -1268,7 +1264,7 @@ class Volunteer:
         """Enables the volunteer to view all volunteering sessions they have scheduled."""
         print("\n--------------------------------------------")
         print("\tVIEW VOLUNTEERING SESSIONS")
-        vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
+        vol_times = data_access.read_table('volunteering_times.csv')
         cur_user_times = vol_times[vol_times['username'] == self.username]
         if len(cur_user_times.index) == 0:
             print("You do not have any volunteering sessions.")
@@ -1288,7 +1284,7 @@ class Volunteer:
         """Enables the volunteer to remove a volunteering sessions they have scheduled."""
         print("\n--------------------------------------------")
         print("\tREMOVE VOLUNTEERING SESSION")
-        vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
+        vol_times = data_access.read_table('volunteering_times.csv')
         cur_user_times = vol_times[vol_times['username'] == self.username]
         if len(cur_user_times.index) == 0:
             print("You do not have any volunteering sessions.")
@@ -1346,7 +1342,7 @@ class Volunteer:
             # update csv file
             vol_times = vol_times.drop(vol_times[(vol_times['username'] == self.username) &
                                                  (vol_times['start_time'] == cur_user_times['start_time'].iloc[remove-1])].index)
-            vol_times.to_csv(os.path.join('data', 'volunteering_times.csv'), index=False)
+            data_access.write_table(vol_times, 'volunteering_times.csv')
             logging.debug("volunteering_times.csv updated")
             print("Volunteering session has been removed successfully.")
             return
@@ -1359,7 +1355,7 @@ class Volunteer:
         print("\n--------------------------------------------")
         print("\t\tREQUEST RESOURCES")
         print("You are requesting resources for", self.camp_name, "at plan", self.plan_id)
-        camps = pd.read_csv(os.path.join('data', self.plan_id + '.csv'))
+        camps = data_access.read_camps(self.plan_id)
         my_camp = camps[camps['camp_name'] == self.camp_name]
         print("Your camp's current resources:")
         print("Food packets:", my_camp.iloc[0]['food'])
@@ -1440,33 +1436,17 @@ class Volunteer:
                                   f"They will be prompted to re-enter the request.")
                     progress = 0
                 else:
-                    progress += 1
+                    # added to the camp's pending request if there is one, so the admin gets one request per camp
+                    try:
+                        services.request_resources(self.username, self.plan_id, self.camp_name, food, water, kits)
+                    except ValueError as e:
+                        print(f"\n{e} Please enter your request again.")
+                        logging.error(f"Resource request not recorded: {e}")
+                        progress = 0
+                    else:
+                        progress += 1
 
-        # collected data
-        data = {
-            'username': [self.username],
-            'plan_id': [self.plan_id],
-            'camp_name': [self.camp_name],
-            'food': [food],
-            'water': [water],
-            'firstaid_kits': [kits],
-            'resolved': 0
-        }
-        df = pd.DataFrame(data)
-
-        try:
-            existing_df = pd.read_csv(os.path.join('data', 'resource_requests.csv'))
-        except FileNotFoundError:
-            df.to_csv(os.path.join('data', 'resource_requests.csv'), index=False)
-            logging.info(f"{self.username} requests for more resources while no file found.\nNew csv file is created.")
-            print("\nYour request is recorded successfully.\n"
-                  "An administrator will respond to your request shortly.")
-            return
-        # Append the new data
-        updated_df = pd.concat([existing_df, df], ignore_index=True)
-        updated_df.to_csv(os.path.join('data', 'resource_requests.csv'), index=False)
         logging.debug("Resource request complete.")
-        logging.debug("resource_requests.csv updated")
 
         print("\nYour request is recorded successfully.\n"
               "An administrator will respond to your request shortly.")
@@ -1,10 +1,11 @@
-import pandas as pd, re, datetime, os
+import re, datetime
 import logging
 from progs.coded_vars import convert_gender
+from progs import data_access
 
 def add_plan():
     """Prompts the user to select an ongoing humanitarian plan."""
-    plans = pd.read_csv(os.path.join('data', 'humanitarian_plan.csv'))
+    plans = data_access.read_table('humanitarian_plan.csv')
     plans = plans[plans['end_date'].isna()]  # only show plans that haven't been closed
 
     if len(plans.index) == 0:
@@ -43,7 +44,7 @@ def add_camp(plan_id):
     Takes as input the plan_id of an ongoing humanitarian plan.
     Prompts the user to select a camp at this plan.
     """
-    camps = pd.read_csv(os.path.join('data', plan_id + '.csv'))
+    camps = data_access.read_camps(plan_id)
 
     logging.debug("User prompted to select camp.")
     while True:
@@ -97,8 +98,7 @@ def add_username():
                 "and must start with a letter. \nPlease choose another username.")
             logging.error("Invalid user input.")
             continue
-        users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
-        select_username = users[users['username'] == username]
+        select_username = data_access.lookup('users.csv', username=username)
         if len(select_username.index) > 0:  # username already exists
             print("\nUsername is taken. Please choose another username.")
             logging.error("User entered a username that already exists.")
@@ -327,25 +327,18 @@ def edit_username(username):
                   "\nPlease choose another username.")
             logging.error("Invalid user input.")
             continue
-        users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
-        select_username = users[users['username'] == new_username]
+        select_username = data_access.lookup('users.csv', username=new_username)
         if len(select_username.index) > 0:  # username already exists
             print("\nUsername is taken. Please choose another username.")
             logging.error("Admin entered a username that already exists.")
             continue
         break
-    # update csv file
-    cur_user = (users['username'] == username)
-    users.loc[cur_user, 'username'] = new_username
-    users = users.sort_values(by=['username'])  # sort by username before saving
-    users.to_csv(os.path.join('data', 'users.csv'), index=False)
-    logging.debug("users.csv updated")
-
-    # also update for volunteering sessions
-    vol_times = pd.read_csv(os.path.join('data', 'volunteering_times.csv'))
-    vol_times.loc[vol_times["username"] == username, "username"] = new_username
-    vol_times.to_csv(os.path.join('data', 'volunteering_times.csv'), index=False)
-    logging.debug("volunteering_times.csv updated")
+    # update csv files, including the volunteer's volunteering sessions
+    with data_access.UnitOfWork():
+        data_access.update_rows('users.csv', {'username': new_username}, username=username)
+        logging.debug("users.csv updated")
+        data_access.update_rows('volunteering_times.csv', {'username': new_username}, username=username)
+        logging.debug("volunteering_times.csv updated")
 
     print("Username updated successfully!")
     print("Volunteer's new username is:", new_username)
@@ -379,10 +372,10 @@ def edit_password(username, password):
             continue
         break
     # update csv file
-    users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+    users = data_access.read_table('users.csv')
     cur_user = (users['username'] == username)
     users.loc[cur_user, 'password'] = new_password
-    users.to_csv(os.path.join('data', 'users.csv'), index=False)
+    data_access.write_table(users, 'users.csv')
     print("Password updated successfully!")
     print("You have changed " + username + "'s password to:", new_password)
     logging.debug("Password updated successfully")
@@ -414,10 +407,10 @@ def edit_first_name(username, first_name):
             continue
         break
     # update csv file
-    users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+    users = data_access.read_table('users.csv')
     cur_user = (users['username'] == username)
     users.loc[cur_user, 'first_name'] = new_fname
-    users.to_csv(os.path.join('data', 'users.csv'), index=False)
+    data_access.write_table(users, 'users.csv')
     logging.debug("users.csv updated")
     print("First name updated successfully!")
     print("You have changed " + username + "'s first name to:", new_fname)
@@ -449,10 +442,10 @@ def edit_last_name(username, last_name):
             continue
         break
     # update csv file
-    users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+    users = data_access.read_table('users.csv')
     cur_user = (users['username'] == username)
     users.loc[cur_user, 'last_name'] = new_lname
-    users.to_csv(os.path.join('data', 'users.csv'), index=False)
+    data_access.write_table(users, 'users.csv')
     logging.debug("users.csv updated")
     print("Last name updated successfully!")
     print("You have changed " + username + "'s last name to:", new_lname)
@@ -487,10 +480,10 @@ def edit_gender(username, gender):
             continue
         break
     # update csv file
-    users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+    users = data_access.read_table('users.csv')
     cur_user = (users['username'] == username)
     users.loc[cur_user, 'gender'] = new_gender
-    users.to_csv(os.path.join('data', 'users.csv'), index=False)
+    data_access.write_table(users, 'users.csv')
     logging.debug("users.csv updated")
 
     new_gender_str = convert_gender(new_gender)
@@ -542,10 +535,10 @@ def edit_dob(username, date_of_birth):
             continue
         break
     # update csv file
-    users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+    users = data_access.read_table('users.csv')
     cur_user = (users['username'] == username)
     users.loc[cur_user, 'date_of_birth'] = new_dob
-    users.to_csv(os.path.join('data', 'users.csv'), index=False)
+    data_access.write_table(users, 'users.csv')
     logging.debug("users.csv updated")
     print("Date of birth updated successfully!")
     print("You have corrected " + username + "'s date of birth to:", new_dob)
@@ -578,10 +571,10 @@ def edit_email(username, email):
             continue
         break
     # update csv file
-    users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+    users = data_access.read_table('users.csv')
     cur_user = (users['username'] == username)
     users.loc[cur_user, 'email'] = new_email
-    users.to_csv(os.path.join('data', 'users.csv'), index=False)
+    data_access.write_table(users, 'users.csv')
     logging.debug("users.csv updated")
     print("Email address updated successfully!")
     print("You have changed " + username + "'s email address to:", new_email)
@@ -615,10 +608,10 @@ def edit_phone_num(username, phone_number):
             new_phone_num = "+" + new_phone_num
         break
     # update csv file
-    users = pd.read_csv(os.path.join('data', 'users.csv'), dtype={'password': str})
+    users = data_access.read_table('users.csv')
     cur_user = (users['username'] == username)
     users.loc[cur_user, 'phone_number'] = new_phone_num
-    users.to_csv(os.path.join('data', 'users.csv'), index=False)
+    data_access.write_table(users, 'users.csv')
     logging.debug("users.csv updated")
     print("Phone number updated successfully!")
     print("You have changed " + username + "'s phone number to:", new_phone_num)
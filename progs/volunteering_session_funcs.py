@@ -1,5 +1,90 @@
-import datetime, os
+import pandas as pd, numpy as np, datetime
 import logging
+from progs import data_access
+
+# volunteering sessions are handled as integer half-hour slot numbers, counted from 1970-01-01 00:00
+SLOTS_PER_DAY = 48
+# there must be at least 1 hour (2 slots) between volunteering sessions
+GAP = 2
+# each volunteering session can last up to 5 hours (10 slots)
+MAX_LENGTH = 10
+EPOCH = datetime.date(1970, 1, 1).toordinal()
+
+
+def to_slot(time_str):
+    """Converts a time in the format YYYY-MM-DD HH:mm (e.g. 2023-11-18 14:30) into a half-hour slot number."""
+    dt = datetime.datetime.strptime(time_str, '%Y-%m-%d %H:%M')
+    return (dt.date().toordinal() - EPOCH) * SLOTS_PER_DAY + dt.hour * 2 + dt.minute // 30
+
+
+def from_slot(slot, fmt='%Y-%m-%d %H:%M'):
+    """Converts a half-hour slot number back into a time string (by default in the format YYYY-MM-DD HH:mm)."""
+    return (datetime.datetime(1970, 1, 1) + datetime.timedelta(minutes=30 * int(slot))).strftime(fmt)
+
+
+class SessionIndex:
+    """
+    Interval index of a volunteer's existing sessions, used to work out available start and end times.
+    The start and end slots of the sessions are kept in two sorted arrays. Since a volunteer's sessions never overlap,
+    the end slots are in the same order as the start slots, so conflicts can be found with a binary search.
+    """
+
+    def __init__(self, cur_user_times):
+        """Parses the start and end times of the volunteer's sessions (a DataFrame from volunteering_times.csv)."""
+        starts = _parse_slots(cur_user_times['start_time'])
+        ends = _parse_slots(cur_user_times['end_time'])
+        order = np.argsort(starts, kind='stable')
+        self.starts = starts[order]
+        self.ends = ends[order]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def available_starts(self, first, last):
+        """
+        Returns an array of the slots from first to last (inclusive) at which a new session can start,
+        i.e. those not within 1 hour before the start or after the end of an existing session.
+        """
+        candidates = np.arange(first, last + 1)
+        if len(self) == 0:
+            return candidates
+        # latest session starting (including the 1-hour gap) at or before each candidate
+        i = np.searchsorted(self.starts - GAP, candidates, side='right') - 1
+        blocked = (i >= 0) & (candidates < self.ends[np.maximum(i, 0)] + GAP)
+        return candidates[~blocked]
+
+    def available_ends(self, start):
+        """
+        Returns an array of the slots at which a session starting at the given slot can end:
+        up to 5 hours after the start and at least 1 hour before the volunteer's next session.
+        """
+        ends = np.arange(start + 1, start + MAX_LENGTH + 1)
+        j = np.searchsorted(self.starts, start, side='right')
+        if j < len(self):
+            ends = ends[ends <= self.starts[j] - GAP]
+        return ends
+
+    def affecting(self, first, last):
+        """Returns the (start, end) slots of the sessions that affect which start times are available from first to last."""
+        overlap = (self.starts - GAP <= last) & (self.ends + GAP > first)
+        return list(zip(self.starts[overlap], self.ends[overlap]))
+
+
+def _parse_slots(times):
+    """Converts a Series of times in the format YYYY-MM-DD HH:mm into an array of half-hour slot numbers."""
+    minutes = pd.to_datetime(times, format='%Y-%m-%d %H:%M').to_numpy().astype('datetime64[m]').astype(np.int64)
+    return minutes // 30
+
+
+def purge_past_sessions():
+    """Deletes all volunteering sessions that ended in the past. Run when a user logs in."""
+    vol_times = data_access.read_table('volunteering_times.csv')
+    n = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    past = vol_times['end_time'] < n
+    if past.any():
+        data_access.write_table(vol_times[~past], 'volunteering_times.csv')
+        logging.debug("Past volunteering sessions deleted from volunteering_times.csv")
+
 
 def select_date():
     """Prompts the user to enter the date of the volunteering session."""
@@ -31,38 +116,26 @@ def select_date():
         return datetime.datetime.strftime(vol_dt, '%Y-%m-%d')  # e.g. 2023-11-18
 
 
-def select_start_time(vol_date, cur_user_times):
+def select_start_time(vol_date, sessions):
     """
     Prompts the user to enter the start time of the volunteering session.
-    This function takes as input the date of the session and the volunteer's existing sessions.
+    This function takes as input the date of the session and the SessionIndex of the volunteer's existing sessions.
     A list of available start times on this date is generated, which the user has the option to view.
     """
     vol_date2 = datetime.datetime.strptime(vol_date, '%Y-%m-%d').date().strftime('%d-%m-%Y')
+    first = to_slot(vol_date + " 00:00")
+    last = first + SLOTS_PER_DAY - 1
 
-    prev_day = datetime.datetime.strptime(vol_date, '%Y-%m-%d').date() - datetime.timedelta(days=1)
-    prev_day1 = prev_day.strftime('%Y-%m-%d') + " 23:30"
-    next_day = datetime.datetime.strptime(vol_date, '%Y-%m-%d').date() + datetime.timedelta(days=1)
-    next_day1 = next_day.strftime('%Y-%m-%d') + " 00:00"
-    next_day2 = next_day.strftime('%Y-%m-%d') + " 00:30"
-
-    booked_slots = cur_user_times[(cur_user_times['start_time'].str.startswith(vol_date)) |
-                                  (cur_user_times['start_time'] == next_day1) |
-                                  (cur_user_times['start_time'] == next_day2) |
-                                  (cur_user_times['end_time'].str.startswith(vol_date)) |
-                                  (cur_user_times['end_time'] == prev_day1)]
+    booked_slots = sessions.affecting(first, last)
 
     logging.debug("User is shown any existing volunteering sessions that affect available start times on the selected date.")
-    if len(booked_slots.index) == 0:
+    if len(booked_slots) == 0:
         print("\nYou have not added any volunteering sessions on or affecting", vol_date2 + " yet.")
     else:
         print("\nYou have added the following volunteering sessions:")
-        # print existing times affecting the selected date, switching from YYYY-MM-DD to DD-MM-YYYY
-        for row in range(len(booked_slots.index)):
-            print("Start:",
-                  datetime.datetime.strptime(booked_slots['start_time'].iloc[row], "%Y-%m-%d %H:%M").strftime(
-                      "%d-%m-%Y %H:%M"), "\t", "End:",
-                  datetime.datetime.strptime(booked_slots['end_time'].iloc[row], "%Y-%m-%d %H:%M").strftime(
-                      "%d-%m-%Y %H:%M"))
+        # print existing times affecting the selected date in the format DD-MM-YYYY
+        for start, end in booked_slots:
+            print("Start:", from_slot(start, "%d-%m-%Y %H:%M"), "\t", "End:", from_slot(end, "%d-%m-%Y %H:%M"))
 
     print("\nYou are welcome to volunteer at any time of the day.")
     print("Note that all volunteering sessions must start on the hour or half past (e.g. 09:00, 15:30).")
@@ -72,18 +145,7 @@ def select_start_time(vol_date, cur_user_times):
 
     logging.debug("Generating list of available start times.")
     # generate list of available start times based on conditions above
-    available = []
-    for time in [datetime.time(h, m).strftime('%H:%M') for h in range(0, 24) for m in (0, 30)]:
-        time_str = vol_date + " " + time  # e.g. 2023-11-18 00:30
-        time_d = datetime.datetime.strptime(time_str, "%Y-%m-%d %H:%M")
-        for row in range(len(booked_slots.index)):
-            if (time_d >= datetime.datetime.strptime(booked_slots['start_time'].iloc[row],
-                                                     "%Y-%m-%d %H:%M") - datetime.timedelta(hours=1)
-                    and time_d < datetime.datetime.strptime(booked_slots['end_time'].iloc[row],
-                                                            "%Y-%m-%d %H:%M") + datetime.timedelta(hours=1)):
-                break
-        else:
-            available.append(time)
+    available = [from_slot(slot, '%H:%M') for slot in sessions.available_starts(first, last)]
 
     if len(available) == 0:
         print("No available start times on the selected date. Please select another date.")
@@ -111,26 +173,15 @@ def select_start_time(vol_date, cur_user_times):
         return vol_date + " " + start  # e.g. 2023-11-18 00:30
 
 
-def select_end_time(start_time, cur_user_times):
+def select_end_time(start_time, sessions):
     """
     Prompts the user to select the end time of the volunteering session.
-    This function takes as input the start time of the session and the volunteer's existing sessions.
+    This function takes as input the start time of the session and the SessionIndex of the volunteer's existing sessions.
     A list of possible end times is generated, which the user must select from.
     """
-    # find next slot booked after start time
-    next_slot = cur_user_times[cur_user_times['start_time'] > start_time].head(1)
-    logging.debug("Generating list of available start times.")
-    # generate list of available end times
-    available_end = []
-    st = datetime.datetime.strptime(start_time, '%Y-%m-%d %H:%M')
-    for step in range(1, 11):
-        time_d = st + datetime.timedelta(minutes=30 * step)
-        if len(next_slot.index) > 0:
-            if time_d > datetime.datetime.strptime(next_slot['start_time'].iloc[0],
-                                                   "%Y-%m-%d %H:%M") - datetime.timedelta(hours=1):
-                break
-        time = time_d.strftime('%d-%m-%Y %H:%M')
-        available_end.append(time)
+    logging.debug("Generating list of available end times.")
+    # generate list of available end times, stopping 1 hour before the next session booked after the start time
+    available_end = [from_slot(slot, '%d-%m-%Y %H:%M') for slot in sessions.available_ends(to_slot(start_time))]
 
     logging.debug("User prompted to select end time of volunteering session.")
     while True: